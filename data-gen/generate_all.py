@@ -6,16 +6,19 @@ Usage:
     python generate_all.py
     python generate_all.py --config custom_config.yml
     python generate_all.py --domains sales,crm --output test_output/
+    python generate_all.py --append-days 1
+    python generate_all.py --cdc-batches 3
 """
 
 import os
 import sys
+import shutil
 import yaml
 import argparse
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional
 import pandas as pd
 from tqdm import tqdm
 
@@ -32,8 +35,26 @@ from utils.conformed_dimensions import (
     generate_dim_project,
     generate_dim_account
 )
-from utils.data_quality import validate_referential_integrity, validate_business_rules
+from utils.data_quality import (
+    check_referential_integrity, validate_referential_integrity,
+    compile_business_rules, export_business_rules, check_business_rules, validate_business_rules,
+    resolve_distributions, check_distributions, validate_distributions
+)
+from utils.profiler import profile_chunk, merge_profiles, write_profile
 from utils.text_generator import generate_unstructured_files
+from utils.append import (
+    INCREMENTS_DIR, CDC_DIR, APPEND_TABLES, GROWING_DIMENSIONS, join_window, favor_new_members,
+    track_keys, track_key_chunks, key_offsets, shift_keys, shift_key_chunks,
+    window_config, new_manifest, read_manifest, write_manifest, restore_rng, read_table
+)
+from utils.scd import (
+    SCD2_DIMENSIONS, history_table_name, generate_scd2_history, extend_history,
+    version_indexes, add_version_keys, add_version_key_chunks
+)
+from utils.surrogate_keys import (
+    SURROGATE_DIMENSIONS, KEYMAPS_DIR, key_column, read_key_maps, assign_surrogate_keys,
+    surrogate_key_indexes, apply_surrogate_keys, apply_surrogate_key_chunks
+)
 
 # Import domain generators
 from generators.crm_generator import generate_crm_data
@@ -51,6 +72,26 @@ from generators.finops_generator import generate_finops_data
 from generators.risk_compliance_generator import generate_risk_compliance_data
 from generators.rd_generator import generate_rd_data
 from generators.quality_security_generator import generate_quality_security_data
+from generators.cdc_generator import CDC_TABLES, current_state, generate_cdc_data
+
+# Domain generators in dependency order (later domains can read facts of earlier ones)
+DOMAIN_GENERATORS = {
+    'crm': generate_crm_data,
+    'sales': generate_sales_data,
+    'product': generate_product_data,
+    'marketing': generate_marketing_data,
+    'hr': generate_hr_data,
+    'supply_chain': generate_supply_chain_data,
+    'manufacturing': generate_manufacturing_data,
+    'finance': generate_finance_data,
+    'esg': generate_esg_data,
+    'call_center': generate_call_center_data,
+    'itops': generate_itops_data,
+    'finops': generate_finops_data,
+    'risk_compliance': generate_risk_compliance_data,
+    'rd': generate_rd_data,
+    'quality_security': generate_quality_security_data
+}
 
 
 # Configure logging with UTF-8 encoding
@@ -129,6 +170,14 @@ def create_output_directories(config: Dict[str, Any]) -> tuple:
     return structured_path, unstructured_path
 
 
+def _profile_settings(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Column profiler settings, or None when profiles are disabled."""
+    settings = dict(config.get('quality', {}).get('profiles', {}))
+    if not settings.pop('enabled', False):
+        return None
+    return settings
+
+
 def save_dataframe(df: pd.DataFrame, name: str, output_path: Path, config: Dict[str, Any], domain: str = 'dimensions') -> None:
     """Save DataFrame to CSV or Parquet based on configuration in Bronze layer structure."""
     format_type = config['output']['format']
@@ -138,6 +187,10 @@ def save_dataframe(df: pd.DataFrame, name: str, output_path: Path, config: Dict[
     domain_path = output_path / domain
     domain_path.mkdir(parents=True, exist_ok=True)
     
+    profile_settings = _profile_settings(config)
+    if profile_settings is not None:
+        write_profile(profile_chunk(df, profile_settings), domain_path / f"{name}.profile.json")
+    
     if format_type in ['csv', 'both']:
         if compression:
             csv_path = domain_path / f"{name}.csv.gz"
@@ -154,8 +207,113 @@ def save_dataframe(df: pd.DataFrame, name: str, output_path: Path, config: Dict[
         logger.info(f"  Saved {domain}/{name}.parquet ({len(df):,} rows)")
 
 
-def generate_conformed_dimensions(config: Dict[str, Any], output_path: Path) -> Dict[str, pd.DataFrame]:
-    """Generate all conformed dimensions."""
+def save_dataframe_chunks(chunks: Iterable[pd.DataFrame], name: str, output_path: Path, config: Dict[str, Any],
+                          domain: str = 'dimensions') -> int:
+    """
+    Stream DataFrame chunks to a single CSV and/or Parquet file without holding the table in memory.
+    
+    Chunks tagged with attrs['partition'] (an ordered {column: value} dict) are written as a
+    Hive-style partitioned table instead: <name>/<column>=<value>/.../part-00000.<ext>, with
+    the partition columns dropped from the files. Chunks of one partition must be contiguous;
+    only one partition file per format is open at a time.
+    
+    When profiles are enabled, each chunk is sketched as it passes and the merged profile
+    is written to <name>.profile.json, so the table is never re-read.
+    
+    Returns:
+        Number of rows written
+    """
+    format_type = config['output']['format']
+    compression = config['output'].get('compression', False)
+    
+    domain_path = output_path / domain
+    domain_path.mkdir(parents=True, exist_ok=True)
+    
+    csv_path = domain_path / (f"{name}.csv.gz" if compression else f"{name}.csv")
+    parquet_path = domain_path / f"{name}.parquet"
+    parquet_writer = None
+    parquet_schema = None
+    current_partition = None
+    partition_rows = 0
+    partitions_written = 0
+    total_rows = 0
+    profile_settings = _profile_settings(config)
+    profile = None
+    
+    try:
+        for chunk in chunks:
+            if profile_settings is not None:
+                profile = merge_profiles(profile, profile_chunk(chunk, profile_settings))
+            partition = chunk.attrs.get('partition')
+            if partition:
+                # Switch files when the partition changes
+                if partition != current_partition:
+                    if parquet_writer is not None:
+                        parquet_writer.close()
+                        parquet_writer = None
+                    current_partition = partition
+                    partition_path = domain_path / name / Path(*[f"{k}={v}" for k, v in partition.items()])
+                    partition_path.mkdir(parents=True, exist_ok=True)
+                    csv_path = partition_path / ("part-00000.csv.gz" if compression else "part-00000.csv")
+                    parquet_path = partition_path / "part-00000.parquet"
+                    partition_rows = 0
+                    partitions_written += 1
+                chunk = chunk.drop(columns=[k for k in partition if k in chunk.columns])
+            
+            if format_type in ['csv', 'both']:
+                # First chunk of a file truncates and writes the header, later chunks append
+                first = (partition_rows if partition else total_rows) == 0
+                chunk.to_csv(csv_path, index=False, mode='w' if first else 'a', header=first,
+                             compression='gzip' if compression else None)
+            
+            if format_type in ['parquet', 'both']:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                
+                if parquet_schema is None:
+                    parquet_schema = pa.Table.from_pandas(chunk, preserve_index=False).schema
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(parquet_path, parquet_schema, compression='snappy')
+                table = pa.Table.from_pandas(chunk, schema=parquet_schema, preserve_index=False)
+                parquet_writer.write_table(table)
+            
+            partition_rows += len(chunk)
+            total_rows += len(chunk)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    
+    if profile is not None:
+        write_profile(profile, domain_path / f"{name}.profile.json")
+    
+    if partitions_written:
+        logger.info(f"  Saved {domain}/{name}/ ({total_rows:,} rows, {partitions_written:,} partitions, streamed)")
+        return total_rows
+    if format_type in ['csv', 'both']:
+        logger.info(f"  Saved {domain}/{csv_path.name} ({total_rows:,} rows, streamed)")
+    if format_type in ['parquet', 'both']:
+        logger.info(f"  Saved {domain}/{name}.parquet ({total_rows:,} rows, streamed)")
+    return total_rows
+
+
+def _keyed_dimension(df: pd.DataFrame, name: str, dimensions: Dict[str, pd.DataFrame],
+                     key_maps: Optional[Dict[str, pd.DataFrame]]) -> pd.DataFrame:
+    """Dimension with its surrogate key and integer references to the dimensions before it (unchanged without key_maps)."""
+    if key_maps is None:
+        return df
+    if name in SURROGATE_DIMENSIONS:
+        df = assign_surrogate_keys(df, name, key_maps)
+    return apply_surrogate_keys(name, df, surrogate_key_indexes({**dimensions, name: df}))
+
+
+def generate_conformed_dimensions(config: Dict[str, Any], output_path: Path,
+                                  key_maps: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Generate all conformed dimensions.
+    
+    With key_maps (surrogate_keys.enabled), each keyed dimension gets its integer key, reusing
+    the keys of members already in the maps, and the extended maps are written to keymaps/.
+    """
     logger.info("=" * 80)
     logger.info("STEP 1: Generating Conformed Dimensions")
     logger.info("=" * 80)
@@ -176,78 +334,366 @@ def generate_conformed_dimensions(config: Dict[str, Any], output_path: Path) ->
     # DimCustomer
     logger.info("Generating DimCustomer...")
     dim_customer = generate_dim_customer(config['dim_customer'], seed)
+    dim_customer = _keyed_dimension(dim_customer, 'DimCustomer', dimensions, key_maps)
     save_dataframe(dim_customer, 'DimCustomer', output_path, config, domain='dimensions')
     dimensions['DimCustomer'] = dim_customer
     
     # DimProduct
     logger.info("Generating DimProduct...")
     dim_product = generate_dim_product(config['dim_product'], seed)
+    dim_product = _keyed_dimension(dim_product, 'DimProduct', dimensions, key_maps)
     save_dataframe(dim_product, 'DimProduct', output_path, config, domain='dimensions')
     dimensions['DimProduct'] = dim_product
     
     # DimEmployee
     logger.info("Generating DimEmployee...")
     dim_employee = generate_dim_employee(config['dim_employee'], seed, config['start_date'], config['end_date'])
+    dim_employee = _keyed_dimension(dim_employee, 'DimEmployee', dimensions, key_maps)
     save_dataframe(dim_employee, 'DimEmployee', output_path, config, domain='dimensions')
     dimensions['DimEmployee'] = dim_employee
     
     # DimGeography
     logger.info("Generating DimGeography...")
     dim_geography = generate_dim_geography(config['dim_geography'], dim_customer, seed)
+    dim_geography = _keyed_dimension(dim_geography, 'DimGeography', dimensions, key_maps)
     save_dataframe(dim_geography, 'DimGeography', output_path, config, domain='dimensions')
     dimensions['DimGeography'] = dim_geography
     
     # DimFacility
     logger.info("Generating DimFacility...")
     dim_facility = generate_dim_facility(config['dim_facility'], dim_geography, seed)
+    dim_facility = _keyed_dimension(dim_facility, 'DimFacility', dimensions, key_maps)
     save_dataframe(dim_facility, 'DimFacility', output_path, config, domain='dimensions')
     dimensions['DimFacility'] = dim_facility
     
     # DimProject
     logger.info("Generating DimProject...")
     dim_project = generate_dim_project(config['dim_project'], dim_employee, seed)
+    dim_project = _keyed_dimension(dim_project, 'DimProject', dimensions, key_maps)
     save_dataframe(dim_project, 'DimProject', output_path, config, domain='dimensions')
     dimensions['DimProject'] = dim_project
     
     # DimAccount
     logger.info("Generating DimAccount...")
     dim_account = generate_dim_account(config['dim_account'])
+    dim_account = _keyed_dimension(dim_account, 'DimAccount', dimensions, key_maps)
     save_dataframe(dim_account, 'DimAccount', output_path, config, domain='dimensions')
     dimensions['DimAccount'] = dim_account
     
+    # SCD Type 2 histories of the tracked dimensions (the tables above are their current versions)
+    scd2_config = config.get('scd2', {})
+    if scd2_config.get('enabled', False):
+        rates = scd2_config.get('changes_per_year', {})
+        for offset, dimension in enumerate(SCD2_DIMENSIONS, start=1):
+            name = history_table_name(dimension)
+            logger.info(f"Generating {name}...")
+            history = generate_scd2_history(dimensions[dimension], dimension, config['start_date'], config['end_date'],
+                                            rates.get(dimension, 0.0), scd2_config.get('max_versions', 6), seed + offset)
+            save_dataframe(history, name, output_path, config, domain='dimensions')
+            dimensions[name] = history
+    
+    # Key maps for later runs and --append-days (every natural key ever assigned an integer key)
+    if key_maps is not None:
+        for dimension, key_map in key_maps.items():
+            save_dataframe(key_map, dimension, output_path, config, domain=KEYMAPS_DIR)
+    
     logger.info(f"[OK] Conformed dimensions generated: {sum(len(df) for df in dimensions.values()):,} total rows")
     return dimensions
 
 
 def generate_domain_data(domain_name: str, generator_func, config: Dict[str, Any], 
-                        dimensions: Dict[str, pd.DataFrame], output_path: Path) -> Dict[str, pd.DataFrame]:
-    """Generate data for a specific domain and save in Bronze layer structure."""
+                        dimensions: Dict[str, pd.DataFrame], output_path: Path,
+                        row_counts: Optional[Dict[str, int]] = None,
+                        quality_state: Optional[Dict[str, Any]] = None,
+                        key_state: Optional[Dict[str, int]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Generate data for a specific domain and save in Bronze layer structure.
+    
+    Generators may return a table either as a DataFrame or as an iterator of DataFrame
+    chunks. Chunked tables are streamed to disk and are not kept in the returned dict;
+    when quality_state is given, their foreign keys, business rules and distributions are checked chunk
+    by chunk on the way to disk (in-memory tables are checked later in one pass). When key_state
+    is given, the largest sequential key numbers are recorded for later --append-days runs. When
+    SCD2 histories are among the dimensions, facts get the version keys valid on their dates.
+    When the dimensions carry surrogate keys, tables are written with integer FK columns; the
+    returned tables keep their natural keys for later domains and the final checks.
+    """
     # Create display name for logs (supply_chain → Supply Chain)
     display_name = domain_name.replace('_', ' ').title()
     logger.info(f"Generating {display_name} domain...")
     
     try:
         domain_data = generator_func(config, dimensions, config['seed'])
+        indexes = version_indexes(dimensions, domain_data)
+        key_indexes = surrogate_key_indexes(dimensions)
         
+        in_memory_data = {}
+        table_rows = {}
         for table_name, df in domain_data.items():
             # Use technical name (with underscores) for folder structure
-            save_dataframe(df, table_name, output_path, config, domain=domain_name)
+            if isinstance(df, pd.DataFrame):
+                add_version_keys(table_name, df, indexes)
+                save_dataframe(apply_surrogate_keys(table_name, df, key_indexes), table_name, output_path, config,
+                               domain=domain_name)
+                in_memory_data[table_name] = df
+                table_rows[table_name] = len(df)
+                if key_state is not None:
+                    track_keys(table_name, df, key_state)
+            else:
+                if indexes:
+                    df = add_version_key_chunks(df, table_name, indexes)
+                if quality_state:
+                    parents = {**dimensions, **{k: v for k, v in domain_data.items() if isinstance(v, pd.DataFrame)}}
+                    df = _check_chunks(df, table_name, parents, quality_state)
+                if key_state is not None:
+                    df = track_key_chunks(df, table_name, key_state)
+                if key_indexes:
+                    df = apply_surrogate_key_chunks(df, table_name, key_indexes)
+                table_rows[table_name] = save_dataframe_chunks(df, table_name, output_path, config, domain=domain_name)
         
-        total_rows = sum(len(df) for df in domain_data.values())
+        if row_counts is not None:
+            row_counts.update(table_rows)
+        
+        total_rows = sum(table_rows.values())
         logger.info(f"  [OK] {display_name}: {len(domain_data)} tables, {total_rows:,} total rows")
-        return domain_data
+        return in_memory_data
     
     except Exception as e:
         logger.error(f"  [ERROR] Error generating {display_name}: {e}", exc_info=True)
         return {}
 
 
+def _check_chunks(chunks: Iterable[pd.DataFrame], table_name: str, tables: Dict[str, pd.DataFrame],
+                  quality_state: Dict[str, Any]) -> Iterable[pd.DataFrame]:
+    """Pass chunks through unchanged, checking each one's foreign keys, business rules and distributions on the way."""
+    for chunk in chunks:
+        if 'integrity' in quality_state:
+            check_referential_integrity(table_name, chunk, tables, quality_state['integrity'])
+        if 'rules' in quality_state:
+            check_business_rules(table_name, chunk, quality_state['business_rules'], quality_state['rules'])
+        if 'distributions' in quality_state:
+            check_distributions(table_name, chunk, quality_state['distribution_specs'], quality_state['distributions'])
+        yield chunk
+
+
+def append_days(config: Dict[str, Any], days: int, structured_path: Path, domains: Iterable[str]) -> None:
+    """
+    Extend an existing dataset by `days` days after its last end_date without touching its history.
+    
+    Reads the manifest of the previous run, resumes its RNG stream for this batch's seed and
+    writes only the new rows to increments/<first date_id>-<last date_id>/<domain>/: DimDate
+    for the new days, new DimCustomer/DimProduct members (joining on its first day, with their
+    first SCD2 versions) and the event facts in APPEND_TABLES, generated with volumes scaled to
+    the window; the new members draw append.new_member_share of the customer and product
+    samples. Sequential keys continue after the largest ones already generated, and so do
+    surrogate keys when the dataset has them (new members' pairs go to the batch's keymaps/).
+    Dimensions are read back from disk, so the cost follows the window, not the history.
+    """
+    manifest = read_manifest(structured_path)
+    if manifest is None:
+        logger.error(f"No manifest in {structured_path}; run a full generation before --append-days")
+        sys.exit(1)
+    
+    rng = restore_rng(manifest)
+    batch_seed = int(rng.integers(0, 2**31 - 1))
+    start = pd.Timestamp(manifest['end_date']) + timedelta(days=1)
+    end = start + timedelta(days=days - 1)
+    batch_name = f"{start:%Y%m%d}-{end:%Y%m%d}"
+    # Files are written to a partial folder that is renamed once the batch is complete, so a
+    # failed append leaves no batch the manifest does not record
+    final_path = structured_path / INCREMENTS_DIR / batch_name
+    batch_path = structured_path / INCREMENTS_DIR / f".{batch_name}.partial"
+    for leftover in (batch_path, final_path):
+        if leftover.exists():
+            shutil.rmtree(leftover)
+    batch_config = window_config(config, start, end, manifest['history_days'], rng)
+    
+    logger.info("=" * 80)
+    logger.info(f"APPEND: {start:%Y-%m-%d} to {end:%Y-%m-%d} ({days} days) -> {INCREMENTS_DIR}/{batch_name}")
+    logger.info(f"Previous end date: {manifest['end_date']}, batch seed: {batch_seed}")
+    logger.info("=" * 80)
+    
+    # Existing members: the full run's dimensions plus members added by earlier batches
+    dimensions = {}
+    for name in ['DimCustomer', 'DimProduct', 'DimEmployee', 'DimGeography', 'DimFacility', 'DimProject', 'DimAccount']:
+        parts = [read_table(structured_path / 'dimensions', name)]
+        parts += [read_table(structured_path / batch['path'] / 'dimensions', name) for batch in manifest['batches']]
+        dimensions[name] = pd.concat([p for p in parts if p is not None], ignore_index=True)
+    # SCD2 histories, if the full run wrote them
+    for dimension in SCD2_DIMENSIONS:
+        name = history_table_name(dimension)
+        parts = [read_table(structured_path / 'dimensions', name)]
+        parts += [read_table(structured_path / batch['path'] / 'dimensions', name) for batch in manifest['batches']]
+        parts = [p for p in parts if p is not None]
+        if parts:
+            dimensions[name] = pd.concat(parts, ignore_index=True)
+    
+    key_maps = read_key_maps(structured_path, [batch['path'] for batch in manifest['batches']]) \
+        if manifest.get('surrogate_keys') else None
+    
+    row_counts = {}
+    key_state = dict(manifest['key_spaces'])
+    offsets = key_offsets(key_state)
+    
+    dim_date = generate_dim_date(
+        start_date=batch_config['start_date'],
+        end_date=batch_config['end_date'],
+        fiscal_year_start_month=config['finance']['budget'].get('fiscal_year_start_month', 7)
+    )
+    save_dataframe(dim_date, 'DimDate', batch_path, config, domain='dimensions')
+    dimensions['DimDate'] = dim_date
+    row_counts['DimDate'] = len(dim_date)
+    
+    # New dimension members at the full run's rate per day, joining on the window's first day
+    growing = {'DimCustomer': generate_dim_customer, 'DimProduct': generate_dim_product}
+    new_members = {}
+    for name, section in GROWING_DIMENSIONS.items():
+        count = int(rng.poisson(config[section]['count'] * days / manifest['history_days']))
+        if count == 0:
+            continue
+        members = shift_keys(name, growing[name]({**config[section], 'count': count}, batch_seed), offsets)
+        members = join_window(members, name, start)
+        new_members[name] = count
+        track_keys(name, members, key_state)
+        if key_maps is not None:
+            members = assign_surrogate_keys(members, name, key_maps)
+            natural = SURROGATE_DIMENSIONS[name]
+            save_dataframe(members[[natural, key_column(natural)]], name, batch_path, config, domain=KEYMAPS_DIR)
+        save_dataframe(members, name, batch_path, config, domain='dimensions')
+        dimensions[name] = pd.concat([dimensions[name], members], ignore_index=True)
+        row_counts[name] = count
+        # New members enter the history with a single current version
+        history_name = history_table_name(name)
+        if history_name in dimensions:
+            versions = extend_history(dimensions[history_name], members, name, batch_config['start_date'])
+            save_dataframe(versions, history_name, batch_path, config, domain='dimensions')
+            dimensions[history_name] = pd.concat([dimensions[history_name], versions], ignore_index=True)
+            row_counts[history_name] = len(versions)
+    
+    available_tables = dict(dimensions)
+    key_indexes = surrogate_key_indexes(dimensions)
+    # Generators sample members by weight; the new ones get a share of the draws
+    new_member_share = config.get('append', {}).get('new_member_share', 0.05)
+    sampled_dimensions = {name: favor_new_members(dimensions[name], count, new_member_share)
+                          for name, count in new_members.items()}
+    for domain in domains:
+        if domain not in APPEND_TABLES:
+            logger.info(f"Skipping {domain} (no event facts to append; snapshot tables change with a full run)")
+            continue
+        logger.info(f"Appending {domain.replace('_', ' ').title()} domain...")
+        domain_data = DOMAIN_GENERATORS[domain](batch_config, {**available_tables, **sampled_dimensions}, batch_seed)
+        indexes = version_indexes(available_tables, APPEND_TABLES[domain])
+        for table_name, df in domain_data.items():
+            if table_name not in APPEND_TABLES[domain]:
+                continue
+            if isinstance(df, pd.DataFrame):
+                df = add_version_keys(table_name, shift_keys(table_name, df, offsets), indexes)
+                track_keys(table_name, df, key_state)
+                save_dataframe(apply_surrogate_keys(table_name, df, key_indexes), table_name, batch_path, config,
+                               domain=domain)
+                available_tables[table_name] = df
+                row_counts[table_name] = len(df)
+            else:
+                df = shift_key_chunks(df, table_name, offsets, key_state)
+                if indexes:
+                    df = add_version_key_chunks(df, table_name, indexes)
+                if key_indexes:
+                    df = apply_surrogate_key_chunks(df, table_name, key_indexes)
+                row_counts[table_name] = save_dataframe_chunks(df, table_name, batch_path, config, domain=domain)
+    
+    batch_path.rename(final_path)
+    manifest['end_date'] = batch_config['end_date']
+    manifest['key_spaces'] = key_state
+    manifest['rng_state'] = rng.bit_generator.state
+    manifest['batches'].append({
+        'path': f"{INCREMENTS_DIR}/{batch_name}",
+        'start_date': batch_config['start_date'],
+        'end_date': batch_config['end_date'],
+        'seed': batch_seed,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'row_counts': row_counts
+    })
+    write_manifest(structured_path, manifest)
+    logger.info(f"[OK] Appended {sum(row_counts.values()):,} rows in {len(row_counts)} tables; "
+                f"dataset now ends {manifest['end_date']}")
+
+
+def cdc_batches(config: Dict[str, Any], count: int, structured_path: Path) -> None:
+    """
+    Write `count` change-data-capture batches against the existing dataset, each to its own
+    append-only cdc/batch-<n>/<domain>/ folder.
+    
+    The current rows of the CDC tables (full run, appended increments and earlier CDC batches
+    applied in sequence order) are loaded once; every batch is then generated from, and applied
+    to, that state in memory so later batches continue earlier ones (a shipped order is
+    delivered next, never shipped again). Sequence numbers, late-arrival order keys and the
+    RNG stream continue from the manifest.
+    """
+    manifest = read_manifest(structured_path)
+    if manifest is None:
+        logger.error(f"No manifest in {structured_path}; run a full generation before --cdc-batches")
+        sys.exit(1)
+    
+    rng = restore_rng(manifest)
+    cdc_state = manifest.setdefault('cdc', {'sequence': 0, 'batches': []})
+    key_state = manifest['key_spaces']
+    as_of = pd.Timestamp(manifest['end_date'])
+    
+    logger.info("=" * 80)
+    logger.info(f"CDC: {count} batches as of {as_of:%Y-%m-%d} (after {len(cdc_state['batches'])} earlier batches)")
+    logger.info("=" * 80)
+    
+    tables = {}
+    for table_name, (domain, keys) in CDC_TABLES.items():
+        parts = [read_table(structured_path / domain, table_name)]
+        parts += [read_table(structured_path / batch['path'] / domain, table_name) for batch in manifest['batches']]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            logger.info(f"Skipping {table_name} (not generated)")
+            continue
+        changes = [read_table(structured_path / batch['path'] / domain, table_name) for batch in cdc_state['batches']]
+        tables[table_name] = current_state(pd.concat(parts, ignore_index=True),
+                                           [c for c in changes if c is not None], keys)
+    
+    for _ in range(count):
+        batch_seed = int(rng.integers(0, 2**31 - 1))
+        batch_name = f"batch-{len(cdc_state['batches']) + 1:06d}"
+        logger.info(f"Generating {CDC_DIR}/{batch_name}...")
+        batch = generate_cdc_data(config, tables, batch_seed, cdc_state['sequence'] + 1, as_of,
+                                  key_state.get('ORD_', -1) + 1)
+        
+        row_counts = {}
+        for table_name, df in batch.items():
+            domain, keys = CDC_TABLES[table_name]
+            track_keys(table_name, df, key_state)
+            save_dataframe(df, table_name, structured_path / CDC_DIR / batch_name, config, domain=domain)
+            tables[table_name] = current_state(tables[table_name], [df], keys)
+            row_counts[table_name] = {op: int(n) for op, n in df['_op'].value_counts().items()}
+        
+        cdc_state['sequence'] += sum(len(df) for df in batch.values())
+        cdc_state['batches'].append({
+            'path': f"{CDC_DIR}/{batch_name}",
+            'as_of': manifest['end_date'],
+            'seed': batch_seed,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'row_counts': row_counts
+        })
+        manifest['rng_state'] = rng.bit_generator.state
+        write_manifest(structured_path, manifest)
+        logger.info(f"  [OK] {batch_name}: " + ", ".join(
+            f"{t} {'/'.join(f'{op}={n:,}' for op, n in sorted(ops.items()))}" for t, ops in row_counts.items()))
+
+
 def main():
     """Main execution function."""
     parser = argparse.ArgumentParser(description='Generate enterprise data platform synthetic data')
     parser.add_argument('--config', default='config.yml', help='Path to configuration file')
     parser.add_argument('--domains', default='all', help='Comma-separated list of domains to generate (or "all")')
     parser.add_argument('--output', help='Override output path')
+    parser.add_argument('--append-days', type=int, default=0,
+                        help='Extend the existing dataset by N days after its last end_date (new files under increments/)')
+    parser.add_argument('--cdc-batches', type=int, default=0,
+                        help='Write N change-data-capture batches against the existing dataset (files under cdc/)')
     args = parser.parse_args()
     
     # Load configuration
@@ -260,6 +706,24 @@ def main():
     # Create output directories
     structured_path, unstructured_path = create_output_directories(config)
     
+    # Determine which domains to generate
+    if args.domains == 'all':
+        domains_to_generate = DOMAIN_GENERATORS.keys()
+    else:
+        domains_to_generate = [d.strip() for d in args.domains.split(',')]
+    
+    if args.append_days > 0:
+        start_time = datetime.now()
+        append_days(config, args.append_days, structured_path, domains_to_generate)
+        logger.info(f"Duration: {datetime.now() - start_time}")
+        return
+    
+    if args.cdc_batches > 0:
+        start_time = datetime.now()
+        cdc_batches(config, args.cdc_batches, structured_path)
+        logger.info(f"Duration: {datetime.now() - start_time}")
+        return
+    
     # Start timer
     start_time = datetime.now()
     logger.info("=" * 80)
@@ -270,55 +734,58 @@ def main():
     logger.info(f"Date Range: {config['start_date']} to {config['end_date']}")
     logger.info("=" * 80)
     
-    # Generate conformed dimensions
-    dimensions = generate_conformed_dimensions(config, structured_path)
-    
-    # Define domain generators
-    domain_generators = {
-        'crm': generate_crm_data,
-        'sales': generate_sales_data,
-        'product': generate_product_data,
-        'marketing': generate_marketing_data,
-        'hr': generate_hr_data,
-        'supply_chain': generate_supply_chain_data,
-        'manufacturing': generate_manufacturing_data,
-        'finance': generate_finance_data,
-        'esg': generate_esg_data,
-        'call_center': generate_call_center_data,
-        'itops': generate_itops_data,
-        'finops': generate_finops_data,
-        'risk_compliance': generate_risk_compliance_data,
-        'rd': generate_rd_data,
-        'quality_security': generate_quality_security_data
-    }
+    # Surrogate keys continue the key maps of the previous run at this path, if it had them
+    key_maps = None
+    if config.get('surrogate_keys', {}).get('enabled', False):
+        previous = read_manifest(structured_path)
+        key_maps = read_key_maps(structured_path, [batch['path'] for batch in previous['batches']]) \
+            if previous and previous.get('surrogate_keys') else {}
     
-    # Determine which domains to generate
-    if args.domains == 'all':
-        domains_to_generate = domain_generators.keys()
-    else:
-        domains_to_generate = [d.strip() for d in args.domains.split(',')]
+    # Generate conformed dimensions
+    dimensions = generate_conformed_dimensions(config, structured_path, key_maps)
     
     logger.info("")
     logger.info("=" * 80)
     logger.info("STEP 2: Generating Domain-Specific Data")
     logger.info("=" * 80)
     
-    # Generate domain data
+    # Generate domain data; later domains can read facts produced by earlier ones
     all_data = {}
+    row_counts = {}
+    available_tables = dict(dimensions)
+    # Largest sequential key numbers, recorded in the manifest for --append-days
+    key_state = {}
+    for name, df in dimensions.items():
+        track_keys(name, df, key_state)
+    # Accumulators for checks that run on streamed chunks as they are written
+    quality_state = {}
+    if config['quality']['referential_integrity']:
+        quality_state['integrity'] = {}
+    if config['quality']['check_business_rules']:
+        quality_state['business_rules'] = compile_business_rules(config['quality'].get('business_rules', []))
+        quality_state['rules'] = {}
+    distribution_config = config['quality'].get('distributions', {})
+    if distribution_config.get('enabled', False):
+        quality_state['distribution_specs'] = resolve_distributions(config)
+        quality_state['distributions'] = {}
     for domain in domains_to_generate:
-        if domain not in domain_generators:
+        if domain not in DOMAIN_GENERATORS:
             logger.warning(f"Unknown domain: {domain}")
             continue
         
         # Pass technical name with underscores (e.g., supply_chain)
         domain_data = generate_domain_data(
             domain,
-            domain_generators[domain],
+            DOMAIN_GENERATORS[domain],
             config,
-            dimensions,
-            structured_path
+            available_tables,
+            structured_path,
+            row_counts,
+            quality_state,
+            key_state
         )
         all_data[domain] = domain_data
+        available_tables.update(domain_data)
     
     # Data quality validation
     logger.info("")
@@ -326,14 +793,17 @@ def main():
     logger.info("STEP 3: Data Quality Validation")
     logger.info("=" * 80)
     
+    # Combine all data for validation
+    all_tables = {**dimensions}
+    for domain_data in all_data.values():
+        all_tables.update(domain_data)
+    
     if config['quality']['referential_integrity']:
         logger.info("Validating referential integrity...")
-        # Combine all data for validation
-        all_tables = {**dimensions}
-        for domain_data in all_data.values():
-            all_tables.update(domain_data)
-        
-        integrity_results = validate_referential_integrity(all_tables)
+        # Streamed tables were checked chunk by chunk; this adds the in-memory ones
+        integrity_results = validate_referential_integrity(all_tables, quality_state['integrity'])
+        logger.info(f"  Checked {integrity_results['checked']} relationships in {integrity_results['seconds']:.1f}s "
+                    f"({len(integrity_results['skipped'])} skipped, parent table not generated)")
         if integrity_results['passed']:
             logger.info("  [OK] All referential integrity checks passed")
         else:
@@ -343,11 +813,34 @@ def main():
     
     if config['quality']['check_business_rules']:
         logger.info("Validating business rules...")
-        rules_results = validate_business_rules(all_tables)
+        rules = quality_state['business_rules']
+        export_business_rules(rules, structured_path / 'business_rules.json')
+        rules_results = validate_business_rules(all_tables, rules, quality_state['rules'],
+                                                config['quality'].get('rule_workers', 0))
+        logger.info(f"  Checked {rules_results['checked']} of {len(rules)} rules in {rules_results['seconds']:.1f}s "
+                    f"(exported to business_rules.json)")
         if rules_results['passed']:
             logger.info("  [OK] All business rule checks passed")
         else:
             logger.warning(f"  [WARNING] {len(rules_results['failures'])} rule violations found")
+            for issue in rules_results['failures'][:5]:  # Show first 5
+                logger.warning(f"    - {issue}")
+    
+    if 'distributions' in quality_state:
+        logger.info("Validating distribution conformance...")
+        distribution_results = validate_distributions(all_tables, quality_state['distribution_specs'],
+                                                      quality_state['distributions'],
+                                                      distribution_config.get('tolerance', 0.02),
+                                                      distribution_config.get('alpha', 0.001))
+        slowest = max(distribution_results['tables'].values(), default=0.0)
+        logger.info(f"  Checked {distribution_results['checked']} distributions in {distribution_results['seconds']:.1f}s "
+                    f"(slowest table {slowest:.2f}s)")
+        if distribution_results['passed']:
+            logger.info("  [OK] All distributions conform to config")
+        else:
+            logger.warning(f"  [WARNING] {len(distribution_results['failures'])} distributions deviate from config")
+            for issue in distribution_results['failures']:  # One line per configured distribution at most
+                logger.warning(f"    - {issue}")
     
     # Generate unstructured data
     logger.info("")
@@ -357,7 +850,7 @@ def main():
     
     unstructured_config = config.get('unstructured', {})
     if unstructured_config:
-        generate_unstructured_files(unstructured_config, unstructured_path, config['seed'], dimensions)
+        generate_unstructured_files(unstructured_config, unstructured_path, config['seed'], available_tables)
         logger.info("  [OK] Unstructured data files generated")
     else:
         logger.info("  [SKIP] Skipped (no unstructured data configured)")
@@ -366,9 +859,11 @@ def main():
     end_time = datetime.now()
     duration = end_time - start_time
     
-    total_rows = sum(len(df) for df in dimensions.values())
-    for domain_data in all_data.values():
-        total_rows += sum(len(df) for df in domain_data.values())
+    total_rows = sum(len(df) for df in dimensions.values()) + sum(row_counts.values())
+    
+    # Manifest for later --append-days runs
+    write_manifest(structured_path, new_manifest(config, key_state,
+                                                 {**{name: len(df) for name, df in dimensions.items()}, **row_counts}))
     
     logger.info("")
     logger.info("=" * 80)
@@ -2,14 +2,52 @@
 import pandas as pd
 import numpy as np
 from typing import Dict
-from datetime import timedelta
+
+from utils.append import sample_weights
+from utils.identifiers import format_ids
+from utils.queue_simulation import busy_seconds_per_interval, erlang_c_staffing, simulate_agent_queue
+from utils.temporal import build_day_weights, sample_date_positions
+
+# Live contacts wait in line for an agent and may hang up; digital contacts wait for a first response
+DEFAULT_QUEUES = {
+    'live': {
+        'channels': ['phone', 'chat'],
+        'average_handle_seconds': 480,
+        'target_answer_seconds': 20,
+        'service_level_target': 0.80,
+        'average_patience_seconds': 180
+    },
+    'digital': {
+        'channels': ['email', 'portal'],
+        'average_handle_seconds': 360,
+        'target_answer_seconds': 4 * 3600,
+        'service_level_target': 0.90
+    }
+}
+
+# Share of a day's contacts arriving in each hour (00-23)
+INTRADAY_PROFILE = {
+    'live': [0.2, 0.1, 0.1, 0.1, 0.2, 0.5, 1.5, 3.5, 7.0, 9.0, 9.5, 9.0,
+             8.0, 8.5, 9.0, 8.5, 7.0, 4.5, 2.5, 1.8, 1.5, 1.2, 0.8, 0.4],
+    'digital': [1.5, 1.0, 0.8, 0.8, 1.0, 1.5, 2.5, 4.0, 6.0, 7.0, 7.0, 6.5,
+                6.0, 6.5, 6.5, 6.0, 5.5, 5.0, 4.5, 4.0, 3.5, 3.0, 2.5, 2.0]
+}
+
+SECONDS_PER_DAY = 24 * 3600
 
 def generate_call_center_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Call Center domain: FactSupport"""
+    """Generate Call Center domain: FactSupport, FactAgentIntervals"""
     np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     cc_config = config.get('call_center', {})
-    num_tickets = cc_config.get('support_tickets', {}).get('count', 25000)
+    ticket_config = cc_config.get('support_tickets', {})
+    num_tickets = ticket_config.get('count', 25000)
+    interval_minutes = cc_config.get('interval_minutes', 30)
+    if interval_minutes <= 0 or 60 % interval_minutes:
+        raise ValueError(f"call_center.interval_minutes must divide 60 (got {interval_minutes})")
+    interval_seconds = interval_minutes * 60
+    queues = {name: {**DEFAULT_QUEUES[name], **cc_config.get('queues', {}).get(name, {})} for name in DEFAULT_QUEUES}
     
     dim_customer = dimensions['DimCustomer']
     dim_employee = dimensions['DimEmployee']
@@ -19,50 +57,193 @@ def generate_call_center_data(config: dict, dimensions: Dict[str, pd.DataFrame],
     agents = dim_employee[dim_employee['department'] == 'Customer Support'].copy()
     if len(agents) == 0:
         agents = dim_employee.sample(n=min(50, len(dim_employee)), random_state=seed)
+    # Roster slot k is staffed by the same employee throughout
+    roster = agents['employee_id'].values[rng.permutation(len(agents))]
     
     print(f"  Generating {num_tickets:,} support tickets...")
     
-    # Vectorized ticket generation
-    customer_samples = dim_customer.sample(n=num_tickets, replace=True, random_state=seed)
-    agent_samples = agents.sample(n=num_tickets, replace=True, random_state=seed + 1)
-    date_samples = dim_date.sample(n=num_tickets, replace=True, random_state=seed + 2)
+    # Ticket attributes
+    channel_dist = ticket_config.get('channel_distribution', {'phone': 0.40, 'email': 0.35, 'chat': 0.20, 'portal': 0.05})
+    category_dist = ticket_config.get('category_distribution', {'technical': 0.50, 'billing': 0.25, 'general_inquiry': 0.25})
+    priority_dist = ticket_config.get('priority_distribution', {'critical': 0.05, 'high': 0.15, 'medium': 0.50, 'low': 0.30})
+    channel_keys = list(channel_dist)
+    channel_codes = rng.choice(len(channel_keys), num_tickets, p=np.array(list(channel_dist.values())) / sum(channel_dist.values()))
+    channels = np.array([k.title() for k in channel_keys])[channel_codes]
+    categories = np.array([k.replace('_', ' ').title() for k in category_dist])[
+        rng.choice(len(category_dist), num_tickets, p=np.array(list(category_dist.values())) / sum(category_dist.values()))
+    ]
+    priorities = np.array([k.title() for k in priority_dist])[
+        rng.choice(len(priority_dist), num_tickets, p=np.array(list(priority_dist.values())) / sum(priority_dist.values()))
+    ]
+    weights = sample_weights(dim_customer)
+    customer_idx = rng.integers(0, len(dim_customer), num_tickets) if weights is None else \
+        rng.choice(len(dim_customer), num_tickets, p=weights.to_numpy() / weights.sum())
+    
+    # Arrival times: day from the temporal profile, hour from the queue's intraday profile
+    day_weights = build_day_weights(dim_date, ticket_config.get('growth_rate', 0.0),
+                                    ticket_config.get('seasonality', False), config.get('temporal_profile'))
     
-    # Generate ticket attributes
-    channels = np.random.choice(['Phone', 'Email', 'Chat', 'Portal'], size=num_tickets, p=[0.40, 0.35, 0.20, 0.05])
-    categories = np.random.choice(['Technical', 'Billing', 'General Inquiry'], size=num_tickets, p=[0.50, 0.25, 0.25])
-    priorities = np.random.choice(['Critical', 'High', 'Medium', 'Low'], size=num_tickets, p=[0.05, 0.15, 0.50, 0.30])
+    queue_of_ticket = np.empty(num_tickets, dtype=object)
+    arrival = np.empty(num_tickets)
+    wait = np.empty(num_tickets)
+    handle = np.empty(num_tickets)
+    answered = np.zeros(num_tickets, dtype=bool)
+    sla_met = np.zeros(num_tickets, dtype=bool)
+    agent_ids = np.full(num_tickets, None, dtype=object)
+    interval_frames = []
     
-    # Resolution times based on priority (hours)
-    resolution_times = np.where(priorities == 'Critical', np.random.uniform(0.5, 4, num_tickets),
-                       np.where(priorities == 'High', np.random.uniform(2, 24, num_tickets),
-                       np.where(priorities == 'Medium', np.random.uniform(8, 72, num_tickets),
-                                np.random.uniform(24, 168, num_tickets))))
+    contacts = {}
+    for name, queue in queues.items():
+        members = np.flatnonzero(np.isin(np.array(channel_keys)[channel_codes], queue['channels']))
+        num_contacts = len(members)
+        profile = np.asarray(INTRADAY_PROFILE[name], dtype=float)
+        profile = profile / profile.sum()
+        
+        day_pos = sample_date_positions(day_weights, num_contacts, rng)
+        hour = rng.choice(24, num_contacts, p=profile)
+        contact_arrival = day_pos * SECONDS_PER_DAY + (hour + rng.random(num_contacts)) * 3600
+        order = np.argsort(contact_arrival, kind='stable')
+        members, contact_arrival = members[order], contact_arrival[order]
+        
+        # Mean-preserving lognormal handle times and exponential patience
+        aht = queue['average_handle_seconds']
+        contact_handle = rng.lognormal(np.log(aht) - 0.18, 0.6, num_contacts)
+        patience = queue.get('average_patience_seconds')
+        contact_patience = rng.exponential(patience, num_contacts) if patience else np.full(num_contacts, np.inf)
+        
+        # Erlang-C staffing from the forecast load of every interval
+        intervals_per_hour = 3600 // interval_seconds
+        interval_share = np.repeat(profile, intervals_per_hour) / intervals_per_hour
+        forecast = (num_contacts * day_weights)[:, np.newaxis] * interval_share[np.newaxis, :]
+        staffing = erlang_c_staffing(forecast.ravel() / interval_seconds, aht, queue['target_answer_seconds'],
+                                     queue['service_level_target'])
+        contacts[name] = (members, contact_arrival, contact_handle, contact_patience, staffing)
     
-    # CSAT scores (only 40% respond)
+    # Each queue works its own block of roster slots, so no employee takes overlapping contacts
+    slots = _split_roster(len(roster), {name: staffing.max() for name, (*_, staffing) in contacts.items()})
+    roster_start = 0
+    for name, queue in queues.items():
+        members, contact_arrival, contact_handle, contact_patience, required = contacts[name]
+        staffing = np.minimum(required, slots[name])
+        short = staffing < required
+        
+        print(f"  Simulating {name} queue: {len(members):,} contacts, up to {staffing.max()} agents per interval...")
+        if short.any():
+            print(f"  [WARNING] {name} queue needs up to {required.max()} agents but gets {slots[name]} of the "
+                  f"{len(roster)} support agents; {short.mean():.1%} of intervals run short of the service level")
+        
+        result = simulate_agent_queue(contact_arrival, contact_handle, contact_patience, staffing, interval_seconds)
+        is_answered = result['agent'] >= 0
+        
+        queue_of_ticket[members] = name.title()
+        arrival[members] = contact_arrival
+        wait[members] = result['wait_seconds']
+        handle[members] = np.where(is_answered, contact_handle, 0.0)
+        answered[members] = is_answered
+        sla_met[members] = is_answered & (result['wait_seconds'] <= queue['target_answer_seconds'])
+        agent_ids[members[is_answered]] = roster[roster_start + result['agent'][is_answered]]
+        roster_start += slots[name]
+        
+        interval_frames.append(_summarize_intervals(name, contact_arrival, result, contact_handle, staffing,
+                                                    queue['target_answer_seconds'], interval_seconds, dim_date))
+    
+    # Follow-up work after the contact for tickets not resolved on first contact (hours)
+    fcr = answered & (rng.random(num_tickets) < ticket_config.get('fcr_rate', 0.70))
+    follow_up = np.where(priorities == 'Critical', rng.uniform(0.5, 4, num_tickets),
+                np.where(priorities == 'High', rng.uniform(2, 24, num_tickets),
+                np.where(priorities == 'Medium', rng.uniform(8, 72, num_tickets),
+                         rng.uniform(24, 168, num_tickets))))
+    resolution_hours = (wait + handle) / 3600 + np.where(fcr, 0.0, follow_up)
+    
+    resolved = answered & (rng.random(num_tickets) < ticket_config.get('resolution_rate', 0.90))
+    statuses = np.where(~answered, 'Abandoned', np.where(resolved, 'Resolved',
+                        rng.choice(['Open', 'Pending'], num_tickets, p=[0.65, 0.35])))
+    
+    # CSAT scores (only responders); long waits pull scores down
     csat_scores = np.full(num_tickets, np.nan)
-    csat_mask = np.random.random(num_tickets) < 0.40
-    csat_scores[csat_mask] = np.random.choice([1, 2, 3, 4, 5], size=csat_mask.sum(), p=[0.05, 0.10, 0.15, 0.40, 0.30])
+    csat_mask = answered & (rng.random(num_tickets) < ticket_config.get('csat_response_rate', 0.40))
+    csat = rng.choice([1, 2, 3, 4, 5], size=num_tickets, p=[0.05, 0.10, 0.15, 0.40, 0.30])
+    csat = np.clip(csat - (~sla_met & (rng.random(num_tickets) < 0.5)), 1, 5)
+    csat_scores[csat_mask] = csat[csat_mask]
+    
+    calendar_start = dim_date['date'].values[0].astype('datetime64[ns]')
+    create_ts = calendar_start + (arrival * 1e9).astype('timedelta64[ns]')
+    resolved_ts = calendar_start + ((arrival + resolution_hours * 3600) * 1e9).astype('timedelta64[ns]')
     
-    # Status
-    statuses = np.random.choice(['Resolved', 'Open', 'Pending'], size=num_tickets, p=[0.85, 0.10, 0.05])
+    # Chronological ticket ids
+    chronological = np.argsort(arrival, kind='stable')
     
     df_tickets = pd.DataFrame({
-        'ticket_id': [f'TKT-{i+1:08d}' for i in range(num_tickets)],
-        'customer_id': customer_samples['customer_id'].values,
-        'agent_id': agent_samples['employee_id'].values,
-        'channel': channels,
-        'category': categories,
-        'priority': priorities,
-        'create_date': date_samples['date'].values,
-        'resolved_date': [date_samples.iloc[i]['date'] + timedelta(hours=resolution_times[i]) 
-                         if statuses[i] == 'Resolved' else None 
-                         for i in range(num_tickets)],
-        'resolution_time_hours': [resolution_times[i] if statuses[i] == 'Resolved' else None for i in range(num_tickets)],
-        'status': statuses,
-        'first_contact_resolution': np.random.random(num_tickets) < 0.70,
-        'csat_score': csat_scores,
-        'subject': [f"{categories[i]} issue - {customer_samples.iloc[i]['customer_name']}" for i in range(num_tickets)]
+        'ticket_id': format_ids('TKT-', np.arange(1, num_tickets + 1), 8),
+        'customer_id': dim_customer['customer_id'].values[customer_idx][chronological],
+        'agent_id': agent_ids[chronological],
+        'channel': channels[chronological],
+        'queue': queue_of_ticket[chronological],
+        'category': categories[chronological],
+        'priority': priorities[chronological],
+        'create_date': create_ts[chronological],
+        'resolved_date': np.where(statuses == 'Resolved', resolved_ts, np.datetime64('NaT'))[chronological],
+        'resolution_time_hours': np.where(statuses == 'Resolved', np.round(resolution_hours, 2), np.nan)[chronological],
+        'status': statuses[chronological],
+        'wait_seconds': np.round(wait, 1)[chronological],
+        'handle_seconds': np.round(handle, 1)[chronological],
+        'is_abandoned': ~answered[chronological],
+        'sla_met': sla_met[chronological],
+        'first_contact_resolution': fcr[chronological],
+        'csat_score': csat_scores[chronological]
     })
+    df_tickets['subject'] = df_tickets['category'] + ' issue - ' + dim_customer['customer_name'].values[customer_idx][chronological]
     
-    return {'FactSupport': df_tickets}
+    df_intervals = pd.concat(interval_frames, ignore_index=True)
+    
+    return {'FactSupport': df_tickets, 'FactAgentIntervals': df_intervals}
+
+
+def _split_roster(roster_size: int, peaks: Dict[str, int]) -> Dict[str, int]:
+    """
+    Roster slots per queue: each queue's peak staffing when the roster covers all peaks,
+    otherwise shares proportional to the peaks (at least one slot per queue).
+    """
+    if sum(peaks.values()) <= roster_size:
+        return {name: int(peak) for name, peak in peaks.items()}
+    names = list(peaks)
+    shares = np.array([peaks[name] for name in names], dtype=float)
+    slots = np.maximum(np.floor(roster_size * shares / shares.sum()).astype(np.int64), 1)
+    slots[int(np.argmax(shares))] += roster_size - slots.sum()
+    return dict(zip(names, slots.tolist()))
 
+
+def _summarize_intervals(queue_name: str, arrival: np.ndarray, result: Dict[str, np.ndarray], handle: np.ndarray,
+                         staffing: np.ndarray, target_seconds: float, interval_seconds: int,
+                         dim_date: pd.DataFrame) -> pd.DataFrame:
+    """Per-interval staffing, volume, service level and agent occupancy for one queue."""
+    num_intervals = len(staffing)
+    interval_idx = (arrival // interval_seconds).astype(np.int64)
+    is_answered = result['agent'] >= 0
+    
+    offered = np.bincount(interval_idx, minlength=num_intervals)
+    handled = np.bincount(interval_idx[is_answered], minlength=num_intervals)
+    within_target = np.bincount(interval_idx[is_answered & (result['wait_seconds'] <= target_seconds)],
+                                minlength=num_intervals)
+    total_wait = np.bincount(interval_idx[is_answered], weights=result['wait_seconds'][is_answered],
+                             minlength=num_intervals)
+    
+    start = result['start'][is_answered]
+    busy = busy_seconds_per_interval(start, start + handle[is_answered], num_intervals, interval_seconds)
+    
+    calendar_start = dim_date['date'].values[0].astype('datetime64[ns]')
+    interval_start = calendar_start + (np.arange(num_intervals) * interval_seconds).astype('timedelta64[s]')
+    
+    return pd.DataFrame({
+        'interval_start': interval_start,
+        'queue': queue_name.title(),
+        'agents_scheduled': staffing.astype(np.int32),
+        'contacts_offered': offered.astype(np.int32),
+        'contacts_handled': handled.astype(np.int32),
+        'contacts_abandoned': (offered - handled).astype(np.int32),
+        'answered_within_target': within_target.astype(np.int32),
+        'avg_wait_seconds': np.round(np.divide(total_wait, handled, out=np.zeros(num_intervals), where=handled > 0), 1),
+        'busy_seconds': np.round(busy, 1),
+        'occupancy_pct': np.round(np.minimum(busy / (staffing * interval_seconds), 1.0) * 100, 2),
+        'service_level_pct': np.round(np.divide(within_target, offered, out=np.ones(num_intervals), where=offered > 0) * 100, 2)
+    })
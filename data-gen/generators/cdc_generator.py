@@ -0,0 +1,264 @@
+"""
+Change Data Capture Feed Generator
+Generates update, delete and late-arrival batches against the existing keys of DimCustomer,
+FactSales and FactSupport (customers are soft-deleted, since facts keep referencing them)
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+
+from utils.identifiers import format_ids
+
+# Columns every change row carries: I(nsert) / U(pdate) / D(elete) and a feed-wide order
+OPERATION_COLUMN = '_op'
+SEQUENCE_COLUMN = '_sequence'
+
+# Tables the feed changes, with their natural keys
+CDC_TABLES = {
+    'DimCustomer': ('dimensions', ['customer_id']),
+    'FactSales': ('sales', ['order_id', 'order_line_id']),
+    'FactSupport': ('call_center', ['ticket_id'])
+}
+
+# Share of a batch's change rows per kind of change
+DEFAULT_MIX = {
+    'customer_updates': 0.15,    # Segment, credit limit, account manager and activity changes
+    'customer_deletes': 0.01,    # Customers closed in the CRM (soft delete: is_active set to False)
+    'order_status': 0.50,        # pending -> shipped -> delivered transitions (one row per line and step)
+    'order_deletes': 0.02,       # Pending orders cancelled and removed
+    'late_orders': 0.12,         # New orders dated in the past, arriving now
+    'ticket_resolutions': 0.20   # Open and pending tickets resolved
+}
+
+# Most of a table's current rows (FactSales: lines) one batch changes, per kind of change, so a
+# large changes_per_batch on a small dataset does not rewrite or copy the whole table
+DEFAULT_MAX_SHARE = {
+    'customer_updates': 0.10,
+    'customer_deletes': 0.01,
+    'order_deletes': 0.01,
+    'late_orders': 0.02
+}
+
+
+def current_state(base: pd.DataFrame, changes: List[pd.DataFrame], keys: List[str]) -> pd.DataFrame:
+    """
+    Latest version of every row after applying earlier change batches to the base table:
+    the last row per key in sequence order, with deleted keys dropped.
+    """
+    if not changes:
+        return base
+    combined = pd.concat([base] + changes, ignore_index=True)
+    combined = combined.sort_values(SEQUENCE_COLUMN, na_position='first', kind='stable')
+    latest = combined.drop_duplicates(keys, keep='last')
+    latest = latest[latest[OPERATION_COLUMN].fillna('I').values != 'D']
+    return latest.drop(columns=[OPERATION_COLUMN, SEQUENCE_COLUMN]).reset_index(drop=True)
+
+
+def _date_ids(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Convert dates to DimDate integer keys (YYYYMMDD)."""
+    return (dates.year * 10000 + dates.month * 100 + dates.day).values
+
+
+def _pick_orders(order_ids: np.ndarray, eligible: np.ndarray, budget_rows: int, rng: np.random.Generator,
+                 taken: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Random orders among the eligible lines whose lines add up to at most budget_rows, as a
+    boolean mask over the lines (all lines of a picked order are selected).
+    """
+    codes, uniques = pd.factorize(order_ids)
+    order_eligible = np.zeros(len(uniques), dtype=bool)
+    order_eligible[codes[eligible]] = True
+    if taken is not None:
+        order_eligible[codes[taken]] = False
+    lines = np.bincount(codes, minlength=len(uniques))
+    candidates = rng.permutation(np.flatnonzero(order_eligible))
+    picked = candidates[np.cumsum(lines[candidates]) <= budget_rows]
+    chosen = np.zeros(len(uniques), dtype=bool)
+    chosen[picked] = True
+    return chosen[codes]
+
+
+def _customer_changes(customers: pd.DataFrame, config: dict, updates: int, deletes: int,
+                      rng: np.random.Generator) -> List[pd.DataFrame]:
+    """
+    Attribute updates and deletes of distinct customers. Deletes are soft (an update setting
+    is_active to False) and pick active customers: the row stays for the facts that reference it.
+    """
+    order = rng.permutation(len(customers))
+    active = customers['is_active'].values[order].astype(bool)
+    closing = order[active][:deletes]
+    deleted = customers.iloc[np.sort(closing)].copy()
+    updated = customers.iloc[np.sort(np.setdiff1d(order, closing, assume_unique=True)[:updates])].copy()
+    
+    segment_dist = config.get('dim_customer', {}).get('segment_distribution', {})
+    if segment_dist:
+        move = rng.random(len(updated)) < 0.3
+        new_segments = rng.choice([k.upper() for k in segment_dist], size=len(updated), p=list(segment_dist.values()))
+        updated['segment'] = np.where(move, new_segments, updated['segment'].values)
+    credit_limits = np.round(updated['credit_limit'].values * rng.uniform(0.8, 1.5, len(updated)), -3)
+    updated['credit_limit'] = credit_limits.astype(updated['credit_limit'].dtype)
+    updated['lifetime_value_tier'] = np.where(credit_limits >= 5000000, 'High',
+                                     np.where(credit_limits >= 500000, 'Medium', 'Low'))
+    # Account managers are handed over between customers
+    handover = rng.random(len(updated)) < 0.2
+    updated['account_manager'] = np.where(handover, customers['account_manager'].values[
+        rng.integers(0, len(customers), len(updated))], updated['account_manager'].values)
+    churn = rng.random(len(updated)) < 0.05
+    updated['is_active'] = np.where(churn, ~updated['is_active'].values, updated['is_active'].values)
+    
+    deleted['is_active'] = False
+    updated[OPERATION_COLUMN] = 'U'
+    deleted[OPERATION_COLUMN] = 'U'
+    return [updated, deleted]
+
+
+def _order_changes(sales: pd.DataFrame, as_of: pd.Timestamp, status_rows: int, delete_rows: int, late_rows: int,
+                   late_days: int, next_order_number: int, rng: np.random.Generator) -> List[pd.DataFrame]:
+    """Status transitions and cancellations of existing orders, and late-arriving new orders."""
+    order_ids = sales['order_id'].values
+    status = sales['status'].values
+    as_of_id = int(as_of.strftime('%Y%m%d'))
+    changes = []
+    
+    # Pending orders ship; shipped ones (including those just shipped, half the time) are delivered
+    cancelled = _pick_orders(order_ids, status == 'pending', delete_rows, rng)
+    moving = _pick_orders(order_ids, np.isin(status, ['pending', 'shipped']), status_rows, rng, taken=cancelled)
+    
+    shipping = sales[moving & (status == 'pending')].copy()
+    shipping['status'] = 'shipped'
+    shipping['ship_date_id'] = pd.array(np.full(len(shipping), as_of_id), dtype='Int64')
+    
+    arrived = pd.concat([sales[moving & (status == 'shipped')], shipping])
+    codes, uniques = pd.factorize(arrived['order_id'].values)
+    delivered_orders = rng.random(len(uniques)) < 0.5
+    already_shipped = np.r_[np.ones(int((moving & (status == 'shipped')).sum()), dtype=bool),
+                            np.zeros(len(shipping), dtype=bool)]
+    delivering = arrived[already_shipped | delivered_orders[codes]].copy()
+    delivering['status'] = 'delivered'
+    delivering['delivery_date_id'] = pd.array(np.full(len(delivering), as_of_id), dtype='Int64')
+    for frame in (shipping, delivering):
+        frame[OPERATION_COLUMN] = 'U'
+        changes.append(frame)
+    
+    removed = sales[cancelled].copy()
+    removed['status'] = 'cancelled'
+    removed[OPERATION_COLUMN] = 'D'
+    changes.append(removed)
+    
+    # Late arrivals: copies of random existing orders under new keys, dated up to late_days back
+    template = sales[_pick_orders(order_ids, np.ones(len(sales), dtype=bool), late_rows, rng)]
+    if len(template):
+        codes, uniques = pd.factorize(template['order_id'].values)
+        numbers = next_order_number + np.arange(len(uniques))
+        line_suffix = template['order_line_id'].str.slice(len('ORD_') + 8).values.astype(str)
+        order_dates = as_of - pd.to_timedelta(rng.integers(1, late_days + 1, len(uniques))[codes], unit='D')
+        
+        late = template.copy()
+        late['order_id'] = format_ids('ORD_', numbers, 8)[codes]
+        late['order_line_id'] = np.char.add(late['order_id'].values.astype(str), line_suffix)
+        late['order_date_id'] = _date_ids(pd.DatetimeIndex(order_dates))
+        
+        # Keep the template's lead times; steps after as_of have not happened yet
+        original = pd.to_datetime(template['order_date_id'].astype(str), format='%Y%m%d').values
+        late_status = template['status'].values.copy()
+        for column, step_statuses in (('ship_date_id', ['shipped', 'delivered', 'returned']),
+                                      ('delivery_date_id', ['delivered', 'returned'])):
+            step = template[column].to_numpy(dtype='float64', na_value=np.nan)
+            has_step = ~np.isnan(step)
+            step_dates = pd.to_datetime(np.where(has_step, step, 19700101).astype(np.int64).astype(str), format='%Y%m%d')
+            lead = step_dates.values - original
+            new_dates = pd.DatetimeIndex(order_dates.values + lead)
+            happened = has_step & (new_dates <= as_of)
+            late_status = np.where(has_step & ~happened & np.isin(late_status, step_statuses),
+                                   'pending' if column == 'ship_date_id' else 'shipped', late_status)
+            values = pd.array(np.where(happened, _date_ids(new_dates), 0), dtype='Int64')
+            values[~happened] = pd.NA
+            late[column] = values
+        late['status'] = late_status
+        late[OPERATION_COLUMN] = 'I'
+        changes.append(late)
+    return changes
+
+
+def _ticket_changes(tickets: pd.DataFrame, as_of: pd.Timestamp, resolutions: int,
+                    rng: np.random.Generator) -> List[pd.DataFrame]:
+    """
+    Open and pending tickets resolved, with resolution time and an occasional CSAT rating.
+    Resolutions happen by the end of as_of at the latest.
+    """
+    unresolved = np.flatnonzero(np.isin(tickets['status'].values, ['Open', 'Pending']))
+    picked = rng.choice(unresolved, size=min(resolutions, len(unresolved)), replace=False)
+    resolved = tickets.iloc[np.sort(picked)].copy()
+    # CSV datasets read the timestamps back as strings
+    created = pd.to_datetime(resolved['create_date']).values
+    latest = (as_of.normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)).to_datetime64()
+    resolved_at = np.minimum(created + (rng.gamma(2.0, 24.0, len(resolved)) * 3600e9).astype('timedelta64[ns]'),
+                             np.maximum(latest, created))
+    resolved['status'] = 'Resolved'
+    resolved['create_date'] = created
+    resolved['resolution_time_hours'] = np.round((resolved_at - created) / np.timedelta64(1, 'h'), 2)
+    resolved['resolved_date'] = resolved_at
+    rated = rng.random(len(resolved)) < 0.4
+    resolved['csat_score'] = np.where(rated, rng.integers(1, 6, len(resolved)), resolved['csat_score'].values)
+    resolved[OPERATION_COLUMN] = 'U'
+    return [resolved]
+
+
+def generate_cdc_data(config: dict, tables: Dict[str, pd.DataFrame], seed: int, sequence_start: int,
+                      as_of: pd.Timestamp, next_order_number: int) -> Dict[str, pd.DataFrame]:
+    """
+    Generate one CDC batch against the current rows of DimCustomer, FactSales and FactSupport.
+    
+    Each change row is a full row image plus OPERATION_COLUMN (I/U/D) and SEQUENCE_COLUMN, which
+    increases through the batch and continues from sequence_start, so several changes to one key
+    (an order shipped and delivered in the same batch) are ordered. Keys are picked with
+    permutations and cumulative line counts, without per-row loops.
+    
+    Args:
+        config: Full configuration dictionary (cdc section: changes_per_batch, mix, max_share,
+            late_arrival_days)
+        tables: Current rows of the CDC_TABLES (see current_state)
+        seed: Random seed for this batch
+        sequence_start: First sequence number of the batch
+        as_of: Date the changes happen (ship/delivery dates of transitions, late-arrival reference)
+        next_order_number: First ORD_ number for late-arriving orders (past every key ever issued)
+    
+    Returns:
+        Dictionary of change DataFrames per table (tables without changes omitted)
+    """
+    rng = np.random.default_rng(seed)
+    cdc_config = config.get('cdc', {})
+    total = cdc_config.get('changes_per_batch', 100000)
+    mix = {**DEFAULT_MIX, **cdc_config.get('mix', {})}
+    budget = {kind: int(round(total * share)) for kind, share in mix.items()}
+    max_share = {**DEFAULT_MAX_SHARE, **cdc_config.get('max_share', {})}
+    table_of_kind = {'customer_updates': 'DimCustomer', 'customer_deletes': 'DimCustomer',
+                     'order_deletes': 'FactSales', 'late_orders': 'FactSales'}
+    for kind, share in max_share.items():
+        if table_of_kind.get(kind) in tables:
+            budget[kind] = min(budget[kind], int(len(tables[table_of_kind[kind]]) * share))
+    
+    print(f"  Generating ~{total:,} change rows as of {as_of:%Y-%m-%d}...")
+    
+    changes = {}
+    if 'DimCustomer' in tables:
+        changes['DimCustomer'] = _customer_changes(tables['DimCustomer'], config, budget['customer_updates'],
+                                                   budget['customer_deletes'], rng)
+    if 'FactSales' in tables:
+        changes['FactSales'] = _order_changes(tables['FactSales'], as_of, budget['order_status'],
+                                              budget['order_deletes'], budget['late_orders'],
+                                              cdc_config.get('late_arrival_days', 30), next_order_number, rng)
+    if 'FactSupport' in tables:
+        changes['FactSupport'] = _ticket_changes(tables['FactSupport'], as_of, budget['ticket_resolutions'], rng)
+    
+    batch = {}
+    sequence = sequence_start
+    for table_name, frames in changes.items():
+        df = pd.concat([f for f in frames if len(f)], ignore_index=True) if any(len(f) for f in frames) else None
+        if df is None:
+            continue
+        df[SEQUENCE_COLUMN] = np.arange(sequence, sequence + len(df), dtype=np.int64)
+        sequence += len(df)
+        batch[table_name] = df
+    return batch
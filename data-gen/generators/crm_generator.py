@@ -4,6 +4,9 @@ import numpy as np
 from typing import Dict
 from datetime import datetime, timedelta
 
+from utils.append import sample_weights
+from utils.temporal import sample_dates
+
 def generate_crm_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
     """Generate CRM domain: FactOpportunities, FactActivities"""
     np.random.seed(seed)
@@ -28,9 +31,10 @@ def generate_crm_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: i
     print(f"  Generating {num_opportunities:,} opportunities...")
     
     # Vectorized approach - create all opportunities at once
-    customer_samples = dim_customer.sample(n=num_opportunities, replace=True, random_state=seed)
+    customer_samples = dim_customer.sample(n=num_opportunities, replace=True, weights=sample_weights(dim_customer),
+                                           random_state=seed)
     sales_rep_samples = sales_reps.sample(n=num_opportunities, replace=True, random_state=seed + 1)
-    date_samples = dim_date.sample(n=num_opportunities, replace=True, random_state=seed + 2)
+    date_samples = sample_dates(dim_date, num_opportunities, seed + 2, crm_config.get('opportunities'), config.get('temporal_profile'))
     
     # Generate stages
     stages = ['Prospecting', 'Qualification', 'Proposal', 'Negotiation', 'Closed Won', 'Closed Lost']
@@ -1,75 +1,228 @@
 """Finance Domain Generator"""
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Iterator, List
+
+from utils.identifiers import format_ids
+
+# Journal entry templates: debit and credit account codes from the chart of accounts,
+# relative frequency, and entry amount range (USD). Override with
+# finance.general_ledger.journal_templates in config.yml.
+DEFAULT_JOURNAL_TEMPLATES = [
+    {'name': 'Product sale on account', 'debit': ['1100'], 'credit': ['4000'], 'weight': 0.18, 'amount_range': [1000, 100000]},
+    {'name': 'Service sale on account', 'debit': ['1100'], 'credit': ['4100'], 'weight': 0.07, 'amount_range': [1000, 50000]},
+    {'name': 'Bundled sale on account', 'debit': ['1100'], 'credit': ['4000', '4100'], 'weight': 0.05, 'amount_range': [5000, 150000]},
+    {'name': 'Cost of goods sold', 'debit': ['5000'], 'credit': ['1200'], 'weight': 0.12, 'amount_range': [500, 60000]},
+    {'name': 'Inventory purchase', 'debit': ['1200'], 'credit': ['2000'], 'weight': 0.10, 'amount_range': [1000, 80000]},
+    {'name': 'Customer payment received', 'debit': ['1000'], 'credit': ['1100'], 'weight': 0.14, 'amount_range': [1000, 120000]},
+    {'name': 'Vendor payment', 'debit': ['2000'], 'credit': ['1000'], 'weight': 0.10, 'amount_range': [1000, 80000]},
+    {'name': 'Payroll', 'debit': ['6000'], 'credit': ['1000', '2100'], 'weight': 0.06, 'amount_range': [20000, 250000]},
+    {'name': 'Operating expense accrual', 'debit': ['6100', '6300', '6400'], 'credit': ['2100'], 'weight': 0.08, 'amount_range': [500, 50000]},
+    {'name': 'R&D expense', 'debit': ['6200'], 'credit': ['2000'], 'weight': 0.04, 'amount_range': [500, 50000]},
+    {'name': 'Prepaid expense', 'debit': ['1300'], 'credit': ['1000'], 'weight': 0.02, 'amount_range': [1000, 30000]},
+    {'name': 'Capital expenditure', 'debit': ['1500'], 'credit': ['2000', '2500'], 'weight': 0.02, 'amount_range': [10000, 500000]},
+    {'name': 'Debt repayment', 'debit': ['2500'], 'credit': ['1000'], 'weight': 0.01, 'amount_range': [10000, 200000]},
+    {'name': 'Equity issuance', 'debit': ['1000'], 'credit': ['3000'], 'weight': 0.01, 'amount_range': [50000, 1000000]}
+]
+
 
 def generate_finance_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Finance domain: FactGeneralLedger, FactBudget"""
+    """
+    Generate Finance domain: FactGeneralLedger, FactBudget
+    
+    FactGeneralLedger holds balanced double-entry journal entries (debits equal credits per
+    journal_entry_id) streamed one month at a time. FactBudget covers every configured
+    version x fiscal year x account x fiscal month.
+    """
     np.random.seed(seed)
     
     fin_config = config.get('finance', {})
-    txns_per_month = fin_config.get('general_ledger', {}).get('transactions_per_month', 5000)
+    gl_config = fin_config.get('general_ledger', {})
+    entries_per_month = gl_config.get('transactions_per_month', 5000)
     
     dim_date = dimensions['DimDate']
     dim_account = dimensions['DimAccount']
     
-    monthly_dates = dim_date[dim_date['day_of_month'] == 1].copy()
-    num_months = len(monthly_dates)
-    total_txns = txns_per_month * num_months
-    
-    print(f"  Generating {total_txns:,} GL transactions using {len(dim_account)} accounts...")
-    
-    # Sample accounts for transactions
-    dates = np.repeat(monthly_dates['date'].values, txns_per_month)
-    account_samples = dim_account.sample(n=total_txns, replace=True, random_state=seed)
-    
-    # Generate amounts - Revenue and Expense accounts tend to have higher transaction amounts
-    amounts = np.where(
-        account_samples['account_type'].values == 'Revenue',
-        np.random.uniform(1000, 100000, total_txns),
-        np.where(
-            account_samples['account_type'].values == 'Expense',
-            np.random.uniform(500, 50000, total_txns),
-            np.random.uniform(100, 20000, total_txns)
-        )
+    templates = _compile_journal_templates(gl_config.get('journal_templates', DEFAULT_JOURNAL_TEMPLATES), dim_account)
+    
+    # Month boundaries as DimDate positions
+    month_keys = (dim_date['year'].values * 100 + dim_date['month'].values)
+    month_starts = np.flatnonzero(np.r_[True, month_keys[1:] != month_keys[:-1]])
+    month_lengths = np.diff(np.r_[month_starts, len(dim_date)])
+    
+    total_entries = entries_per_month * len(month_starts)
+    expected_lines = int(total_entries * templates['lines_per_entry'] @ templates['probabilities'])
+    print(f"  Streaming {total_entries:,} balanced journal entries (~{expected_lines:,} GL lines) "
+          f"using {len(dim_account)} accounts...")
+    
+    fact_gl = _generate_journal_chunks(dim_date, dim_account, templates, month_starts, month_lengths,
+                                       entries_per_month, seed)
+    
+    df_budget = _build_budget(fin_config, dim_date, dim_account, templates, entries_per_month, seed + 1)
+    print(f"  Generated {len(df_budget):,} budget rows")
+    
+    # FactGeneralLedger is a lazy per-month chunk stream, written by generate_all
+    return {'FactGeneralLedger': fact_gl, 'FactBudget': df_budget}
+
+
+def _compile_journal_templates(template_config: List[dict], dim_account: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Turn journal templates into padded line tables indexed by template and line position.
+    
+    Templates that reference accounts missing from DimAccount are skipped.
+    """
+    account_index = pd.Index(dim_account['account_code'].astype(str))
+    valid = [
+        t for t in template_config
+        if (account_index.get_indexer([str(c) for c in t['debit'] + t['credit']]) >= 0).all()
+    ]
+    if not valid:
+        raise ValueError("No journal template matches the configured chart of accounts")
+    
+    max_lines = max(len(t['debit']) + len(t['credit']) for t in valid)
+    line_accounts = np.zeros((len(valid), max_lines), dtype=np.int64)
+    line_is_credit = np.zeros((len(valid), max_lines), dtype=bool)
+    for t_idx, template in enumerate(valid):
+        codes = [str(c) for c in template['debit'] + template['credit']]
+        line_accounts[t_idx, :len(codes)] = account_index.get_indexer(codes)
+        line_is_credit[t_idx, len(template['debit']):len(codes)] = True
+    
+    weights = np.array([t['weight'] for t in valid], dtype=float)
+    return {
+        'names': np.array([t['name'] for t in valid]),
+        'probabilities': weights / weights.sum(),
+        'amount_ranges': np.array([t['amount_range'] for t in valid], dtype=float),
+        'num_debits': np.array([len(t['debit']) for t in valid]),
+        'lines_per_entry': np.array([len(t['debit']) + len(t['credit']) for t in valid]),
+        'line_accounts': line_accounts,
+        'line_is_credit': line_is_credit
+    }
+
+
+def _generate_journal_chunks(dim_date: pd.DataFrame, dim_account: pd.DataFrame, templates: Dict[str, np.ndarray],
+                             month_starts: np.ndarray, month_lengths: np.ndarray, entries_per_month: int,
+                             seed: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield one month of balanced journal lines at a time.
+    
+    Each entry's amount is held in integer cents and split across its debit lines and its
+    credit lines with random shares; rounding residuals go to the first line of each side,
+    so both sides sum to the entry amount exactly.
+    """
+    date_values = dim_date['date'].values
+    date_ids = dim_date['date_id'].values
+    account_ids = pd.Categorical(dim_account['account_id'].values)
+    account_codes = pd.Categorical(dim_account['account_code'].values)
+    account_names = pd.Categorical(dim_account['account_name'].values)
+    account_types = pd.Categorical(dim_account['account_type'].values)
+    descriptions = pd.Categorical(templates['names'])
+    
+    for month_idx, (month_start, month_length) in enumerate(zip(month_starts, month_lengths)):
+        # Per-month generator keeps every chunk reproducible on its own
+        rng = np.random.default_rng(seed + month_idx)
+        n = entries_per_month
+        
+        template_idx = rng.choice(len(templates['names']), size=n, p=templates['probabilities'])
+        low, high = templates['amount_ranges'][template_idx].T
+        entry_cents = np.round(rng.uniform(low, high) * 100).astype(np.int64)
+        date_pos = month_start + rng.integers(0, month_length, n)
+        
+        # Explode entries to lines
+        lines_per_entry = templates['lines_per_entry'][template_idx]
+        entry_of_line = np.repeat(np.arange(n), lines_per_entry)
+        entry_first_line = np.cumsum(lines_per_entry) - lines_per_entry
+        line_pos = np.arange(len(entry_of_line)) - entry_first_line[entry_of_line]
+        line_template = template_idx[entry_of_line]
+        account_idx = templates['line_accounts'][line_template, line_pos]
+        is_credit = templates['line_is_credit'][line_template, line_pos]
+        
+        # Split each side of the entry with random shares, in integer cents
+        side_group = entry_of_line * 2 + is_credit
+        share_weights = rng.uniform(0.2, 1.0, len(entry_of_line))
+        shares = share_weights / np.bincount(side_group, weights=share_weights, minlength=2 * n)[side_group]
+        line_cents = np.floor(entry_cents[entry_of_line] * shares).astype(np.int64)
+        side_cents = np.bincount(side_group, weights=line_cents, minlength=2 * n).astype(np.int64)
+        residual = np.repeat(entry_cents, 2) - side_cents
+        first_of_side = np.r_[True, side_group[1:] != side_group[:-1]]
+        line_cents[first_of_side] += residual[side_group[first_of_side]]
+        
+        amounts = line_cents / 100
+        
+        yield pd.DataFrame({
+            'journal_entry_id': format_ids('JE-', month_idx * entries_per_month + np.arange(1, n + 1), 10)[entry_of_line],
+            'line_number': line_pos + 1,
+            'transaction_date': date_values[date_pos[entry_of_line]],
+            'transaction_date_id': date_ids[date_pos[entry_of_line]],
+            'account_id': pd.Categorical.from_codes(account_ids.codes[account_idx], account_ids.categories),
+            'account_code': pd.Categorical.from_codes(account_codes.codes[account_idx], account_codes.categories),
+            'account_name': pd.Categorical.from_codes(account_names.codes[account_idx], account_names.categories),
+            'account_type': pd.Categorical.from_codes(account_types.codes[account_idx], account_types.categories),
+            'debit_amount': np.where(is_credit, np.nan, amounts),
+            'credit_amount': np.where(is_credit, amounts, np.nan),
+            'amount': np.where(is_credit, -amounts, amounts),
+            'description': pd.Categorical.from_codes(descriptions.codes[line_template], descriptions.categories)
+        })
+
+
+def _build_budget(fin_config: dict, dim_date: pd.DataFrame, dim_account: pd.DataFrame,
+                  templates: Dict[str, np.ndarray], entries_per_month: int, seed: int) -> pd.DataFrame:
+    """
+    Build FactBudget for all versions x fiscal years x accounts x fiscal months at once.
+    
+    The monthly baseline per account is the expected net activity in the account's normal
+    balance direction implied by the journal templates, so budgets sit on the same scale
+    as FactGeneralLedger. Revised versions drift from the original; forecasts scatter
+    around the budget according to forecast_accuracy.
+    """
+    rng = np.random.default_rng(seed)
+    budget_config = fin_config.get('budget', {})
+    versions = np.array(budget_config.get('versions', ['Original']))
+    forecast_accuracy = budget_config.get('forecast_accuracy', 0.90)
+    fiscal_years = np.sort(dim_date['fiscal_year'].unique())
+    num_versions, num_years, num_accounts, num_months = len(versions), len(fiscal_years), len(dim_account), 12
+    
+    # Expected signed (debit positive) monthly activity per account from template line shares
+    mean_amounts = templates['amount_ranges'].mean(axis=1)
+    num_lines = templates['line_accounts'].shape[1]
+    line_valid = np.arange(num_lines)[np.newaxis, :] < templates['lines_per_entry'][:, np.newaxis]
+    side_lines = np.where(templates['line_is_credit'],
+                          (templates['lines_per_entry'] - templates['num_debits'])[:, np.newaxis],
+                          templates['num_debits'][:, np.newaxis])
+    line_expectation = np.where(templates['line_is_credit'], -1.0, 1.0) / side_lines * line_valid
+    line_expectation *= (entries_per_month * templates['probabilities'] * mean_amounts)[:, np.newaxis]
+    expected_debit_net = np.bincount(templates['line_accounts'][line_valid], weights=line_expectation[line_valid],
+                                     minlength=num_accounts)
+    normal_sign = np.where(dim_account['normal_balance'].values == 'Debit', 1.0, -1.0)
+    monthly_baseline = expected_debit_net * normal_sign
+    
+    # Original plan: per (year, account) level and per-month phasing noise
+    original = (monthly_baseline[np.newaxis, :, np.newaxis]
+                * rng.uniform(0.9, 1.1, (num_years, num_accounts, 1))
+                * rng.uniform(0.95, 1.05, (num_years, num_accounts, num_months)))
+    # Each revision compounds a small adjustment on the previous version
+    revision_steps = rng.normal(0, 0.03, (num_versions, num_years, num_accounts, 1))
+    revision_steps[0] = 0
+    budget = original[np.newaxis] * np.cumprod(1 + revision_steps, axis=0)
+    forecast = budget * (1 + rng.normal(0, 1 - forecast_accuracy, budget.shape))
+    
+    version_idx, year_idx, account_idx, month_idx = (
+        axis.ravel() for axis in np.indices((num_versions, num_years, num_accounts, num_months))
     )
+    fiscal_year_col = fiscal_years[year_idx]
+    fiscal_month_col = month_idx + 1
+    account_code_col = dim_account['account_code'].values[account_idx]
     
-    df_gl = pd.DataFrame({
-        'transaction_id': [f'GL-{i+1:010d}' for i in range(total_txns)],
-        'transaction_date': dates,
-        'account_id': account_samples['account_id'].values,
-        'account_code': account_samples['account_code'].values,
-        'account_name': account_samples['account_name'].values,
-        'account_type': account_samples['account_type'].values,
-        'amount': np.round(amounts, 2),
-        'description': [f"Transaction for {name}" for name in account_samples['account_name'].values]
+    return pd.DataFrame({
+        'budget_id': ('BUD-' + pd.Series(fiscal_year_col).astype(str) + '-' + pd.Series(account_code_col).astype(str)
+                      + '-M' + pd.Series(fiscal_month_col).astype(str).str.zfill(2)
+                      + '-V' + pd.Series(version_idx + 1).astype(str)).values,
+        'fiscal_year': fiscal_year_col,
+        'fiscal_month': fiscal_month_col,
+        'account_id': dim_account['account_id'].values[account_idx],
+        'account_code': account_code_col,
+        'account_name': dim_account['account_name'].values[account_idx],
+        'account_type': dim_account['account_type'].values[account_idx],
+        'budget_amount': np.round(budget.ravel(), 2),
+        'forecast_amount': np.round(forecast.ravel(), 2),
+        'version': versions[version_idx]
     })
-    
-    # Generate Budget data (annual budget by account)
-    years = dim_date['year'].unique()
-    budget_records = []
-    
-    for year in years:
-        for _, account in dim_account.iterrows():
-            # Budget amounts vary by account type
-            if account['account_type'] == 'Revenue':
-                budget_amt = np.random.uniform(1000000, 5000000)
-            elif account['account_type'] == 'Expense':
-                budget_amt = np.random.uniform(500000, 2000000)
-            else:
-                budget_amt = 0  # No budget for Asset/Liability/Equity accounts
-            
-            budget_records.append({
-                'budget_id': f"BUD-{year}-{account['account_code']}",
-                'fiscal_year': year,
-                'account_id': account['account_id'],
-                'account_code': account['account_code'],
-                'account_name': account['account_name'],
-                'account_type': account['account_type'],
-                'budget_amount': np.round(budget_amt, 2),
-                'version': 'Original'
-            })
-    
-    df_budget = pd.DataFrame(budget_records)
-    
-    return {'FactGeneralLedger': df_gl, 'FactBudget': df_budget}
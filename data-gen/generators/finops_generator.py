@@ -1,40 +1,230 @@
 """FinOps Domain Generator"""
+import json
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Iterator, Tuple
+
+from utils.identifiers import format_ids
+from utils.panel import ar1_noise, cross_join
+
+# service_type -> (share of resources, {provider: (service_name, usage_unit, on-demand unit price)})
+SERVICE_CATALOG = {
+    'Compute': (0.35, {'azure': ('Virtual Machines', 'Hours', 0.192), 'aws': ('EC2', 'Hours', 0.192),
+                       'gcp': ('Compute Engine', 'Hours', 0.190)}),
+    'Storage': (0.20, {'azure': ('Blob Storage', 'GB-Hours', 0.0000274), 'aws': ('S3', 'GB-Hours', 0.0000315),
+                       'gcp': ('Cloud Storage', 'GB-Hours', 0.0000274)}),
+    'Database': (0.15, {'azure': ('SQL Database', 'vCore-Hours', 0.505), 'aws': ('RDS', 'vCore-Hours', 0.480),
+                        'gcp': ('Cloud SQL', 'vCore-Hours', 0.413)}),
+    'Networking': (0.10, {'azure': ('Bandwidth', 'GB', 0.087), 'aws': ('Data Transfer', 'GB', 0.090),
+                          'gcp': ('Network Egress', 'GB', 0.085)}),
+    'Analytics': (0.10, {'azure': ('Synapse Analytics', 'DWU-Hours', 1.20), 'aws': ('Redshift', 'Node-Hours', 1.086),
+                         'gcp': ('BigQuery', 'Slot-Hours', 0.040)}),
+    'Containers': (0.10, {'azure': ('AKS', 'Node-Hours', 0.10), 'aws': ('EKS', 'Node-Hours', 0.10),
+                          'gcp': ('GKE', 'Node-Hours', 0.10)})
+}
+
+PROVIDER_REGIONS = {
+    'azure': ['East US', 'West Europe', 'Southeast Asia'],
+    'aws': ['us-east-1', 'eu-west-1', 'ap-southeast-1'],
+    'gcp': ['us-central1', 'europe-west1', 'asia-southeast1']
+}
+
+PROVIDER_NAMES = {'azure': 'Azure', 'aws': 'AWS', 'gcp': 'GCP'}
+
+# Relative resource size by environment
+ENVIRONMENT_SCALE = {'production': 1.0, 'development': 0.35, 'test': 0.25}
+
+PRICING_MODELS = ['On-Demand', 'Reserved', 'Savings Plan', 'Spot']
+PRICING_DISCOUNT = np.array([1.0, 0.60, 0.72, 0.30])
+
+# Hourly usage shape (mean 1): always-on workloads vs. business-hours workloads that scale in at night
+ALWAYS_ON_PROFILE = np.full(24, 1.0)
+PRODUCTION_PROFILE = 1 + 0.25 * np.sin((np.arange(24) - 8) / 24 * 2 * np.pi)
+BUSINESS_HOURS_PROFILE = np.where((np.arange(24) >= 8) & (np.arange(24) < 19), 1.0, 0.15)
 
 def generate_finops_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate FinOps domain: FactCloudCosts"""
+    """Generate FinOps domain: DimCloudResource, FactCloudCosts"""
     np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    
+    cost_config = config.get('finops', {}).get('cloud_costs', {})
+    num_resources = cost_config.get('daily_records', 300)
+    granularity = cost_config.get('granularity', 'hourly')
     
     dim_date = dimensions['DimDate']
     dim_employee = dimensions['DimEmployee']
+    dim_project = dimensions.get('DimProject')
+    
+    df_resources, lifecycle = _build_dim_cloud_resource(cost_config, num_resources, dim_date, dim_employee, dim_project, rng)
+    
+    hours_per_row = 1 if granularity == 'hourly' else 24
+    rows_per_day = num_resources * 24 // hours_per_row
+    print(f"  Generating ~{rows_per_day * len(dim_date):,} {granularity} cloud usage records "
+          f"({num_resources:,} resources x {len(dim_date):,} days)...")
     
-    daily_dates = dim_date.copy()
-    num_days = len(daily_dates)
+    # FactCloudCosts is a lazy per-day chunk stream, written by generate_all
+    fact_costs = _generate_usage_chunks(df_resources, lifecycle, cost_config, dim_date, hours_per_row, seed + 1)
+    
+    return {'DimCloudResource': df_resources, 'FactCloudCosts': fact_costs}
+
+
+def _build_dim_cloud_resource(cost_config: dict, num_resources: int, dim_date: pd.DataFrame, dim_employee: pd.DataFrame,
+                              dim_project: pd.DataFrame, rng: np.random.Generator) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    Generate cloud resources with provider, environment, service, region, pricing and tags.
     
-    services = ['Compute', 'Storage', 'Database', 'Networking', 'Analytics']
-    num_services = len(services)
-    total_records = num_days * num_services
+    Returns:
+        (DimCloudResource, per-resource spend_weight / created_day / retired_day arrays)
+    """
+    num_days = len(dim_date)
+    provider_dist = cost_config.get('providers', {'azure': 0.50, 'aws': 0.35, 'gcp': 0.15})
+    environment_dist = cost_config.get('environment_distribution', {'production': 0.60, 'development': 0.25, 'test': 0.15})
+    providers = list(provider_dist)
+    environments = list(environment_dist)
+    services = list(SERVICE_CATALOG)
     
-    print(f"  Generating {total_records:,} cloud cost records...")
+    provider_codes = rng.choice(len(providers), num_resources, p=np.array(list(provider_dist.values())) / sum(provider_dist.values()))
+    environment_codes = rng.choice(len(environments), num_resources,
+                                   p=np.array(list(environment_dist.values())) / sum(environment_dist.values()))
+    service_shares = np.array([SERVICE_CATALOG[s][0] for s in services])
+    service_codes = rng.choice(len(services), num_resources, p=service_shares / service_shares.sum())
+    region_codes = rng.integers(0, 3, num_resources)
     
-    dates = np.repeat(daily_dates['date'].values, num_services)
-    service_names = np.tile(services, num_days)
+    # Commitment discounts apply to steady compute-like production workloads; spot to non-production compute
+    is_production = np.array(environments)[environment_codes] == 'production'
+    is_compute_like = np.isin(np.array(services)[service_codes], ['Compute', 'Database', 'Containers'])
+    pricing_codes = np.where(is_compute_like & is_production, rng.choice(3, num_resources, p=[0.45, 0.35, 0.20]),
+                    np.where(is_compute_like, rng.choice([0, 3], num_resources, p=[0.70, 0.30]), 0))
     
-    # Base costs with growth trend
-    base_costs = {'Compute': 5000, 'Storage': 2000, 'Database': 3000, 'Networking': 1000, 'Analytics': 1500}
-    day_indices = np.repeat(np.arange(num_days), num_services)
-    growth = 1 + (day_indices / num_days * 0.15)  # 15% growth over period
+    catalog = [[SERVICE_CATALOG[s][1][p] for p in providers] for s in services]
+    service_names = np.array([catalog[s][p][0] for s, p in zip(service_codes, provider_codes)])
+    usage_units = np.array([catalog[s][p][1] for s, p in zip(service_codes, provider_codes)])
+    list_prices = np.array([catalog[s][p][2] for s, p in zip(service_codes, provider_codes)])
     
-    costs = np.array([base_costs[s] for s in service_names]) * growth * np.random.uniform(0.8, 1.2, total_records)
+    # Heavy-tailed spend weights: a few large resources dominate, as in real bills
+    spend_weight = rng.lognormal(0, 1.2, num_resources) * np.array([ENVIRONMENT_SCALE.get(e, 0.5) for e in environments])[environment_codes]
     
-    df_costs = pd.DataFrame({
-        'cost_date': dates,
+    # 20% of resources are provisioned during the period, 15% are decommissioned before its end
+    created_day = np.where(rng.random(num_resources) < 0.20, rng.integers(0, num_days, num_resources), 0)
+    retired_day = np.where(rng.random(num_resources) < 0.15, rng.integers(created_day + 1, num_days + 1), num_days)
+    
+    owners = dim_employee['employee_id'].values[rng.integers(0, len(dim_employee), num_resources)]
+    projects = (dim_project['project_id'].values[rng.integers(0, len(dim_project), num_resources)]
+                if dim_project is not None and len(dim_project) else np.full(num_resources, None, dtype=object))
+    applications = np.array(['web', 'api', 'data', 'ml', 'erp', 'crm', 'analytics', 'identity'])[rng.integers(0, 8, num_resources)]
+    cost_centers = format_ids('CC-', rng.integers(100, 1000, num_resources), 3)
+    
+    resource_ids = format_ids('RES-', np.arange(1, num_resources + 1), 6)
+    environment_labels = np.array([e.title() for e in environments])[environment_codes]
+    region_labels = np.array([PROVIDER_REGIONS.get(p, PROVIDER_REGIONS['azure']) for p in providers])[provider_codes, region_codes]
+    
+    df_resources = pd.DataFrame({
+        'resource_id': resource_ids,
+        'resource_name': [f"{environment_labels[i][:4].lower()}-{applications[i]}-{services[service_codes[i]].lower()}-{i + 1}"
+                          for i in range(num_resources)],
+        'provider': np.array([PROVIDER_NAMES.get(p, p.upper()) for p in providers])[provider_codes],
+        'service_type': np.array(services)[service_codes],
         'service_name': service_names,
-        'provider': 'Azure',
-        'cost_usd': np.round(costs, 2),
-        'region': np.random.choice(['East US', 'West Europe', 'Southeast Asia'], total_records)
+        'environment': environment_labels,
+        'region': region_labels,
+        'subscription_id': format_ids('SUB-', provider_codes * 10 + environment_codes, 4),
+        'resource_group': np.char.add(np.char.add('rg-', applications), np.char.add('-', np.char.lower(environment_labels))),
+        'pricing_model': np.array(PRICING_MODELS)[pricing_codes],
+        'usage_unit': usage_units,
+        'unit_price': np.round(list_prices * PRICING_DISCOUNT[pricing_codes], 7),
+        'owner_id': owners,
+        'project_id': projects,
+        'cost_center': cost_centers,
+        'application': applications,
+        'tags': [json.dumps({'env': environment_labels[i].lower(), 'app': applications[i], 'owner': owners[i],
+                             'cost_center': cost_centers[i]}) for i in range(num_resources)],
+        'created_date': dim_date['date'].values[created_day],
+        'retired_date': np.where(retired_day < num_days, dim_date['date'].values[np.minimum(retired_day, num_days - 1)],
+                                 np.datetime64('NaT'))
     })
+    lifecycle = {'spend_weight': spend_weight, 'created_day': created_day, 'retired_day': retired_day}
+    return df_resources, lifecycle
+
+
+def _generate_usage_chunks(df_resources: pd.DataFrame, lifecycle: Dict[str, np.ndarray], cost_config: dict, dim_date: pd.DataFrame, hours_per_row: int,
+                           seed: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield resource x hour usage and cost rows one day at a time.
+    
+    Each resource's usage is its spend weight x an hourly shape (always-on, production
+    swing or business hours with weekend scale-in) x exp(AR(1) noise). The AR(1) state is
+    carried across days, so curves are autocorrelated rather than i.i.d. Every day is then
+    scaled so expected spend over active resources follows monthly_spend compounded by
+    growth_rate, which calibrates the bill regardless of resource churn.
+    """
+    rng = np.random.default_rng(seed)
+    monthly_spend = cost_config.get('monthly_spend', 250000)
+    growth_rate = cost_config.get('growth_rate', 0.15)
+    phi = cost_config.get('usage_autocorrelation', 0.90)
+    noise_sd = cost_config.get('usage_volatility', 0.25)
+    
+    num_resources = len(df_resources)
+    num_days = len(dim_date)
+    services = df_resources['service_type'].values
+    is_production = df_resources['environment'].values == 'Production'
+    is_elastic = np.isin(services, ['Compute', 'Database', 'Containers', 'Analytics'])
+    
+    # Profile per resource: 0 always-on, 1 production swing, 2 business hours
+    profile_codes = np.where(~is_elastic, 0, np.where(is_production, 1, 2))
+    profiles = np.vstack([ALWAYS_ON_PROFILE, PRODUCTION_PROFILE / PRODUCTION_PROFILE.mean(),
+                          BUSINESS_HOURS_PROFILE / BUSINESS_HOURS_PROFILE.mean()])
+    weekend_factor = np.where(profile_codes == 2, 0.30, np.where(profile_codes == 1, 0.85, 1.0))
+    # Weekday uplift so a full week averages the resource's weight
+    weekday_factor = 7 / (5 + 2 * weekend_factor)
+    
+    state = None
+    
+    spend_weight = lifecycle['spend_weight']
+    created_day = lifecycle['created_day']
+    retired_day = lifecycle['retired_day']
+    unit_price = df_resources['unit_price'].values
+    
+    resource_cat = pd.Categorical.from_codes(np.arange(num_resources), categories=df_resources['resource_id'].values)
+    attribute_cats = {
+        column: pd.Categorical(df_resources[column].values)
+        for column in ['provider', 'service_type', 'environment', 'region', 'pricing_model', 'usage_unit']
+    }
+    
+    years_elapsed = (dim_date['date'].values - dim_date['date'].values[0]) / np.timedelta64(1, 'D') / 365.25
+    target_hourly_spend = monthly_spend * 12 / (365.25 * 24) * (1 + growth_rate) ** years_elapsed
+    is_weekend = dim_date['day_of_week'].values >= 6
     
-    return {'FactCloudCosts': df_costs}
+    for day in range(num_days):
+        # Noise evolves for every resource so the AR state stays continuous through churn
+        noise = ar1_noise(num_resources, 24, phi, noise_sd, rng, initial_state=state)
+        state = noise[:, -1]
+        
+        active = np.flatnonzero((created_day <= day) & (retired_day > day))
+        if len(active) == 0:
+            continue
+        
+        scale = target_hourly_spend[day] / spend_weight[active].sum()
+        day_factor = weekday_factor[active] * (weekend_factor[active] if is_weekend[day] else 1.0)
+        hourly_cost = (spend_weight[active] * scale * day_factor)[:, np.newaxis] \
+                      * profiles[profile_codes[active]] * np.exp(noise[active] - noise_sd ** 2 / 2)
+        
+        if hours_per_row == 24:
+            hourly_cost = hourly_cost.sum(axis=1, keepdims=True)
+        num_slots = hourly_cost.shape[1]
+        row_hour, row_resource = cross_join(active, np.arange(num_slots))
+        cost = hourly_cost.ravel()
+        
+        chunk = pd.DataFrame({
+            'usage_date': np.full(len(cost), dim_date['date'].values[day]),
+            'usage_date_id': np.full(len(cost), dim_date['date_id'].values[day], dtype=np.int32),
+            'usage_hour': row_hour.astype(np.int8),
+            'resource_id': resource_cat[row_resource]
+        })
+        for column, values in attribute_cats.items():
+            chunk[column] = values[row_resource]
+        chunk['usage_quantity'] = np.round(cost / unit_price[row_resource], 4)
+        chunk['unit_price'] = unit_price[row_resource]
+        chunk['cost'] = np.round(cost, 4)
+        if hours_per_row == 24:
+            chunk = chunk.drop(columns='usage_hour')
+        yield chunk
@@ -4,8 +4,10 @@ import numpy as np
 from typing import Dict
 from datetime import timedelta
 
+from utils.temporal import sample_dates, select_snapshot_positions
+
 def generate_hr_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate HR domain: FactAttrition, FactHiring"""
+    """Generate HR domain: FactAttrition, FactHiring, FactHeadcountDaily"""
     np.random.seed(seed)
     
     hr_config = config.get('hr', {})
@@ -21,7 +23,8 @@ def generate_hr_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: in
     num_attrition = int(len(dim_employee) * attrition_rate * 3)  # 3 years
     
     attrition_employees = dim_employee.sample(n=min(num_attrition, len(dim_employee)), random_state=seed)
-    attrition_dates = dim_date.sample(n=len(attrition_employees), replace=True, random_state=seed + 1)
+    attrition_dates = sample_dates(dim_date, len(attrition_employees), seed + 1, hr_config.get('attrition'),
+                                   config.get('temporal_profile'))
     
     attrition_types = np.random.choice(['Voluntary', 'Involuntary', 'Retirement'], 
                                        size=len(attrition_employees), p=[0.75, 0.20, 0.05])
@@ -39,7 +42,7 @@ def generate_hr_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: in
     })
     
     # FactHiring - new hires
-    hire_dates = dim_date.sample(n=num_hires, replace=True, random_state=seed + 2)
+    hire_dates = sample_dates(dim_date, num_hires, seed + 2, hr_config.get('hiring'), config.get('temporal_profile'))
     
     time_to_fill = np.random.uniform(21, 120, num_hires)
     sources = np.random.choice(['Referral', 'LinkedIn', 'Job Board', 'Agency'], 
@@ -64,8 +67,82 @@ def generate_hr_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: in
         'department': hired_employees['department'].values
     })
     
+    # FactHeadcountDaily - point-in-time headcount from DimEmployee employment intervals
+    frequency = hr_config.get('headcount', {}).get('snapshot_frequency', 'daily')
+    df_headcount = _build_headcount_snapshot(dim_employee, dim_date, frequency)
+    
     return {
         'FactAttrition': df_attrition,
-        'FactHiring': df_hiring
+        'FactHiring': df_hiring,
+        'FactHeadcountDaily': df_headcount
     }
 
+
+def _build_headcount_snapshot(dim_employee: pd.DataFrame, dim_date: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    Headcount by department, location and employment type at each snapshot date.
+    
+    Each employee contributes +1 on the hire day and -1 on the termination date, the day
+    the terminations flow reports them, so headcount changes by exactly hires - terminations.
+    The events are binned into a dense group x day delta matrix with np.bincount and a
+    running sum along the day axis gives the headcount of every group on every day, so the
+    cost is one pass over employees plus one over the panel. Employees hired before the
+    first DimDate day are part of the opening headcount.
+    
+    Args:
+        dim_employee: Employee dimension with hire_date and termination_date
+        dim_date: Date dimension
+        frequency: Snapshot frequency (daily, weekly or monthly)
+    
+    Returns:
+        DataFrame with one row per snapshot date and employee group
+    """
+    group_columns = ['department', 'location', 'employment_type']
+    group_codes, groups = pd.MultiIndex.from_frame(dim_employee[group_columns]).factorize()
+    num_groups, num_days = len(groups), len(dim_date)
+    
+    print(f"  Generating {frequency} headcount snapshot ({num_groups:,} employee groups x {num_days:,} days)...")
+    
+    calendar = dim_date['date'].values.astype('datetime64[D]')
+    hire_dates = pd.to_datetime(dim_employee['hire_date']).values.astype('datetime64[D]')
+    termination_dates = pd.to_datetime(dim_employee['termination_date']).values.astype('datetime64[D]')
+    
+    # Day positions of the +1 / -1 events; position num_days means after the calendar
+    hire_pos = np.searchsorted(calendar, hire_dates, side='left')
+    leave_pos = np.where(np.isnat(termination_dates), num_days,
+                         np.searchsorted(calendar, termination_dates, side='left'))
+    
+    width = num_days + 1
+    hires = np.bincount(group_codes * width + hire_pos, minlength=num_groups * width).reshape(num_groups, width)
+    leavers = np.bincount(group_codes * width + leave_pos, minlength=num_groups * width).reshape(num_groups, width)
+    headcount = np.cumsum(hires - leavers, axis=1)[:, :num_days]
+    
+    # Day 0 events fold in the opening headcount; only first-day hires and terminations are flows
+    hires[:, 0] = np.bincount(group_codes[hire_dates == calendar[0]], minlength=num_groups)
+    leavers[:, 0] = np.bincount(group_codes[termination_dates == calendar[0]], minlength=num_groups)
+    
+    # Flows between snapshots come from cumulative totals at the snapshot days
+    snapshot_positions = select_snapshot_positions(dim_date, frequency)
+    period_hires = np.diff(np.cumsum(hires[:, :num_days], axis=1)[:, snapshot_positions], axis=1, prepend=0)
+    period_leavers = np.diff(np.cumsum(leavers[:, :num_days], axis=1)[:, snapshot_positions], axis=1, prepend=0)
+    
+    # Skip groups with no employees at any point in the calendar
+    active_groups = np.flatnonzero((headcount > 0).any(axis=1) | (period_hires > 0).any(axis=1))
+    num_snapshots = len(snapshot_positions)
+    group_col = np.repeat(active_groups, num_snapshots)
+    snapshot_col = np.tile(snapshot_positions, len(active_groups))
+    
+    headcount_values = headcount[:, snapshot_positions][active_groups].ravel()
+    hire_values = period_hires[active_groups].ravel()
+    leaver_values = period_leavers[active_groups].ravel()
+    
+    df = pd.DataFrame({'snapshot_date': dim_date['date'].values[snapshot_col]})
+    for i, column in enumerate(group_columns):
+        level_codes, level_values = pd.factorize(groups.get_level_values(i))
+        df[column] = pd.Categorical.from_codes(level_codes[group_col], categories=level_values)
+    df['headcount'] = headcount_values.astype(np.int32)
+    df['hires'] = hire_values.astype(np.int32)
+    df['terminations'] = leaver_values.astype(np.int32)
+    df['net_change'] = (hire_values - leaver_values).astype(np.int32)
+    return df
+
@@ -1,15 +1,27 @@
 """IT Ops Domain Generator"""
 import pandas as pd
 import numpy as np
-from typing import Dict
-from datetime import timedelta
+from typing import Dict, Iterator
+
+from utils.identifiers import format_ids
+from utils.point_process import sample_hawkes_cascades
+from utils.temporal import build_day_weights, sample_date_positions
+
+INCIDENT_SEVERITIES = ['P1', 'P2', 'P3', 'P4']
+# Alert severity codes 0-3 line up with P1-P4; Info alerts never open incidents
+ALERT_SEVERITIES = ['Critical', 'Major', 'Minor', 'Warning', 'Info']
+ALERT_SOURCES = ['Azure Monitor', 'Prometheus', 'Datadog', 'Splunk']
+MINUTES_PER_DAY = 24 * 60
 
 def generate_itops_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate IT Ops domain: FactIncidents"""
+    """Generate IT Ops domain: FactIncidents, FactAlerts"""
     np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     it_config = config.get('it_ops', {})
-    num_incidents = it_config.get('incidents', {}).get('count', 20000)
+    incident_config = it_config.get('incidents', {})
+    alert_config = it_config.get('alerts', {})
+    num_incidents = incident_config.get('count', 20000)
     
     dim_employee = dimensions['DimEmployee']
     dim_date = dimensions['DimDate']
@@ -19,35 +31,238 @@ def generate_itops_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
     if len(it_staff) == 0:
         it_staff = dim_employee.sample(n=min(50, len(dim_employee)), random_state=seed)
     
-    print(f"  Generating {num_incidents:,} IT incidents...")
+    # Monitored systems, each belonging to one incident category
+    num_systems = alert_config.get('systems', 200)
+    category_dist = incident_config.get('category_distribution', {'hardware': 0.20, 'software': 0.40, 'network': 0.25, 'security': 0.15})
+    categories = [k.title() for k in category_dist]
+    system_names = format_ids('SYS-', np.arange(1, num_systems + 1), 4)
+    system_category = rng.choice(len(categories), num_systems, p=np.array(list(category_dist.values())) / sum(category_dist.values()))
+    
+    print(f"  Generating correlated alert cascades for ~{num_incidents:,} IT incidents...")
+    
+    cascades = _sample_actionable_alerts(incident_config, alert_config, dim_date, num_systems, num_incidents,
+                                         config.get('temporal_profile'), rng)
+    alert_incident, df_incidents = _cluster_alerts_into_incidents(
+        cascades, incident_config, alert_config, dim_date, it_staff, system_names, system_category, categories, rng
+    )
+    cascades['incident_id'] = df_incidents['incident_id'].values[alert_incident]
+    
+    # FactAlerts is a lazy per-month chunk stream of background noise merged with the cascades
+    fact_alerts = _generate_alert_chunks(cascades, alert_config, dim_date, system_names, system_category,
+                                         categories, seed + 100)
+    
+    return {'FactIncidents': df_incidents, 'FactAlerts': fact_alerts}
+
+
+def _sample_actionable_alerts(incident_config: dict, alert_config: dict, dim_date: pd.DataFrame, num_systems: int,
+                              num_incidents: int, temporal_profile: dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    Sample incident-grade alert cascades as a Hawkes process.
     
-    # Vectorized generation
-    assignee_samples = it_staff.sample(n=num_incidents, replace=True, random_state=seed)
-    date_samples = dim_date.sample(n=num_incidents, replace=True, random_state=seed + 1)
+    Root alerts carry a P1-P4 severity from severity_distribution, and more severe roots
+    excite more follow-up alerts (cascade_branching_ratio). Each follow-up alert stays on
+    its parent's system or, with cross_system_probability, hits another system, where it
+    opens a separate downstream incident. Follow-ups inside their parent's incident keep the
+    parent severity or degrade by one level, which leaves the incident's severity unchanged;
+    those opening an incident of their own (another system, or later than
+    correlation_window_minutes) draw theirs from severity_distribution, so downstream
+    incidents follow the configured mix too. The number of roots is scaled so the expected
+    incident count matches it_ops.incidents.count.
     
-    severities = np.random.choice(['P1', 'P2', 'P3', 'P4'], size=num_incidents, p=[0.05, 0.15, 0.40, 0.40])
-    categories = np.random.choice(['Infrastructure', 'Application', 'Network', 'Security', 'Database'], num_incidents)
+    Returns:
+        Dictionary of alert arrays sorted by time (minutes since the first DimDate day)
+    """
+    severity_dist = incident_config.get('severity_distribution', {'p1': 0.05, 'p2': 0.15, 'p3': 0.50, 'p4': 0.30})
+    severity_probs = np.array([severity_dist.get(k, 0.0) for k in ['p1', 'p2', 'p3', 'p4']])
+    severity_probs = severity_probs / severity_probs.sum()
+    ratio_config = alert_config.get('cascade_branching_ratio', {'p1': 0.92, 'p2': 0.75, 'p3': 0.45, 'p4': 0.20})
+    branching = np.array([ratio_config.get(k, 0.0) for k in ['p1', 'p2', 'p3', 'p4']])
+    cross_system = alert_config.get('cross_system_probability', 0.25)
+    decay = alert_config.get('decay_minutes', 20)
+    window = alert_config.get('correlation_window_minutes', 30)
+    
+    # Each root opens one incident plus one per cross-system descendant
+    incidents_per_root = (severity_probs * (1 + cross_system * branching / (1 - branching))).sum()
+    num_roots = max(int(round(num_incidents / incidents_per_root)), 1)
+    
+    day_weights = build_day_weights(dim_date, incident_config.get('growth_rate', 0.0),
+                                    incident_config.get('seasonality', False), temporal_profile)
+    root_times = (sample_date_positions(day_weights, num_roots, rng) + rng.random(num_roots)) * MINUTES_PER_DAY
+    root_severity = rng.choice(4, num_roots, p=severity_probs)
+    
+    events = sample_hawkes_cascades(root_times, branching[root_severity], decay, rng)
+    parent, generation = events['parent'], events['generation']
+    
+    # Propagate system and severity marks one generation at a time (parents come first)
+    num_alerts = len(parent)
+    system = np.empty(num_alerts, dtype=np.int64)
+    severity = np.empty(num_alerts, dtype=np.int64)
+    system[:num_roots] = rng.integers(0, num_systems, num_roots)
+    severity[:num_roots] = root_severity
+    for g in range(1, int(generation.max()) + 1):
+        idx = np.flatnonzero(generation == g)
+        jumps = rng.random(len(idx)) < cross_system
+        system[idx] = np.where(jumps, rng.integers(0, num_systems, len(idx)), system[parent[idx]])
+        # Follow-ups that open an incident of their own (another system, or past the correlation window)
+        opens_incident = jumps | (events['time'][idx] - events['time'][parent[idx]] > window)
+        degraded = np.minimum(severity[parent[idx]] + (rng.random(len(idx)) < 0.40), 3)
+        severity[idx] = np.where(opens_incident, rng.choice(4, len(idx), p=severity_probs), degraded)
+    
+    horizon = len(dim_date) * MINUTES_PER_DAY
+    keep = np.flatnonzero(events['time'] < horizon)
+    order = keep[np.argsort(events['time'][keep], kind='stable')]
+    return {
+        'time': events['time'][order],
+        'system': system[order],
+        'severity': severity[order],
+        'root': events['root'][order],
+        'is_cascade': generation[order] > 0
+    }
+
+
+def _cluster_alerts_into_incidents(cascades: Dict[str, np.ndarray], incident_config: dict, alert_config: dict,
+                                   dim_date: pd.DataFrame, it_staff: pd.DataFrame, system_names: np.ndarray,
+                                   system_category: np.ndarray, categories: list, rng: np.random.Generator):
+    """
+    Group actionable alerts into incidents by system and time gap.
     
-    # Resolution time based on severity (hours)
-    resolution_times = np.where(severities == 'P1', np.random.uniform(0.5, 4, num_incidents),
-                       np.where(severities == 'P2', np.random.uniform(2, 24, num_incidents),
-                       np.where(severities == 'P3', np.random.uniform(8, 72, num_incidents),
-                                np.random.uniform(24, 240, num_incidents))))
+    Alerts are sorted by (system, time) and a new incident starts whenever the system
+    changes or the gap to the previous alert exceeds correlation_window_minutes. This is how
+    an alert-correlation engine opens tickets, so cascades become one incident per affected
+    system. The incident severity is its most severe alert.
     
-    statuses = np.random.choice(['Resolved', 'In Progress', 'Open'], size=num_incidents, p=[0.80, 0.15, 0.05])
+    Returns:
+        (incident position per alert, FactIncidents DataFrame ordered by creation time)
+    """
+    window = alert_config.get('correlation_window_minutes', 30)
+    time, system, severity = cascades['time'], cascades['system'], cascades['severity']
+    num_alerts = len(time)
+    
+    order = np.lexsort((time, system))
+    sorted_time, sorted_system = time[order], system[order]
+    new_incident = np.r_[True, (sorted_system[1:] != sorted_system[:-1]) | (np.diff(sorted_time) > window)]
+    group_starts = np.flatnonzero(new_incident)
+    group_of_sorted = np.cumsum(new_incident) - 1
+    
+    created = sorted_time[group_starts]
+    last_alert = np.maximum.reduceat(sorted_time, group_starts)
+    incident_severity = np.minimum.reduceat(severity[order], group_starts)
+    alert_count = np.diff(np.r_[group_starts, num_alerts])
+    incident_system = sorted_system[group_starts]
+    
+    # Number incidents chronologically
+    chronological = np.argsort(created, kind='stable')
+    rank = np.empty_like(chronological)
+    rank[chronological] = np.arange(len(chronological))
+    alert_incident = np.empty(num_alerts, dtype=np.int64)
+    alert_incident[order] = rank[group_of_sorted]
+    
+    # Downstream incidents point at the incident holding their cascade's root alert
+    root_alert_pos = np.full(cascades['root'].max() + 1, -1)
+    roots_here = ~cascades['is_cascade']
+    root_alert_pos[cascades['root'][roots_here]] = np.flatnonzero(roots_here)
+    first_alert = np.empty(len(group_starts), dtype=np.int64)
+    first_alert[rank] = order[group_starts]
+    root_incident = alert_incident[root_alert_pos[cascades['root'][first_alert]]]
+    
+    created, last_alert = created[chronological], last_alert[chronological]
+    incident_severity, alert_count = incident_severity[chronological], alert_count[chronological]
+    incident_system = incident_system[chronological]
+    num_incidents = len(created)
+    is_downstream = root_incident != np.arange(num_incidents)
+    
+    print(f"  Clustered {num_alerts:,} actionable alerts into {num_incidents:,} incidents...")
+    
+    # Resolution time around the configured MTTR for the severity
+    mttr_config = incident_config.get('mttr_minutes', {'p1': 30, 'p2': 120, 'p3': 480, 'p4': 1440})
+    mttr = np.array([mttr_config.get(k, 480) for k in ['p1', 'p2', 'p3', 'p4']], dtype=float)[incident_severity]
+    resolution_minutes = (last_alert - created) + rng.lognormal(np.log(mttr) - 0.5, 1.0)
+    
+    calendar_start = dim_date['date'].values[0].astype('datetime64[ns]')
+    horizon = len(dim_date) * MINUTES_PER_DAY
+    resolved = created + resolution_minutes < horizon
+    create_ts = calendar_start + (created * 60e9).astype('timedelta64[ns]')
+    resolved_ts = calendar_start + ((created + resolution_minutes) * 60e9).astype('timedelta64[ns]')
+    
+    incident_ids = format_ids('INC-', np.arange(1, num_incidents + 1), 8)
+    severity_labels = pd.Categorical.from_codes(incident_severity, categories=INCIDENT_SEVERITIES)
+    category_labels = pd.Categorical.from_codes(system_category[incident_system], categories=categories)
+    assignees = it_staff['employee_id'].values[rng.integers(0, len(it_staff), num_incidents)]
     
     df_incidents = pd.DataFrame({
-        'incident_id': [f'INC-{i+1:08d}' for i in range(num_incidents)],
-        'assignee_id': assignee_samples['employee_id'].values,
-        'severity': severities,
-        'category': categories,
-        'create_date': date_samples['date'].values,
-        'resolved_date': [date_samples.iloc[i]['date'] + timedelta(hours=resolution_times[i]) 
-                         if statuses[i] == 'Resolved' else None 
-                         for i in range(num_incidents)],
-        'resolution_time_hours': [resolution_times[i] if statuses[i] == 'Resolved' else None for i in range(num_incidents)],
-        'status': statuses,
-        'description': [f"{severities[i]} - {categories[i]} issue" for i in range(num_incidents)]
+        'incident_id': incident_ids,
+        'assignee_id': assignees,
+        'severity': severity_labels,
+        'category': category_labels,
+        'affected_system': system_names[incident_system],
+        'create_date': create_ts,
+        'resolved_date': np.where(resolved, resolved_ts, np.datetime64('NaT')),
+        'resolution_time_hours': np.where(resolved, np.round(resolution_minutes / 60, 2), np.nan),
+        'status': np.where(resolved, 'Resolved', 'In Progress'),
+        'alert_count': alert_count.astype(np.int32),
+        'root_incident_id': np.where(is_downstream, incident_ids[root_incident], None)
     })
+    df_incidents['description'] = df_incidents['severity'].astype(str) + ' - ' + df_incidents['category'].astype(str) + ' issue'
+    return alert_incident, df_incidents
+
+
+def _generate_alert_chunks(cascades: Dict[str, np.ndarray], alert_config: dict, dim_date: pd.DataFrame,
+                           system_names: np.ndarray, system_category: np.ndarray, categories: list,
+                           seed: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield FactAlerts one calendar month at a time.
+    
+    Most alerts are monitoring noise: Info and Warning alerts arriving at noise_per_day,
+    each re-triggering Poisson(noise_branching_ratio) follow-ups (flapping), concentrated
+    on a few noisy systems. The month's incident-grade cascade alerts are merged in and
+    keep their incident_id. Each month uses its own seeded generator, so chunks are
+    reproducible independently.
+    """
+    noise_per_day = alert_config.get('noise_per_day', 3500)
+    noise_branching = alert_config.get('noise_branching_ratio', 0.60)
+    decay = alert_config.get('decay_minutes', 20)
+    num_systems = len(system_names)
+    
+    system_rng = np.random.default_rng(seed)
+    noise_weights = system_rng.gamma(0.5, 1.0, num_systems)
+    noise_weights /= noise_weights.sum()
+    
+    calendar_start = dim_date['date'].values[0].astype('datetime64[ns]')
+    horizon = len(dim_date) * MINUTES_PER_DAY
+    month_key = dim_date['year'].values * 12 + dim_date['month'].values - 1
+    month_start = np.flatnonzero(np.r_[True, month_key[1:] != month_key[:-1]])
+    month_bounds = np.r_[month_start, len(dim_date)] * MINUTES_PER_DAY
+    cascade_bounds = np.searchsorted(cascades['time'], month_bounds)
     
-    return {'FactIncidents': df_incidents}
+    next_alert_number = 1
+    for m in range(len(month_start)):
+        rng = np.random.default_rng(seed + 1 + m)
+        start, end = month_bounds[m], month_bounds[m + 1]
+        
+        num_roots = rng.poisson(noise_per_day * (end - start) / MINUTES_PER_DAY)
+        noise = sample_hawkes_cascades(np.sort(rng.uniform(start, end, num_roots)), noise_branching, decay, rng)
+        noise_time = noise['time'][noise['time'] < min(end, horizon)]
+        num_noise = len(noise_time)
+        
+        lo, hi = cascade_bounds[m], cascade_bounds[m + 1]
+        time = np.concatenate([noise_time, cascades['time'][lo:hi]])
+        system = np.concatenate([rng.choice(num_systems, num_noise, p=noise_weights), cascades['system'][lo:hi]])
+        severity = np.concatenate([np.where(rng.random(num_noise) < 0.30, 3, 4), cascades['severity'][lo:hi]])
+        incident_id = np.concatenate([np.full(num_noise, None, dtype=object), cascades['incident_id'][lo:hi]])
+        is_actionable = np.r_[np.zeros(num_noise, dtype=bool), np.ones(hi - lo, dtype=bool)]
+        
+        order = np.argsort(time, kind='stable')
+        num_alerts = len(order)
+        
+        yield pd.DataFrame({
+            'alert_id': format_ids('ALR-', np.arange(next_alert_number, next_alert_number + num_alerts), 10),
+            'alert_timestamp': calendar_start + (time[order] * 60e9).astype('timedelta64[ns]'),
+            'affected_system': pd.Categorical.from_codes(system[order], categories=system_names),
+            'category': pd.Categorical.from_codes(system_category[system[order]], categories=categories),
+            'alert_severity': pd.Categorical.from_codes(severity[order], categories=ALERT_SEVERITIES),
+            'source': pd.Categorical.from_codes(rng.integers(0, len(ALERT_SOURCES), num_alerts), categories=ALERT_SOURCES),
+            'is_actionable': is_actionable[order],
+            # Nullable string keeps the Parquet schema stable for months without incidents
+            'incident_id': pd.array(incident_id[order], dtype='string')
+        })
+        next_alert_number += num_alerts
@@ -1,11 +1,43 @@
 """Manufacturing Domain Generator"""
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 from datetime import timedelta
 
+from utils.append import sample_weights
+from utils.identifiers import format_ids
+from utils.machine_telemetry import (
+    DOWNTIME_STATES,
+    MACHINE_STATES,
+    STATE_BREAKDOWN,
+    STATE_CHANGEOVER,
+    STATE_OFF,
+    STATE_RUNNING,
+    sample_machine_states,
+    state_runs
+)
+from utils.panel import ar1_noise
+from utils.temporal import sample_dates
+
+# machine_type -> (share of machines, ideal cycle seconds per part, rated power kW, MTBF hours, MTTR minutes, manufacturers)
+MACHINE_TYPES = {
+    'CNC Mill': (0.25, 90, 25, 120, 90, ['Haas', 'DMG Mori', 'Mazak']),
+    'Injection Molder': (0.20, 30, 60, 200, 60, ['Engel', 'Arburg']),
+    'Assembly Robot': (0.25, 20, 8, 400, 45, ['ABB', 'KUKA', 'Fanuc']),
+    'Stamping Press': (0.15, 6, 75, 150, 120, ['Schuler', 'Aida']),
+    'Packaging Line': (0.15, 4, 15, 80, 30, ['Bosch Rexroth', 'Krones'])
+}
+
 def generate_manufacturing_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Manufacturing domain: FactProduction, FactWorkOrders"""
+    """
+    Generate Manufacturing domain: DimMachine, FactWorkOrders, FactProduction,
+    FactMachineDowntime, FactMachineTelemetry
+    
+    Machine telemetry is simulated per plant and day from its own seed, so OEE can be
+    accounted from the sampled states in one pass and the identical telemetry streamed
+    to disk in another. FactProduction OEE comes from the plant's telemetry over each work
+    order's production window.
+    """
     np.random.seed(seed)
     
     mfg_config = config.get('manufacturing', {})
@@ -31,8 +63,10 @@ def generate_manufacturing_data(config: dict, dimensions: Dict[str, pd.DataFrame
         plant_names = [f'Plant {i+1}' for i in range(plant_count)]
     
     # ===== FactWorkOrders =====
-    product_samples = dim_product.sample(n=num_orders, replace=True, random_state=seed)
-    start_date_samples = dim_date.sample(n=num_orders, replace=True, random_state=seed + 1)
+    product_samples = dim_product.sample(n=num_orders, replace=True, weights=sample_weights(dim_product),
+                                         random_state=seed)
+    start_date_samples = sample_dates(dim_date, num_orders, seed + 1, mfg_config.get('production'),
+                                      config.get('temporal_profile'))
     
     # Work order status
     statuses = np.random.choice(
@@ -90,6 +124,26 @@ def generate_manufacturing_data(config: dict, dimensions: Dict[str, pd.DataFrame
         np.random.randint(-3, 10, num_production), unit='D'
     )
     
+    # ===== DimMachine / machine telemetry =====
+    machine_config = mfg_config.get('machines', {})
+    telemetry_config = mfg_config.get('telemetry', {})
+    rng = np.random.default_rng(seed + 3)
+    df_machines = _build_dim_machine(plant_ids, machine_config.get('machines_per_plant', 12), dim_date,
+                                     mfg_config.get('production', {}).get('scrap_rate', 0.03), rng)
+    performance_mean = _calibrate_performance(df_machines, telemetry_config,
+                                              mfg_config.get('production', {}).get('average_oee', 0.82),
+                                              mfg_config.get('production', {}).get('scrap_rate', 0.03))
+    
+    print(f"  Simulating telemetry for {len(df_machines):,} machines in {len(plant_ids)} plants...")
+    plant_oee, df_downtime = _account_machine_oee(df_machines, plant_ids, dim_date, telemetry_config,
+                                                  performance_mean, seed + 4)
+    
+    # OEE of the plant over each work order's production window (start date to completion)
+    start_day = np.searchsorted(dim_date['date'].values, completed_wo['start_date'].values.astype('datetime64[ns]'))
+    end_day = np.searchsorted(dim_date['date'].values, completion_dates.values.astype('datetime64[ns]'), side='right')
+    plant_pos = pd.Index(plant_ids).get_indexer(completed_wo['facility_id'].values)
+    oee_components = _window_oee(plant_oee, plant_pos, start_day, np.maximum(end_day, start_day + 1))
+    
     df_production = pd.DataFrame({
         'production_id': [f'PROD-{i+1:08d}' for i in range(num_production)],
         'work_order_id': completed_wo['work_order_id'].values,
@@ -100,12 +154,294 @@ def generate_manufacturing_data(config: dict, dimensions: Dict[str, pd.DataFrame
         'actual_quantity': actual_qty,
         'scrap_quantity': scrap_qty,
         'yield_pct': np.round(actual_qty / completed_wo['planned_quantity'].values * 100, 2),
-        'oee_pct': np.round(np.random.uniform(75, 95, num_production), 2),
+        'availability_pct': np.round(oee_components['availability'] * 100, 2),
+        'performance_pct': np.round(oee_components['performance'] * 100, 2),
+        'quality_pct': np.round(oee_components['quality'] * 100, 2),
+        'oee_pct': np.round(oee_components['oee'] * 100, 2),
         'labor_hours': np.round(completed_wo['planned_quantity'].values / 10 * np.random.uniform(0.8, 1.2, num_production), 1),
         'machine_hours': np.round(completed_wo['planned_quantity'].values / 15 * np.random.uniform(0.8, 1.2, num_production), 1)
     })
     
+    num_rows = len(df_machines) * len(dim_date) * 86400 // telemetry_config.get('interval_seconds', 60)
+    print(f"  Streaming {num_rows:,} machine telemetry records partitioned by plant and month...")
+    fact_telemetry = _generate_telemetry_chunks(df_machines, plant_ids, dim_date, telemetry_config,
+                                                performance_mean, seed + 4)
+    
+    # FactMachineTelemetry is a lazy per plant-month chunk stream, written by generate_all
     return {
+        'DimMachine': df_machines,
         'FactWorkOrders': df_work_orders,
-        'FactProduction': df_production
+        'FactProduction': df_production,
+        'FactMachineDowntime': df_downtime,
+        'FactMachineTelemetry': fact_telemetry
     }
+
+
+def _build_dim_machine(plant_ids: np.ndarray, machines_per_plant: int, dim_date: pd.DataFrame, scrap_rate: float,
+                       rng: np.random.Generator) -> pd.DataFrame:
+    """Generate machines per plant with type, make, ideal cycle time, rated power and reliability."""
+    num_machines = len(plant_ids) * machines_per_plant
+    types = list(MACHINE_TYPES)
+    shares = np.array([MACHINE_TYPES[t][0] for t in types])
+    type_codes = rng.choice(len(types), num_machines, p=shares / shares.sum())
+    spec = np.array([MACHINE_TYPES[t][1:5] for t in types], dtype=float)[type_codes]
+    manufacturers = np.array([MACHINE_TYPES[types[c]][5][rng.integers(0, len(MACHINE_TYPES[types[c]][5]))]
+                              for c in type_codes])
+    
+    install_offsets = rng.integers(180, 15 * 365, num_machines)
+    install_dates = dim_date['date'].values[0] - install_offsets.astype('timedelta64[D]')
+    plant_col = np.repeat(np.asarray(plant_ids), machines_per_plant)
+    sequence = np.tile(np.arange(1, machines_per_plant + 1), len(plant_ids))
+    
+    return pd.DataFrame({
+        'machine_id': format_ids('MCH-', np.arange(1, num_machines + 1), 5),
+        'machine_name': [f"{types[c]} {n:02d}" for c, n in zip(type_codes, sequence)],
+        'facility_id': plant_col,
+        'machine_type': np.array(types)[type_codes],
+        'manufacturer': manufacturers,
+        'model': [f"{types[c].replace(' ', '')[:3].upper()}-{n}" for c, n in zip(type_codes, rng.integers(100, 1000, num_machines))],
+        'install_date': install_dates,
+        'ideal_cycle_seconds': np.round(spec[:, 0] * rng.uniform(0.9, 1.1, num_machines), 2),
+        'rated_power_kw': np.round(spec[:, 1] * rng.uniform(0.8, 1.2, num_machines), 1),
+        'mtbf_hours': np.round(spec[:, 2] * rng.uniform(0.6, 1.4, num_machines), 1),
+        'mttr_minutes': np.round(spec[:, 3] * rng.uniform(0.7, 1.3, num_machines), 1),
+        'reject_rate': np.round(scrap_rate * rng.lognormal(-0.045, 0.3, num_machines), 4)
+    })
+
+
+def _shift_schedule(telemetry_config: dict) -> Tuple[list, float]:
+    """Shift start times and end of the last shift (seconds since midnight)."""
+    first_start = telemetry_config.get('shift_start_hour', 6) * 3600
+    shift_seconds = telemetry_config.get('shift_hours', 8) * 3600
+    shifts = telemetry_config.get('shifts_per_day', 2)
+    return [first_start + k * shift_seconds for k in range(shifts)], min(first_start + shifts * shift_seconds, 86400)
+
+
+def _calibrate_performance(df_machines: pd.DataFrame, telemetry_config: dict, average_oee: float,
+                           scrap_rate: float) -> float:
+    """
+    Mean performance rate that brings expected OEE to average_oee.
+    
+    Availability is the run share of the alternating renewal process less changeover time,
+    quality is one minus the scrap rate, and performance makes up the rest.
+    """
+    minor_gap = telemetry_config.get('minor_stop_interval_minutes', 45) * 60
+    minor_mean = telemetry_config.get('minor_stop_minutes', 3) * 60
+    shift_starts, shift_end = _shift_schedule(telemetry_config)
+    mtbf = df_machines['mtbf_hours'].values * 3600
+    stop_rate = 1 / mtbf + 1 / minor_gap
+    mean_stop = (df_machines['mttr_minutes'].values * 60 / mtbf + minor_mean / minor_gap) / stop_rate
+    run_share = (1 / stop_rate) / (1 / stop_rate + mean_stop)
+    changeover_share = telemetry_config.get('changeover_minutes', 25) * 60 * len(shift_starts) / (shift_end - shift_starts[0])
+    availability = float(np.mean(run_share)) * (1 - changeover_share)
+    return float(np.clip(average_oee / (availability * (1 - scrap_rate)), 0.5, 0.98))
+
+
+def _simulate_plant_day(machines: pd.DataFrame, plant_idx: int, day_idx: int, is_weekend: bool,
+                        telemetry_config: dict, performance_mean: float, seed: int,
+                        with_sensors: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Simulate one plant's machines for one day at sensor frequency.
+    
+    Generators are derived from (seed, plant, day), with separate streams for states,
+    output and sensors, so any plant-day can be regenerated on its own and the OEE pass
+    (no sensors) sees exactly the states and counts that the telemetry pass writes.
+    
+    Returns:
+        Dictionary of machines x samples arrays: state, speed, parts, rejects and, with
+        sensors, temperature, vibration and power
+    """
+    state_rng, output_rng, sensor_rng = [np.random.default_rng(s) for s in
+                                         np.random.SeedSequence([seed, plant_idx, day_idx]).spawn(3)]
+    interval = telemetry_config.get('interval_seconds', 60)
+    sample_times = np.arange(0, 86400, interval, dtype=float)
+    num_machines = len(machines)
+    shift_starts, shift_end = _shift_schedule(telemetry_config)
+    
+    scheduled = not is_weekend or state_rng.random() < telemetry_config.get('weekend_operation_rate', 0.25)
+    if scheduled:
+        changeover_mean = telemetry_config.get('changeover_minutes', 25) * 60
+        changeover = state_rng.uniform(0.6, 1.4, (num_machines, len(shift_starts))) * changeover_mean
+        simulated = sample_machine_states(
+            sample_times, shift_starts, shift_end,
+            machines['mtbf_hours'].values * 3600, machines['mttr_minutes'].values * 60,
+            telemetry_config.get('minor_stop_interval_minutes', 45) * 60,
+            telemetry_config.get('minor_stop_minutes', 3) * 60,
+            changeover, state_rng
+        )
+        state, to_breakdown = simulated['state'], simulated['seconds_to_breakdown']
+    else:
+        state = np.full((num_machines, len(sample_times)), STATE_OFF, dtype=np.int8)
+        to_breakdown = np.full(state.shape, np.inf)
+    
+    # Output is drawn for running samples only
+    running = state == STATE_RUNNING
+    machine_of_run = np.nonzero(running)[0]
+    day_performance = np.clip(output_rng.normal(performance_mean, 0.04, num_machines), 0.3, 1.0)
+    speed = np.zeros(state.shape)
+    parts = np.zeros(state.shape, dtype=np.int64)
+    rejects = np.zeros(state.shape, dtype=np.int64)
+    speed[running] = np.clip(day_performance[machine_of_run] * np.exp(output_rng.normal(0, 0.03, len(machine_of_run))),
+                             0.2, 1.05)
+    parts[running] = output_rng.poisson(interval * speed[running] / machines['ideal_cycle_seconds'].values[machine_of_run])
+    rejects[running] = output_rng.binomial(parts[running], machines['reject_rate'].values[machine_of_run])
+    result = {'state': state, 'speed': speed, 'parts': parts, 'rejects': rejects}
+    
+    if with_sensors:
+        # Temperature tracks load, vibration climbs in the half hour before a breakdown
+        rated_power = machines['rated_power_kw'].values[:, np.newaxis]
+        warm = np.where(running, 30 + 25 * speed, np.where(state == STATE_OFF, 22.0, 28.0))
+        result['temperature'] = warm + ar1_noise(num_machines, state.shape[1], 0.95, 1.5, sensor_rng)
+        base_vibration = sensor_rng.uniform(1.0, 3.0, num_machines)[:, np.newaxis]
+        precursor = 1 + 2.5 * np.exp(-np.minimum(to_breakdown, 1e6) / 900)
+        result['vibration'] = np.where(running, base_vibration * precursor * (0.5 + speed), 0.1) \
+                              * np.exp(sensor_rng.normal(0, 0.08, state.shape))
+        load = np.where(running, 0.35 + 0.65 * speed, np.where(state == STATE_OFF, 0.02,
+                                                              np.where(state == STATE_BREAKDOWN, 0.05, 0.2)))
+        result['power'] = rated_power * load * np.exp(sensor_rng.normal(0, 0.03, state.shape))
+    return result
+
+
+def _account_machine_oee(df_machines: pd.DataFrame, plant_ids: np.ndarray, dim_date: pd.DataFrame,
+                         telemetry_config: dict, performance_mean: float,
+                         seed: int) -> Tuple[Dict[str, np.ndarray], pd.DataFrame]:
+    """
+    OEE components per plant and day, and the downtime events, from simulated telemetry.
+    
+    planned = scheduled (non-Off) time, run = Running time, and the ideal time of all and
+    of good parts give availability = run / planned, performance = ideal_all / run and
+    quality = ideal_good / ideal_all.
+    
+    Returns:
+        ({component: plants x days seconds}, FactMachineDowntime)
+    """
+    interval = telemetry_config.get('interval_seconds', 60)
+    num_plants, num_days = len(plant_ids), len(dim_date)
+    components = {name: np.zeros((num_plants, num_days)) for name in ['planned', 'run', 'ideal_all', 'ideal_good']}
+    is_weekend = dim_date['day_of_week'].values >= 6
+    calendar = dim_date['date'].values.astype('datetime64[s]')
+    downtime = []
+    
+    for plant_idx, plant_id in enumerate(plant_ids):
+        machines = df_machines[df_machines['facility_id'] == plant_id]
+        machine_ids = machines['machine_id'].values
+        ideal_cycle = machines['ideal_cycle_seconds'].values[:, np.newaxis]
+        for day in range(num_days):
+            sim = _simulate_plant_day(machines, plant_idx, day, is_weekend[day], telemetry_config,
+                                      performance_mean, seed)
+            state = sim['state']
+            components['planned'][plant_idx, day] = np.count_nonzero(state != STATE_OFF) * interval
+            components['run'][plant_idx, day] = np.count_nonzero(state == STATE_RUNNING) * interval
+            components['ideal_all'][plant_idx, day] = (sim['parts'] * ideal_cycle).sum()
+            components['ideal_good'][plant_idx, day] = ((sim['parts'] - sim['rejects']) * ideal_cycle).sum()
+            
+            runs = state_runs(state, DOWNTIME_STATES)
+            if len(runs['machine']):
+                start = calendar[day] + (runs['start'] * interval).astype('timedelta64[s]')
+                downtime.append(pd.DataFrame({
+                    'machine_id': machine_ids[runs['machine']],
+                    'facility_id': plant_id,
+                    'start_timestamp': start,
+                    'end_timestamp': start + (runs['length'] * interval).astype('timedelta64[s]'),
+                    'duration_minutes': runs['length'] * interval / 60,
+                    'downtime_type': np.array(MACHINE_STATES)[runs['state']],
+                    'is_planned': runs['state'] == STATE_CHANGEOVER
+                }))
+    
+    df_downtime = pd.concat(downtime, ignore_index=True) if downtime else pd.DataFrame(
+        columns=['machine_id', 'facility_id', 'start_timestamp', 'end_timestamp', 'duration_minutes',
+                 'downtime_type', 'is_planned'])
+    df_downtime = df_downtime.sort_values('start_timestamp', kind='stable', ignore_index=True)
+    df_downtime.insert(0, 'downtime_id', format_ids('DT-', np.arange(1, len(df_downtime) + 1), 8))
+    return components, df_downtime
+
+
+def _window_oee(components: Dict[str, np.ndarray], plant_pos: np.ndarray, start_day: np.ndarray,
+                end_day: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Availability, performance, quality and OEE over day windows [start_day, end_day) of a plant.
+    
+    Windows without scheduled time (e.g. entirely on weekends) fall back to the plant's
+    whole-period figures.
+    """
+    num_days = next(iter(components.values())).shape[1]
+    start_day = np.clip(start_day, 0, num_days - 1)
+    end_day = np.clip(end_day, 1, num_days)
+    totals = {}
+    for name, values in components.items():
+        prefix = np.concatenate([np.zeros((len(values), 1)), np.cumsum(values, axis=1)], axis=1)
+        window = prefix[plant_pos, end_day] - prefix[plant_pos, start_day]
+        overall = prefix[plant_pos, -1]
+        totals[name] = (window, overall)
+    empty = totals['run'][0] <= 0
+    planned, run, ideal_all, ideal_good = [np.where(empty, overall, window)
+                                           for window, overall in (totals[n] for n in ['planned', 'run', 'ideal_all', 'ideal_good'])]
+    
+    availability = np.divide(run, planned, out=np.zeros_like(run), where=planned > 0)
+    performance = np.divide(ideal_all, run, out=np.zeros_like(run), where=run > 0)
+    quality = np.divide(ideal_good, ideal_all, out=np.zeros_like(run), where=ideal_all > 0)
+    return {'availability': availability, 'performance': performance, 'quality': quality,
+            'oee': availability * performance * quality}
+
+
+def _generate_telemetry_chunks(df_machines: pd.DataFrame, plant_ids: np.ndarray, dim_date: pd.DataFrame,
+                               telemetry_config: dict, performance_mean: float,
+                               seed: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield FactMachineTelemetry one plant-month at a time, tagged for partitioned output.
+    
+    Each chunk carries attrs['partition'] (facility_id, telemetry_month) so generate_all
+    writes it under facility_id=.../telemetry_month=.../ instead of a single file.
+    """
+    interval = telemetry_config.get('interval_seconds', 60)
+    sample_offsets = np.arange(0, 86400, interval).astype('timedelta64[s]')
+    calendar = dim_date['date'].values.astype('datetime64[ns]')
+    date_ids = dim_date['date_id'].values.astype(np.int32)
+    is_weekend = dim_date['day_of_week'].values >= 6
+    month_key = dim_date['year'].values * 100 + dim_date['month'].values
+    month_starts = np.flatnonzero(np.r_[True, month_key[1:] != month_key[:-1]])
+    month_ends = np.r_[month_starts[1:], len(dim_date)]
+    
+    machine_cat = pd.Categorical(df_machines['machine_id'].values)
+    facility_cat = pd.Categorical(np.asarray(plant_ids))
+    state_cat = pd.Categorical.from_codes(np.arange(len(MACHINE_STATES)), categories=MACHINE_STATES)
+    
+    for plant_idx, plant_id in enumerate(plant_ids):
+        machines = df_machines[df_machines['facility_id'] == plant_id]
+        machine_codes = machine_cat.codes[machines.index.values]
+        num_machines, num_samples = len(machines), len(sample_offsets)
+        
+        for first, last in zip(month_starts, month_ends):
+            days = [_simulate_plant_day(machines, plant_idx, day, is_weekend[day], telemetry_config,
+                                        performance_mean, seed, with_sensors=True)
+                    for day in range(first, last)]
+            
+            # Rows ordered machine first, then time, so each sensor series is contiguous
+            def _stack(name: str) -> np.ndarray:
+                return np.concatenate([d[name] for d in days], axis=1).ravel()
+            
+            num_days = last - first
+            row_day = np.tile(np.repeat(np.arange(first, last), num_samples), num_machines)
+            row_sample = np.tile(np.arange(num_samples), num_machines * num_days)
+            row_machine = np.repeat(machine_codes, num_days * num_samples)
+            num_rows = len(row_day)
+            
+            chunk = pd.DataFrame({
+                'telemetry_timestamp': calendar[row_day] + sample_offsets[row_sample],
+                'telemetry_date_id': date_ids[row_day],
+                'facility_id': pd.Categorical.from_codes(np.full(num_rows, facility_cat.codes[plant_idx]),
+                                                        facility_cat.categories),
+                'machine_id': pd.Categorical.from_codes(row_machine, machine_cat.categories),
+                'machine_state': pd.Categorical.from_codes(_stack('state'), state_cat.categories),
+                'speed_pct': np.round(_stack('speed') * 100, 1),
+                'parts_produced': _stack('parts').astype(np.int32),
+                'parts_rejected': _stack('rejects').astype(np.int32),
+                'temperature_c': np.round(_stack('temperature'), 2),
+                'vibration_mm_s': np.round(_stack('vibration'), 3),
+                'power_kw': np.round(_stack('power'), 2)
+            })
+            chunk.attrs['partition'] = {
+                'facility_id': plant_id,
+                'telemetry_month': f"{dim_date['year'].values[first]}-{dim_date['month'].values[first]:02d}"
+            }
+            yield chunk
@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+from utils.temporal import sample_dates
+
 def generate_marketing_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
     """Generate Marketing domain: FactCampaigns"""
     np.random.seed(seed)
@@ -15,7 +17,7 @@ def generate_marketing_data(config: dict, dimensions: Dict[str, pd.DataFrame], s
     print(f"  Generating {num_campaigns:,} marketing campaigns...")
     
     # Vectorized campaign generation
-    date_samples = dim_date.sample(n=num_campaigns, replace=True, random_state=seed)
+    date_samples = sample_dates(dim_date, num_campaigns, seed, mkt_config.get('campaigns'), config.get('temporal_profile'))
     
     channels = np.random.choice(['Email', 'Social', 'Display', 'Search', 'Events'], 
                                 size=num_campaigns, p=[0.30, 0.25, 0.20, 0.15, 0.10])
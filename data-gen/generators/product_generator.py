@@ -1,7 +1,63 @@
-"""Product Domain Generator - Placeholder"""
+"""Product Domain Generator"""
 import pandas as pd
+import numpy as np
 from typing import Dict
 
+from utils.bom_explosion import build_component_graph, explode_bom
+
 def generate_product_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Product domain: DimProductBOM"""
-    return {'DimProductBOM': pd.DataFrame()}
+    """Generate Product domain: DimProductBOM and its flattened explosion"""
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    
+    bom_config = config.get('product', {}).get('bom', {})
+    mean_components = bom_config.get('components_per_product', 8)
+    critical_pct = bom_config.get('critical_component_percentage', 0.30)
+    max_levels = bom_config.get('max_levels', 3)
+    finished_goods_pct = bom_config.get('finished_goods_percentage', 0.40)
+    
+    dim_product = dimensions['DimProduct']
+    product_ids = dim_product['product_id'].values
+    num_products = len(product_ids)
+    
+    # Tier 0 = finished goods, tier max_levels = purchased parts, sub-assemblies in between
+    lower_tier_pct = (1 - finished_goods_pct) / max_levels
+    tier_probs = [finished_goods_pct] + [lower_tier_pct] * max_levels
+    tier = rng.choice(max_levels + 1, size=num_products, p=tier_probs)
+    
+    print(f"  Generating BOM for {num_products:,} products ({max_levels} levels)...")
+    
+    edges = build_component_graph(tier, mean_components, rng)
+    parent, component = edges['parent'], edges['component']
+    num_edges = len(parent)
+    
+    # Purchased parts are consumed in fractional units (kg, m), assemblies in whole units
+    is_part = tier[component] == max_levels
+    quantity = np.where(is_part, np.round(rng.uniform(0.1, 5.0, num_edges), 4),
+                        rng.integers(1, 5, num_edges)).astype(float)
+    scrap = np.round(rng.uniform(0.0, 0.05, num_edges), 4)
+    is_critical = rng.random(num_edges) < critical_pct
+    
+    df_bom = pd.DataFrame({
+        'parent_product_id': product_ids[parent],
+        'component_product_id': product_ids[component],
+        'bom_level': tier[parent].astype(np.int16),
+        'quantity_required': quantity,
+        'scrap_factor': scrap,
+        'is_critical': is_critical
+    })
+    
+    print(f"  Exploding {num_edges:,} BOM edges...")
+    
+    # Gross quantity covers expected scrap, so rollups reflect what is actually consumed
+    exploded = explode_bom(parent, component, quantity * (1 + scrap), is_critical, num_products)
+    
+    df_explosion = pd.DataFrame({
+        'root_product_id': product_ids[exploded['root']],
+        'component_product_id': product_ids[exploded['component']],
+        'bom_level': exploded['level'],
+        'extended_quantity': np.round(exploded['extended_quantity'], 4),
+        'is_critical_path': exploded['is_critical_path']
+    })
+    
+    return {'DimProductBOM': df_bom, 'DimProductBOMExplosion': df_explosion}
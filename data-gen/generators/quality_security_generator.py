@@ -3,6 +3,9 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+from utils.append import sample_weights
+from utils.temporal import sample_dates
+
 def generate_quality_security_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
     """Generate Quality & Security domain: FactQualityTests, FactSecurityEvents"""
     np.random.seed(seed)
@@ -17,8 +20,10 @@ def generate_quality_security_data(config: dict, dimensions: Dict[str, pd.DataFr
     print(f"  Generating {num_defects} quality defects and {num_events} security events...")
     
     # Quality Defects
-    product_samples = dim_product.sample(n=num_defects, replace=True, random_state=seed)
-    defect_dates = dim_date.sample(n=num_defects, replace=True, random_state=seed + 1)
+    product_samples = dim_product.sample(n=num_defects, replace=True, weights=sample_weights(dim_product),
+                                         random_state=seed)
+    defect_dates = sample_dates(dim_date, num_defects, seed + 1, quality_config.get('defects'),
+                                config.get('temporal_profile'))
     
     defect_config = quality_config.get('defects', {})
     severity_dist = defect_config.get('severity_distribution', {})
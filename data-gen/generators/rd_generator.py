@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+from utils.temporal import sample_dates
+
 def generate_rd_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
     """Generate R&D domain: FactExperiments (using DimProject)"""
     np.random.seed(seed)
@@ -29,7 +31,7 @@ def generate_rd_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: in
         rd_staff = dim_employee.sample(n=min(80, len(dim_employee)), random_state=seed)
     
     researcher_samples = rd_staff.sample(n=num_experiments, replace=True, random_state=seed + 1)
-    date_samples = dim_date.sample(n=num_experiments, replace=True, random_state=seed + 2)
+    date_samples = sample_dates(dim_date, num_experiments, seed + 2, experiments_config, config.get('temporal_profile'))
     
     # Experiment types and outcomes
     exp_types = np.random.choice(
@@ -3,22 +3,33 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+from utils.identifiers import format_ids
+from utils.temporal import sample_dates
+
+FRAMEWORK_NAMES = {'sox': 'SOX', 'gdpr': 'GDPR', 'hipaa': 'HIPAA', 'iso27001': 'ISO 27001', 'pci_dss': 'PCI DSS'}
+
+# Executions per month of a control at each testing frequency; quarterly and annual
+# controls run once in their scheduled months only
+CONTROL_FREQUENCIES = ['Weekly', 'Monthly', 'Quarterly', 'Annual']
+EXECUTIONS_PER_MONTH = np.array([4, 1, 1, 1])
+SCHEDULE_PERIOD_MONTHS = np.array([1, 1, 3, 12])
+
 def generate_risk_compliance_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Risk & Compliance domain: FactRisks, FactAudits, FactComplianceChecks"""
+    """Generate Risk & Compliance domain: DimControl, FactRisks, FactAudits, FactComplianceChecks"""
     np.random.seed(seed)
     
     risk_config = config.get('risk_compliance', {})
     num_risks = risk_config.get('incidents', {}).get('count', 200)
     num_audits = 150  # Roughly half of controls as audits
-    num_checks = risk_config.get('controls', {}).get('count', 150) * 12  # Monthly checks
+    num_controls = risk_config.get('controls', {}).get('count', 150)
     
     dim_date = dimensions['DimDate']
     dim_employee = dimensions['DimEmployee']
     
-    print(f"  Generating {num_risks} risks, {num_audits} audits, {num_checks} compliance checks...")
+    print(f"  Generating {num_risks} risks, {num_audits} audits, {num_controls} controls...")
     
     # FactRisks
-    risk_dates = dim_date.sample(n=num_risks, replace=True, random_state=seed)
+    risk_dates = sample_dates(dim_date, num_risks, seed, risk_config.get('incidents'), config.get('temporal_profile'))
     risk_owners = dim_employee.sample(n=num_risks, replace=True, random_state=seed + 1)
     
     risk_categories = np.random.choice(
@@ -51,37 +62,130 @@ def generate_risk_compliance_data(config: dict, dimensions: Dict[str, pd.DataFra
         p=[0.45, 0.25, 0.20, 0.10]
     )
     
+    # Critical findings are a subset of all findings (about 1 in 10)
+    findings_count = np.random.poisson(5, num_audits)
+    
     df_audits = pd.DataFrame({
         'audit_id': [f'AUDIT-{i+1:06d}' for i in range(num_audits)],
         'audit_date': audit_dates['date'].values,
         'audit_type': audit_types,
         'auditor_id': auditors['employee_id'].values,
-        'findings_count': np.random.poisson(5, num_audits),
-        'critical_findings': np.random.poisson(0.5, num_audits),
+        'findings_count': findings_count,
+        'critical_findings': np.random.binomial(findings_count, 0.1),
         'status': np.random.choice(['Planned', 'In Progress', 'Complete'], num_audits, p=[0.20, 0.30, 0.50])
     })
     
-    # FactComplianceChecks
-    check_dates = dim_date.sample(n=num_checks, replace=True, random_state=seed + 4)
-    
-    frameworks = np.random.choice(
-        ['SOX', 'GDPR', 'HIPAA', 'ISO 27001', 'PCI DSS'],
-        num_checks,
-        p=[0.25, 0.25, 0.15, 0.20, 0.15]
-    )
-    
-    df_checks = pd.DataFrame({
-        'check_id': [f'CHK-{i+1:08d}' for i in range(num_checks)],
-        'check_date': check_dates['date'].values,
-        'framework': frameworks,
-        'control_id': [f'CTRL-{np.random.randint(1, 501):04d}' for _ in range(num_checks)],
-        'result': np.random.choice(['Pass', 'Fail'], num_checks, p=[0.92, 0.08]),
-        'automated': np.random.random(num_checks) < 0.70
-    })
+    # DimControl and FactComplianceChecks
+    df_controls = _build_dim_control(risk_config, dim_employee, num_controls, seed + 4)
+    df_checks = _build_control_executions(risk_config, df_controls, dim_date, seed + 5)
     
     return {
+        'DimControl': df_controls,
         'FactRisks': df_risks,
         'FactAudits': df_audits,
         'FactComplianceChecks': df_checks
     }
 
+
+
+def _build_dim_control(risk_config: dict, dim_employee: pd.DataFrame, num_controls: int, seed: int) -> pd.DataFrame:
+    """Generate the control library with framework, testing frequency and baseline pass rate."""
+    rng = np.random.default_rng(seed)
+    controls_config = risk_config.get('controls', {})
+    
+    framework_dist = controls_config.get('framework_distribution', {'sox': 0.30, 'gdpr': 0.25, 'iso27001': 0.30, 'pci_dss': 0.15})
+    frameworks = [FRAMEWORK_NAMES.get(k, k.upper()) for k in framework_dist]
+    framework_codes = rng.choice(len(frameworks), num_controls, p=np.array(list(framework_dist.values())) / sum(framework_dist.values()))
+    
+    frequency_dist = controls_config.get('frequency_distribution', {'weekly': 0.15, 'monthly': 0.45, 'quarterly': 0.30, 'annual': 0.10})
+    frequency_codes = np.array([CONTROL_FREQUENCIES.index(k.title()) for k in frequency_dist])[
+        rng.choice(len(frequency_dist), num_controls, p=np.array(list(frequency_dist.values())) / sum(frequency_dist.values()))
+    ]
+    
+    is_automated = rng.random(num_controls) < controls_config.get('automated_percentage', 0.70)
+    
+    # Control quality as a logit around the configured pass rate; automated controls fail less
+    pass_rate = risk_config.get('control_executions', {}).get('pass_rate', 0.70)
+    baseline_logit = np.log(pass_rate / (1 - pass_rate)) + rng.normal(0, 0.8, num_controls) + 0.5 * is_automated
+    
+    owner_idx = rng.integers(0, len(dim_employee), num_controls)
+    
+    return pd.DataFrame({
+        'control_id': format_ids('CTRL-', np.arange(1, num_controls + 1), max(4, len(str(num_controls)))),
+        'framework': pd.Categorical.from_codes(framework_codes, categories=frameworks),
+        'control_type': rng.choice(['Preventive', 'Detective', 'Corrective'], num_controls, p=[0.50, 0.40, 0.10]),
+        'frequency': pd.Categorical.from_codes(frequency_codes, categories=CONTROL_FREQUENCIES),
+        'is_automated': is_automated,
+        'is_key_control': rng.random(num_controls) < 0.35,
+        'owner_id': dim_employee['employee_id'].values[owner_idx],
+        # First-month schedule offset for quarterly and annual controls
+        'schedule_offset_month': (rng.integers(0, 12, num_controls) % SCHEDULE_PERIOD_MONTHS[frequency_codes]).astype(np.int8),
+        'baseline_pass_rate': np.round(1 / (1 + np.exp(-baseline_logit)), 4)
+    })
+
+
+def _build_control_executions(risk_config: dict, df_controls: pd.DataFrame, dim_date: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """
+    Expand controls x months x frequency into individual control executions.
+    
+    The controls x months grid holds the number of executions due in each month (zero
+    outside a quarterly or annual control's scheduled months). np.repeat expands the grid
+    into executions, which are spread evenly across their month. Each control's pass
+    probability follows its baseline logit plus a random walk over months (cumsum of
+    normal steps), so pass rates drift per control instead of being fixed.
+    
+    Args:
+        risk_config: risk_compliance section of config.yml
+        df_controls: DimControl
+        dim_date: Date dimension
+        seed: Random seed
+    
+    Returns:
+        FactComplianceChecks DataFrame, one row per control execution
+    """
+    rng = np.random.default_rng(seed)
+    exec_config = risk_config.get('control_executions', {})
+    per_control_per_month = exec_config.get('per_control_per_month', 1)
+    drift = exec_config.get('pass_rate_drift', 0.10)
+    
+    # Month boundaries as DimDate positions
+    month_key = dim_date['year'].values * 12 + dim_date['month'].values - 1
+    month_start = np.flatnonzero(np.r_[True, month_key[1:] != month_key[:-1]])
+    month_days = np.diff(np.r_[month_start, len(dim_date)])
+    month_of_year = dim_date['month'].values[month_start] - 1
+    num_controls, num_months = len(df_controls), len(month_start)
+    
+    frequency_codes = df_controls['frequency'].cat.codes.values
+    period = SCHEDULE_PERIOD_MONTHS[frequency_codes]
+    is_due = (month_of_year[np.newaxis, :] % period[:, np.newaxis]) == df_controls['schedule_offset_month'].values[:, np.newaxis]
+    per_month = np.rint(EXECUTIONS_PER_MONTH[frequency_codes] * per_control_per_month).astype(np.int64)
+    executions = np.where(is_due, per_month[:, np.newaxis], 0).ravel()
+    
+    print(f"  Generating {executions.sum():,} control executions ({num_controls:,} controls x {num_months} months)...")
+    
+    # Drifting pass probability per control and month
+    baseline = df_controls['baseline_pass_rate'].values
+    logit = np.log(baseline / (1 - baseline))[:, np.newaxis] + np.cumsum(rng.normal(0, drift, (num_controls, num_months)), axis=1)
+    pass_probability = (1 / (1 + np.exp(-logit))).ravel()
+    
+    cell = np.repeat(np.arange(num_controls * num_months), executions)
+    control_idx, month_idx = np.divmod(cell, num_months)
+    # Execution rank within its month, spread evenly over the month's days
+    rank = np.arange(len(cell)) - np.repeat(np.cumsum(executions) - executions, executions)
+    slot = (rank + rng.random(len(cell))) / executions[cell]
+    day_pos = month_start[month_idx] + (slot * month_days[month_idx]).astype(np.int64)
+    
+    passed = rng.random(len(cell)) < pass_probability[cell]
+    
+    # Chronological check ids
+    order = np.argsort(day_pos, kind='stable')
+    control_idx, day_pos, passed = control_idx[order], day_pos[order], passed[order]
+    
+    return pd.DataFrame({
+        'check_id': format_ids('CHK-', np.arange(1, len(cell) + 1), 8),
+        'check_date': dim_date['date'].values[day_pos],
+        'framework': df_controls['framework'].values[control_idx],
+        'control_id': df_controls['control_id'].values[control_idx],
+        'result': pd.Categorical.from_codes(np.where(passed, 0, 1), categories=['Pass', 'Fail']),
+        'automated': df_controls['is_automated'].values[control_idx]
+    })
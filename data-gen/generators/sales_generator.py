@@ -9,6 +9,14 @@ from datetime import datetime, timedelta
 import random
 from typing import Dict
 
+from utils.append import sample_weights
+from utils.identifiers import format_ids
+from utils.temporal import sample_dates
+
+# Days from order to shipment and from shipment to delivery, by sales channel (min, max)
+SHIP_LEAD_DAYS = {'online': (0, 2), 'retail': (0, 0), 'partner': (2, 7), 'direct_sales': (3, 10)}
+TRANSIT_DAYS = {'online': (1, 5), 'retail': (0, 0), 'partner': (2, 8), 'direct_sales': (3, 12)}
+
 
 def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
     """
@@ -51,15 +59,61 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
     
     print(f"  Total order lines: {total_lines:,}")
     
-    # Vectorized sampling
-    customer_samples = active_customers.sample(n=total_lines, replace=True, random_state=seed)
-    product_samples = active_products.sample(n=total_lines, replace=True, random_state=seed + 1)
-    sales_rep_samples = sales_reps.sample(n=total_lines, replace=True, random_state=seed + 2)
-    date_samples = dim_date.sample(n=total_lines, replace=True, random_state=seed + 3)
+    # Header attributes: one draw per order, broadcast to its lines with np.repeat
+    customer_samples = active_customers.sample(n=num_orders, replace=True, weights=sample_weights(active_customers),
+                                               random_state=seed)
+    sales_rep_samples = sales_reps.sample(n=num_orders, replace=True, random_state=seed + 2)
+    date_samples = sample_dates(dim_date, num_orders, seed + 3, sales_config['orders'], config.get('temporal_profile'))
+    
+    channel_dist = sales_config['orders']['channel_distribution']
+    order_channels = np.random.choice(
+        list(channel_dist.keys()),
+        size=num_orders,
+        p=list(channel_dist.values())
+    )
+    
+    status_dist = sales_config['orders']['status_distribution']
+    order_statuses = np.random.choice(
+        list(status_dist.keys()),
+        size=num_orders,
+        p=list(status_dist.values())
+    )
+    
+    # Ship and delivery lead times (days) by channel
+    order_dates = pd.DatetimeIndex(date_samples['date'].values)
+    ship_lead_range = np.array([SHIP_LEAD_DAYS.get(c, (1, 5)) for c in channel_dist.keys()])
+    transit_range = np.array([TRANSIT_DAYS.get(c, (1, 7)) for c in channel_dist.keys()])
+    channel_idx = pd.Index(list(channel_dist.keys())).get_indexer(order_channels)
+    ship_leads = np.random.randint(ship_lead_range[channel_idx, 0], ship_lead_range[channel_idx, 1] + 1)
+    transit_days = np.random.randint(transit_range[channel_idx, 0], transit_range[channel_idx, 1] + 1)
+    ship_dates = order_dates + pd.to_timedelta(ship_leads, unit='D')
+    delivery_dates = ship_dates + pd.to_timedelta(transit_days, unit='D')
+    
+    # Orders cannot ship or deliver after the end of the calendar: downgrade their status
+    last_date = dim_date['date'].max()
+    shipped_statuses = ['shipped', 'delivered', 'returned']
+    delivered_statuses = ['delivered', 'returned']
+    order_statuses = np.where(np.isin(order_statuses, shipped_statuses) & (ship_dates > last_date),
+                              'pending', order_statuses)
+    order_statuses = np.where(np.isin(order_statuses, delivered_statuses) & (delivery_dates > last_date),
+                              'shipped', order_statuses)
+    has_shipped = np.isin(order_statuses, shipped_statuses)
+    has_delivered = np.isin(order_statuses, delivered_statuses)
+    
+    ship_date_ids = pd.array(np.where(has_shipped, _to_date_id(ship_dates), 0), dtype='Int64')
+    ship_date_ids[~has_shipped] = pd.NA
+    delivery_date_ids = pd.array(np.where(has_delivered, _to_date_id(delivery_dates), 0), dtype='Int64')
+    delivery_date_ids[~has_delivered] = pd.NA
+    
+    # Line-level attributes
+    order_of_line = np.repeat(np.arange(num_orders), lines_per_order)
+    product_samples = active_products.sample(n=total_lines, replace=True, weights=sample_weights(active_products),
+                                             random_state=seed + 1)
     
     # Generate order IDs
-    order_ids = np.repeat([f"ORD_{i:08d}" for i in range(num_orders)], lines_per_order)
-    line_numbers = np.concatenate([np.arange(1, n + 1) for n in lines_per_order])
+    order_id_values = format_ids('ORD_', np.arange(num_orders), 8)
+    order_ids = order_id_values[order_of_line]
+    line_numbers = np.arange(total_lines) - np.repeat(np.cumsum(lines_per_order) - lines_per_order, lines_per_order) + 1
     
     # Quantities
     quantities = np.random.randint(1, 21, total_lines)
@@ -80,35 +134,16 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
     tax_amounts = net_amounts * 0.08
     total_amounts = net_amounts + tax_amounts
     
-    # Channels and Status
-    channel_dist = sales_config['orders']['channel_distribution']
-    channels = np.random.choice(
-        list(channel_dist.keys()),
-        size=total_lines,
-        p=list(channel_dist.values())
-    )
-    
-    status_dist = sales_config['orders']['status_distribution']
-    statuses = np.random.choice(
-        list(status_dist.keys()),
-        size=total_lines,
-        p=list(status_dist.values())
-    )
-    
-    # Date IDs
-    order_dates = date_samples['date'].values
-    order_date_ids = date_samples['date_id'].values
-    
     # Create DataFrame
     fact_sales = pd.DataFrame({
         'order_id': order_ids,
-        'order_line_id': [f"{order_ids[i]}_L{line_numbers[i]:02d}" for i in range(total_lines)],
-        'customer_id': customer_samples['customer_id'].values,
+        'order_line_id': np.char.add(order_ids, format_ids('_L', line_numbers, 2)),
+        'customer_id': customer_samples['customer_id'].values[order_of_line],
         'product_id': product_samples['product_id'].values,
-        'employee_id': sales_rep_samples['employee_id'].values,
-        'order_date_id': order_date_ids,
-        'ship_date_id': order_date_ids,  # Simplified
-        'delivery_date_id': order_date_ids,  # Simplified
+        'employee_id': sales_rep_samples['employee_id'].values[order_of_line],
+        'order_date_id': date_samples['date_id'].values[order_of_line],
+        'ship_date_id': ship_date_ids[order_of_line],
+        'delivery_date_id': delivery_date_ids[order_of_line],
         'quantity': quantities,
         'unit_price': np.round(list_prices, 2),
         'discount_percent': discount_pcts,
@@ -118,8 +153,8 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
         'gross_margin': np.round(gross_margins, 2),
         'tax_amount': np.round(tax_amounts, 2),
         'total_amount': np.round(total_amounts, 2),
-        'status': statuses,
-        'channel': channels
+        'status': order_statuses[order_of_line],
+        'channel': order_channels[order_of_line]
     })
     
     # Generate returns (vectorized)
@@ -128,9 +163,8 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
     
     print(f"  Generating {num_returns:,} returns...")
     
-    eligible_sales = fact_sales[fact_sales['status'] == 'delivered'].copy()
-    if len(eligible_sales) == 0:
-        eligible_sales = fact_sales.copy()
+    # Only delivered lines can come back; a short append window may have none, and no returns
+    eligible_sales = fact_sales[(fact_sales['status'] == 'delivered') & fact_sales['delivery_date_id'].notna()]
     
     return_samples = eligible_sales.sample(n=min(num_returns, len(eligible_sales)), random_state=seed + 4)
     
@@ -146,12 +180,17 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
     restocking_fees = refund_amounts * np.random.choice([0, 0, 0.05, 0.10, 0.15], len(return_samples))
     conditions = np.random.choice(['New', 'Used', 'Damaged'], size=len(return_samples), p=[0.5, 0.3, 0.2])
     
+    # Returns arrive 1-30 days after delivery, capped at the end of the calendar
+    date_ids = dim_date['date_id'].values
+    delivery_pos = np.searchsorted(date_ids, return_samples['delivery_date_id'].to_numpy(dtype=np.int64))
+    return_date_ids = date_ids[np.minimum(delivery_pos + np.random.randint(1, 31, len(return_samples)), len(date_ids) - 1)]
+    
     fact_returns = pd.DataFrame({
-        'return_id': [f"RET_{i:08d}" for i in range(len(return_samples))],
+        'return_id': format_ids('RET_', np.arange(len(return_samples)), 8),
         'order_id': return_samples['order_id'].values,
         'customer_id': return_samples['customer_id'].values,
         'product_id': return_samples['product_id'].values,
-        'return_date_id': return_samples['order_date_id'].values,  # Simplified
+        'return_date_id': return_date_ids,
         'return_reason': return_reasons,
         'return_quantity': return_quantities,
         'refund_amount': np.round(refund_amounts, 2),
@@ -163,3 +202,8 @@ def generate_sales_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed:
         'FactSales': fact_sales,
         'FactReturns': fact_returns
     }
+
+
+def _to_date_id(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Convert dates to DimDate integer keys (YYYYMMDD)."""
+    return (dates.year * 10000 + dates.month * 100 + dates.day).values
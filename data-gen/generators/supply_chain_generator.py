@@ -1,29 +1,74 @@
 """Supply Chain Domain Generator"""
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Iterator
 from datetime import timedelta
 
+from utils.append import sample_weights
+from utils.inventory_ledger import (
+    aggregate_daily_flows,
+    reorder_point_for_stockout_rate,
+    route_to_stocking_location,
+    simulate_inventory_ledger
+)
+from utils.panel import cross_join, panel_series
+from utils.temporal import sample_dates, select_snapshot_positions
+
+# Sales statuses that have physically left the warehouse
+SHIPPED_SALES_STATUSES = ['shipped', 'delivered', 'returned']
+
+
 def generate_supply_chain_data(config: dict, dimensions: Dict[str, pd.DataFrame], seed: int) -> Dict[str, pd.DataFrame]:
-    """Generate Supply Chain domain: FactInventory, FactPurchaseOrders"""
+    """
+    Generate Supply Chain domain: FactInventory, FactPurchaseOrders
+    
+    FactInventory is derived from a daily inventory ledger: received purchase order lines
+    are receipts, shipped FactSales lines (when the sales domain ran first) are issues,
+    and reorder-point replenishment covers the remaining demand.
+    """
     np.random.seed(seed)
     
     sc_config = config.get('supply_chain', {})
+    inv_config = sc_config.get('inventory', {})
     num_pos = sc_config.get('purchase_orders', {}).get('count', 10000)
     lines_per_po = sc_config.get('purchase_orders', {}).get('lines_per_po', 3)
     
     dim_product = dimensions['DimProduct']
     dim_date = dimensions['DimDate']
     dim_facility = dimensions.get('DimFacility', None)
+    fact_sales = dimensions.get('FactSales', None)
+    
+    # Use facilities as warehouses (or generate default warehouses if DimFacility doesn't exist)
+    if dim_facility is not None:
+        warehouses = dim_facility[dim_facility['facility_type'] == 'Warehouse'].copy()
+        if len(warehouses) == 0:
+            warehouses = dim_facility.sample(n=min(5, len(dim_facility)), random_state=seed)
+        warehouse_ids = warehouses['facility_id'].values
+        warehouse_names = warehouses['facility_name'].values
+    else:
+        warehouse_count = inv_config.get('warehouse_count', 10)
+        warehouse_ids = np.array([f"WH_{i:03d}" for i in range(warehouse_count)])
+        warehouse_names = np.array([f"Warehouse {i+1}" for i in range(warehouse_count)])
+    
+    # Product assortment per warehouse (sorted product positions)
+    products_per_warehouse = max(1, int(len(dim_product) * inv_config.get('products_per_warehouse', 0.60)))
+    assortments = np.stack([
+        np.sort(np.random.default_rng(seed + 10 + wh_idx).choice(len(dim_product), size=products_per_warehouse,
+                                                                 replace=False))
+        for wh_idx in range(len(warehouse_ids))
+    ])
+    stocked = np.zeros((len(warehouse_ids), len(dim_product)), dtype=bool)
+    stocked[np.arange(len(warehouse_ids))[:, np.newaxis], assortments] = True
     
     print(f"  Generating {num_pos:,} purchase orders...")
     
     # ===== FactPurchaseOrders =====
-    date_samples = dim_date.sample(n=num_pos, replace=True, random_state=seed)
+    date_samples = sample_dates(dim_date, num_pos, seed, sc_config.get('purchase_orders'), config.get('temporal_profile'))
     
     # Generate PO lines
     total_lines = num_pos * lines_per_po
-    product_samples = dim_product.sample(n=total_lines, replace=True, random_state=seed + 1)
+    product_samples = dim_product.sample(n=total_lines, replace=True, weights=sample_weights(dim_product),
+                                         random_state=seed + 1)
     po_ids = np.repeat([f'PO-{i+1:08d}' for i in range(num_pos)], lines_per_po)
     po_dates = np.repeat(date_samples['date'].values, lines_per_po)
     
@@ -44,14 +89,22 @@ def generate_supply_chain_data(config: dict, dimensions: Dict[str, pd.DataFrame]
     # Supplier IDs
     supplier_ids = [f"SUP_{np.random.randint(1, 101):03d}" for _ in range(total_lines)]
     
+    # Ship-to warehouse: one that stocks the product, or any warehouse for unstocked products
+    product_index = pd.Index(dim_product['product_id'])
+    po_product_idx = product_index.get_indexer(product_samples['product_id'])
+    po_warehouse_idx = route_to_stocking_location(po_product_idx, stocked, np.random.default_rng(seed + 2))
+    po_warehouse_idx = np.where(po_warehouse_idx >= 0, po_warehouse_idx,
+                                np.random.randint(0, len(warehouse_ids), total_lines))
+    
     df_po_lines = pd.DataFrame({
         'po_id': po_ids,
         'po_line_id': np.tile(np.arange(1, lines_per_po + 1), num_pos),
         'supplier_id': supplier_ids,
         'product_id': product_samples['product_id'].values,
+        'warehouse_id': warehouse_ids[po_warehouse_idx],
         'order_date': po_dates,
         'expected_delivery_date': expected_delivery,
-        'actual_delivery_date': [actual_delivery[i] if statuses[i] == 'Received' else None 
+        'actual_delivery_date': [actual_delivery[i] if statuses[i] == 'Received' else None
                                 for i in range(total_lines)],
         'quantity': quantities,
         'unit_price': np.round(unit_costs, 2),
@@ -64,85 +117,131 @@ def generate_supply_chain_data(config: dict, dimensions: Dict[str, pd.DataFrame]
     })
     
     # ===== FactInventory =====
-    print(f"  Generating inventory snapshots...")
-    
-    # Get weekly snapshot dates (use every 7th day for performance)
-    snapshot_dates = dim_date[dim_date['day_of_month'].isin([1, 8, 15, 22])].copy()
-    num_snapshots = len(snapshot_dates)
+    # Receipts: received PO lines on their actual delivery day
+    date_start = dim_date['date'].values[0]
+    received = statuses == 'Received'
+    receipt_events = (
+        po_warehouse_idx[received],
+        po_product_idx[received],
+        ((actual_delivery[received].values - date_start) // np.timedelta64(1, 'D')).astype(np.int64),
+        quantities[received]
+    )
     
-    # Use facilities as warehouses (or generate default warehouses if DimFacility doesn't exist)
-    if dim_facility is not None:
-        warehouses = dim_facility[dim_facility['facility_type'] == 'Warehouse'].copy()
-        if len(warehouses) == 0:
-            warehouses = dim_facility.sample(n=min(5, len(dim_facility)), random_state=seed)
-        warehouse_ids = warehouses['facility_id'].values
-        warehouse_names = warehouses['facility_name'].values
+    # Issues: shipped sales lines on their ship day, routed to a stocking warehouse
+    if fact_sales is not None:
+        shipped_sales = fact_sales[fact_sales['status'].isin(SHIPPED_SALES_STATUSES)]
+        sales_product_idx = product_index.get_indexer(shipped_sales['product_id'])
+        sales_warehouse_idx = route_to_stocking_location(sales_product_idx, stocked, np.random.default_rng(seed + 3))
+        issue_events = (
+            sales_warehouse_idx,
+            sales_product_idx,
+            np.searchsorted(dim_date['date_id'].values, shipped_sales['ship_date_id'].to_numpy(dtype=np.int64)),
+            shipped_sales['quantity'].values
+        )
+        print(f"  Using {len(shipped_sales):,} shipped sales lines as inventory issues")
     else:
-        warehouse_count = sc_config.get('inventory', {}).get('warehouse_count', 10)
-        warehouse_ids = [f"WH_{i:03d}" for i in range(warehouse_count)]
-        warehouse_names = [f"Warehouse {i+1}" for i in range(warehouse_count)]
-    
-    num_warehouses = len(warehouse_ids)
-    
-    # Optimize: Sample products once (30% of products in each warehouse for performance)
-    products_per_warehouse = int(len(dim_product) * 0.30)  # Reduced from 0.60
+        issue_events = tuple(np.empty(0, dtype=np.int64) for _ in range(4))
+        print("  FactSales not available; inventory issues use background demand only")
     
-    # Vectorized generation - sample products once per warehouse
-    np.random.seed(seed + 10)
+    snapshot_positions = select_snapshot_positions(dim_date, inv_config.get('snapshot_frequency', 'daily'))
+    total_inventory_records = len(snapshot_positions) * len(warehouse_ids) * products_per_warehouse
+    print(f"  Streaming {total_inventory_records:,} inventory records "
+          f"({len(snapshot_positions):,} snapshots x {len(warehouse_ids)} warehouses x {products_per_warehouse:,} products)...")
     
-    # Pre-calculate total records
-    total_inventory_records = num_snapshots * num_warehouses * products_per_warehouse
-    print(f"  Generating {total_inventory_records:,} inventory records (vectorized)...")
-    
-    # Generate all combinations using numpy arrays (much faster)
-    snapshot_dates_array = snapshot_dates['date'].values
-    
-    # Create arrays for each dimension
-    all_snapshot_dates = []
-    all_warehouse_ids = []
-    all_warehouse_names = []
-    all_product_ids = []
-    all_unit_costs = []
+    fact_inventory = _generate_inventory_chunks(
+        dim_date, snapshot_positions, warehouse_ids, warehouse_names, dim_product, assortments,
+        receipt_events, issue_events, inv_config, seed + 10
+    )
     
-    for wh_idx in range(num_warehouses):
-        # Sample products for this warehouse once
-        warehouse_products = dim_product.sample(n=products_per_warehouse, replace=False, 
-                                               random_state=seed + wh_idx + 100)
+    # FactInventory is a lazy per-warehouse chunk stream, written by generate_all
+    return {'FactPurchaseOrders': df_po_lines, 'FactInventory': fact_inventory}
+
+
+def _generate_inventory_chunks(dim_date: pd.DataFrame, snapshot_positions: np.ndarray, warehouse_ids: np.ndarray,
+                               warehouse_names: np.ndarray, dim_product: pd.DataFrame, assortments: np.ndarray,
+                               receipt_events: tuple, issue_events: tuple, inv_config: dict,
+                               seed: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield one FactInventory chunk per warehouse from the daily inventory ledger.
+    
+    Each chunk holds the warehouse's assortment x snapshot rows; received and issued
+    quantities cover the days since the previous snapshot.
+    """
+    num_days = len(dim_date)
+    lead_time = inv_config.get('replenishment_lead_time_days', 7)
+    stockout_rate = inv_config.get('stockout_rate', 0.03)
+    cover_days = inv_config.get('order_cover_days', 30)
+    demand_seasonality = inv_config.get('demand_seasonality', 0.15)
+    demand_autocorrelation = inv_config.get('demand_autocorrelation', 0.80)
+    demand_volatility = inv_config.get('demand_volatility', 0.20)
+    
+    date_values = dim_date['date'].values
+    # Background demand peaks in mid-November ahead of the Q4 rush, relative to the first calendar day
+    peak_day = (pd.Timestamp(date_values[0]).replace(month=11, day=15) - pd.Timestamp(date_values[0])).days
+    product_ids = pd.Categorical(dim_product['product_id'].values)
+    unit_cost_values = dim_product['unit_cost'].values
+    warehouse_id_categories = pd.Categorical(warehouse_ids)
+    warehouse_name_categories = pd.Categorical(warehouse_names)
+    
+    for wh_idx in range(len(warehouse_ids)):
+        # Per-warehouse generator keeps every chunk reproducible on its own
+        rng = np.random.default_rng(seed + wh_idx)
+        assortment = assortments[wh_idx].astype(np.int32)
+        num_skus = len(assortment)
         
-        # Repeat for all snapshot dates
-        all_snapshot_dates.extend(np.repeat(snapshot_dates_array, products_per_warehouse))
-        all_warehouse_ids.extend([warehouse_ids[wh_idx]] * (num_snapshots * products_per_warehouse))
-        all_warehouse_names.extend([warehouse_names[wh_idx]] * (num_snapshots * products_per_warehouse))
-        all_product_ids.extend(np.tile(warehouse_products['product_id'].values, num_snapshots))
-        all_unit_costs.extend(np.tile(warehouse_products['unit_cost'].values, num_snapshots))
-    
-    # Convert to numpy arrays for vectorized operations
-    all_unit_costs = np.array(all_unit_costs)
-    
-    # Generate inventory levels (vectorized)
-    reorder_points = np.random.randint(50, 500, total_inventory_records)
-    max_levels = reorder_points * 3
-    on_hand = np.random.randint(0, 1000, total_inventory_records)  # Simplified for speed
-    
-    # On order logic (vectorized)
-    below_reorder = on_hand < reorder_points
-    on_order = np.where(below_reorder, np.random.randint(0, 500, total_inventory_records), 0)
-    
-    # Create DataFrame in one shot (much faster than appending)
-    df_inventory = pd.DataFrame({
-        'snapshot_date': all_snapshot_dates,
-        'warehouse_id': all_warehouse_ids,
-        'warehouse_name': all_warehouse_names,
-        'product_id': all_product_ids,
-        'quantity_on_hand': on_hand,
-        'quantity_on_order': on_order,
-        'quantity_available': on_hand,
-        'reorder_point': reorder_points,
-        'unit_cost': np.round(all_unit_costs, 2),
-        'inventory_value': np.round(on_hand * all_unit_costs, 2),
-        'is_stockout': on_hand == 0
-    })
-    
-    print(f"  Generated {len(df_inventory):,} inventory snapshot records")
-    
-    return {'FactPurchaseOrders': df_po_lines, 'FactInventory': df_inventory}
+        # Map product positions to SKU rows of this warehouse (-1 when not stocked here)
+        sku_lookup = np.full(len(dim_product), -1, dtype=np.int64)
+        sku_lookup[assortment] = np.arange(num_skus)
+        
+        flows = []
+        for event_wh, event_product, event_day, event_qty in (receipt_events, issue_events):
+            here = event_wh == wh_idx
+            sku, day, qty = sku_lookup[event_product[here]], event_day[here], event_qty[here]
+            keep = (sku >= 0) & (day >= 0) & (day < num_days)
+            flows.append(aggregate_daily_flows(sku[keep], day[keep], qty[keep], num_skus, num_days))
+        receipts, sales_issues = flows
+        
+        # Background demand (B2B, transfers, consumption) slightly outpaces scheduled receipts,
+        # so replenishment and occasional stockouts emerge from the ledger itself
+        receipt_rate = receipts.sum(axis=1) / num_days
+        demand_rate = receipt_rate * rng.uniform(1.05, 1.25, num_skus) + rng.gamma(2.0, 0.5, num_skus)
+        # Background demand drifts seasonally with autocorrelated day-to-day swings
+        demand_curve = panel_series(demand_rate, num_days, rng, periods_per_year=365.25,
+                                    seasonal_amplitude=demand_seasonality, peak_period=peak_day,
+                                    autocorrelation=demand_autocorrelation, volatility=demand_volatility)
+        issues = sales_issues + rng.poisson(demand_curve)
+        
+        reorder_points = reorder_point_for_stockout_rate(demand_rate, lead_time, cover_days, stockout_rate)
+        order_quantities = np.maximum(np.ceil(demand_rate * cover_days).astype(np.int64), 1)
+        opening = reorder_points + order_quantities // 2
+        
+        ledger = simulate_inventory_ledger(opening, receipts, issues, reorder_points, order_quantities, lead_time)
+        
+        # Flows between snapshots come from cumulative totals at the snapshot days
+        received = np.diff(np.cumsum(ledger['received'], axis=1)[:, snapshot_positions], axis=1, prepend=0)
+        issued = np.diff(np.cumsum(ledger['issued'], axis=1)[:, snapshot_positions], axis=1, prepend=0)
+        position = ledger['on_hand'][:, snapshot_positions].ravel()
+        on_hand = np.maximum(position, 0)
+        
+        snapshot_col, product_col = cross_join(assortment, snapshot_positions.astype(np.int32))
+        num_rows = len(snapshot_col)
+        unit_costs = unit_cost_values[product_col]
+        
+        yield pd.DataFrame({
+            'snapshot_date': date_values[snapshot_col],
+            'warehouse_id': pd.Categorical.from_codes(
+                np.full(num_rows, warehouse_id_categories.codes[wh_idx]), warehouse_id_categories.categories),
+            'warehouse_name': pd.Categorical.from_codes(
+                np.full(num_rows, warehouse_name_categories.codes[wh_idx]), warehouse_name_categories.categories),
+            'product_id': pd.Categorical.from_codes(product_ids.codes[product_col], product_ids.categories),
+            'quantity_on_hand': on_hand,
+            'quantity_on_order': ledger['on_order'][:, snapshot_positions].ravel(),
+            'quantity_available': on_hand,
+            'quantity_backordered': np.maximum(-position, 0),
+            'quantity_received': received.ravel(),
+            'quantity_issued': issued.ravel(),
+            'reorder_point': np.repeat(reorder_points, len(snapshot_positions)),
+            'unit_cost': np.round(unit_costs, 2),
+            'inventory_value': np.round(on_hand * unit_costs, 2),
+            'is_stockout': position <= 0
+        })
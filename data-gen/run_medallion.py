@@ -0,0 +1,71 @@
+"""
+Local Medallion Run
+Builds the silver_* and gold_* tables from the generated Bronze files with DuckDB, using the
+same table definitions as the Fabric notebooks (utils/medallion.py)
+
+Usage:
+    python run_medallion.py
+    python run_medallion.py --config custom_config.yml --output test_lakehouse/
+    python run_medallion.py --tables DimCustomer,FactSales
+"""
+
+import sys
+import yaml
+import argparse
+import logging
+from pathlib import Path
+
+from utils.medallion import run_medallion
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Run Bronze -> Silver -> Gold locally on the generated data')
+    parser.add_argument('--config', default='config.yml', help='Path to configuration file')
+    parser.add_argument('--input', help='Override Bronze input path (default: output.structured_path)')
+    parser.add_argument('--output', help='Override lakehouse output path (default: output.lakehouse_path)')
+    parser.add_argument('--tables', default='all', help='Comma-separated Bronze tables to run (or "all")')
+    parser.add_argument('--threads', type=int, default=0, help='DuckDB threads (0 = one per CPU)')
+    args = parser.parse_args()
+    
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    structured_path = Path(args.input or config['output']['structured_path'])
+    lakehouse_path = Path(args.output or config['output'].get('lakehouse_path', 'output/lakehouse'))
+    tables = None if args.tables == 'all' else [t.strip() for t in args.tables.split(',')]
+    
+    if not structured_path.exists():
+        logger.error(f"Bronze path not found: {structured_path} (run generate_all.py first)")
+        sys.exit(1)
+    
+    logger.info("=" * 80)
+    logger.info("LOCAL MEDALLION RUN (DuckDB)")
+    logger.info("=" * 80)
+    logger.info(f"Bronze: {structured_path}")
+    logger.info(f"Lakehouse: {lakehouse_path / 'Tables'}")
+    
+    report = run_medallion(structured_path, lakehouse_path, tables, args.threads)
+    
+    logger.info("")
+    logger.info(f"{'Table':<28} | {'Silver rows':>12} | {'Silver s':>8} | {'Gold rows':>12} | {'Gold s':>8}")
+    logger.info("-" * 80)
+    for table, stages in sorted(report['tables'].items()):
+        silver, gold = stages['silver'], stages['gold']
+        logger.info(f"{table:<28} | {silver['rows']:>12,} | {silver['seconds']:>8.2f} | "
+                    f"{gold['rows']:>12,} | {gold['seconds']:>8.2f}")
+    logger.info("-" * 80)
+    for stage, seconds in report['stages'].items():
+        logger.info(f"  {stage.title():<8} {seconds:>8.2f}s")
+    logger.info(f"  {'Total':<8} {report['seconds']:>8.2f}s ({len(report['tables'])} tables)")
+    logger.info("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Incremental append: repeated --append-days runs on a small dataset, with new dimension members
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+DATA_GEN = Path(__file__).resolve().parents[1]
+
+
+def _run(config_path: Path, *args: str) -> None:
+    result = subprocess.run([sys.executable, 'generate_all.py', '--config', str(config_path),
+                             '--domains', 'sales,supply_chain', *args],
+                            cwd=DATA_GEN, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+
+@pytest.mark.parametrize('scd2', [False, True])
+def test_repeated_appends_with_new_members(tmp_path, scd2):
+    with open(DATA_GEN / 'config.yml', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['start_date'], config['end_date'] = '2025-11-01', '2025-12-31'
+    config['output'].update({'format': 'csv', 'structured_path': str(tmp_path / 'structured'),
+                             'unstructured_path': str(tmp_path / 'unstructured')})
+    config['dim_customer']['count'] = 500
+    # Several new products per appended day, each drawn far more often than an existing one
+    config['dim_product']['count'] = 300
+    config['dim_employee']['count'] = 200
+    config['sales']['orders']['count'] = 2000
+    config['supply_chain']['purchase_orders']['count'] = 500
+    config['supply_chain']['inventory']['warehouse_count'] = 3
+    config['scd2']['enabled'] = scd2
+    config['surrogate_keys']['enabled'] = scd2
+    config_path = tmp_path / 'config.yml'
+    config_path.write_text(yaml.safe_dump(config), encoding='utf-8')
+    
+    _run(config_path)
+    for _ in range(3):
+        _run(config_path, '--append-days', '1')
+    
+    increments = sorted((tmp_path / 'structured' / 'increments').iterdir())
+    assert [path.name for path in increments] == ['20260101-20260101', '20260102-20260102', '20260103-20260103']
+    new_products = pd.concat([pd.read_csv(path / 'dimensions' / 'DimProduct.csv') for path in increments
+                              if (path / 'dimensions' / 'DimProduct.csv').exists()])
+    assert len(new_products) > 0
+    assert new_products['product_id'].is_unique
+    assert (pd.to_datetime(new_products['launch_date']) >= pd.Timestamp('2026-01-01')).all()
+    purchase_orders = pd.concat([pd.read_csv(path / 'supply_chain' / 'FactPurchaseOrders.csv') for path in increments])
+    assert 'sample_weight' not in purchase_orders.columns
@@ -20,6 +20,9 @@ ONELAKE_PATH = r"O:\YourWorkspace\YourLakehouse\Files\bronze"
 # Source path (generated data)
 SOURCE_PATH = Path("output/structured")
 
+# Shared Silver/Gold definitions imported by the transformation notebooks (copied to Files/code)
+MEDALLION_MODULE = Path(__file__).parent / "utils" / "medallion.py"
+
 # ============================================================================
 # UPLOAD SCRIPT
 # ============================================================================
@@ -88,6 +91,13 @@ def upload_to_onelake():
         copied_domains += 1
         print()
     
+    # Notebooks 02 and 03 import the table definitions from Files/code/medallion.py
+    code_destination = destination.parent / "code"
+    code_destination.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(MEDALLION_MODULE, code_destination / MEDALLION_MODULE.name)
+    print(f"📄 code/{MEDALLION_MODULE.name} (Silver/Gold definitions)")
+    print()
+    
     print("="*80)
     print("UPLOAD COMPLETE")
     print("="*80)
@@ -0,0 +1,262 @@
+"""
+Incremental Append
+Manifest, RNG state and key offsets that let generate_all.py --append-days extend an
+existing dataset by N days without regenerating its history (and --cdc-batches add
+change batches to it)
+"""
+
+import copy
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.identifiers import parse_ids, shift_ids
+
+MANIFEST_NAME = 'manifest.json'
+
+# Appended batches are written beside the full dataset, mirroring its domain layout:
+# <structured_path>/increments/<first date_id>-<last date_id>/<domain>/<Table>.<ext>
+INCREMENTS_DIR = 'increments'
+
+# Change-data-capture batches (generate_all.py --cdc-batches): <structured_path>/cdc/batch-<n>/<domain>/<Table>.<ext>
+CDC_DIR = 'cdc'
+
+# Volume settings that are totals over the generated history; a window gets its share by day
+HISTORY_VOLUMES = [
+    'crm.opportunities.count',
+    'sales.orders.count',
+    'hr.hiring.count',
+    'supply_chain.purchase_orders.count',
+    'manufacturing.production.work_orders',
+    'call_center.support_tickets.count',
+    'it_ops.incidents.count',
+    'quality_security.defects.count'
+]
+
+# Volume settings per calendar month; generators give every month in the window its full volume
+MONTHLY_VOLUMES = ['finance.general_ledger.transactions_per_month']
+
+# Conformed dimensions that gain members over time (config section whose count is the full-history size)
+GROWING_DIMENSIONS = {'DimCustomer': 'dim_customer', 'DimProduct': 'dim_product'}
+
+# Column holding the date a member joins; members added by a window join on its first day
+MEMBER_START_COLUMNS = {'DimCustomer': 'customer_since', 'DimProduct': 'launch_date'}
+
+# Relative draw weight of each member in the dimensions handed to a window's generators
+SAMPLE_WEIGHT_COLUMN = 'sample_weight'
+
+# Event facts dated inside the generated window, by domain. Snapshot, monthly and yearly tables
+# (budgets, emissions, BOMs, audits, experiments) and domain dimensions change only with a full run.
+# FactInventory is one of them: its ledger state (assortment, reorder policy, replenishment
+# orders in transit) is not stored in the snapshots, so a window could not continue it.
+APPEND_TABLES = {
+    'crm': ['FactOpportunities', 'FactActivities'],
+    'sales': ['FactSales', 'FactReturns'],
+    'hr': ['FactHiring', 'FactHeadcountDaily'],
+    'supply_chain': ['FactPurchaseOrders'],
+    'manufacturing': ['FactWorkOrders', 'FactProduction', 'FactMachineDowntime', 'FactMachineTelemetry'],
+    'finance': ['FactGeneralLedger'],
+    'esg': ['FactEnergyConsumption'],
+    'call_center': ['FactSupport', 'FactAgentIntervals'],
+    'itops': ['FactIncidents', 'FactAlerts'],
+    'finops': ['FactCloudCosts'],
+    'quality_security': ['FactDefects']
+}
+
+# Sequential keys: prefix -> (digits, first number a run uses, columns holding the key). Keys of
+# an appended batch are shifted past the largest number already generated so they never collide.
+KEY_SPACES = {
+    'CUST_': (6, 0, [('DimCustomer', 'customer_id')]),
+    'PROD_': (5, 0, [('DimProduct', 'product_id')]),
+    'OPP-': (6, 1, [('FactOpportunities', 'opportunity_id'), ('FactActivities', 'opportunity_id')]),
+    'ACT-': (8, 1, [('FactActivities', 'activity_id')]),
+    'ORD_': (8, 0, [('FactSales', 'order_id'), ('FactSales', 'order_line_id'), ('FactReturns', 'order_id')]),
+    'RET_': (8, 0, [('FactReturns', 'return_id')]),
+    'REQ-': (6, 1, [('FactHiring', 'req_id')]),
+    'PO-': (8, 1, [('FactPurchaseOrders', 'po_id')]),
+    'WO-': (8, 1, [('FactWorkOrders', 'work_order_id'), ('FactProduction', 'work_order_id')]),
+    'PROD-': (8, 1, [('FactProduction', 'production_id')]),
+    'DT-': (8, 1, [('FactMachineDowntime', 'downtime_id')]),
+    'JE-': (10, 1, [('FactGeneralLedger', 'journal_entry_id')]),
+    'TKT-': (8, 1, [('FactSupport', 'ticket_id')]),
+    'INC-': (8, 1, [('FactIncidents', 'incident_id'), ('FactAlerts', 'incident_id')]),
+    'ALR-': (10, 1, [('FactAlerts', 'alert_id')]),
+    'DEF-': (8, 1, [('FactDefects', 'defect_id')])
+}
+
+
+def _key_columns(table: str) -> List[tuple]:
+    """(prefix, digits, column) of every sequential key column in a table."""
+    return [(prefix, digits, column) for prefix, (digits, _, columns) in KEY_SPACES.items()
+            for name, column in columns if name == table]
+
+
+def track_keys(table: str, df: pd.DataFrame, key_state: Dict[str, int]) -> None:
+    """Record the largest key number per key space seen in a table (or chunk)."""
+    for prefix, digits, column in _key_columns(table):
+        if column not in df.columns:
+            continue
+        values = df[column]
+        values = np.asarray(values[values.notna()])
+        if len(values):
+            key_state[prefix] = max(key_state.get(prefix, -1), int(parse_ids(prefix, values, digits).max()))
+
+
+def track_key_chunks(chunks: Iterable[pd.DataFrame], table: str, key_state: Dict[str, int]) -> Iterable[pd.DataFrame]:
+    """Pass chunks through unchanged, recording their key numbers on the way."""
+    for chunk in chunks:
+        track_keys(table, chunk, key_state)
+        yield chunk
+
+
+def key_offsets(key_state: Dict[str, int]) -> Dict[str, int]:
+    """Offset per key space that moves a new run's first number just past the recorded maximum."""
+    return {prefix: key_state.get(prefix, first - 1) + 1 - first for prefix, (_, first, _) in KEY_SPACES.items()}
+
+
+def shift_keys(table: str, df: pd.DataFrame, offsets: Dict[str, int]) -> pd.DataFrame:
+    """Copy of a table with its sequential keys (and references to them) shifted by the batch offsets."""
+    columns = [(prefix, digits, column) for prefix, digits, column in _key_columns(table)
+               if column in df.columns and offsets.get(prefix)]
+    if not columns:
+        return df
+    df = df.copy()
+    for prefix, digits, column in columns:
+        mask = df[column].notna().values
+        if mask.all():
+            df[column] = shift_ids(prefix, df[column].values, digits, offsets[prefix])
+        else:
+            # Writable copy: under copy-on-write .values of a column is a read-only view
+            shifted = np.array(df[column], dtype=object)
+            shifted[mask] = shift_ids(prefix, shifted[mask], digits, offsets[prefix])
+            df[column] = shifted
+    return df
+
+
+def shift_key_chunks(chunks: Iterable[pd.DataFrame], table: str, offsets: Dict[str, int],
+                     key_state: Dict[str, int]) -> Iterable[pd.DataFrame]:
+    """Shift the keys of streamed chunks, recording the new maxima; partition tags are kept."""
+    for chunk in chunks:
+        shifted = shift_keys(table, chunk, offsets)
+        shifted.attrs = chunk.attrs
+        track_keys(table, shifted, key_state)
+        yield shifted
+
+
+def join_window(members: pd.DataFrame, name: str, start: pd.Timestamp) -> pd.DataFrame:
+    """
+    New members with their MEMBER_START_COLUMNS date on the window's first day, the effective
+    date of their first SCD2 version. Generators date a window's events without looking at
+    member start dates, so any later day would leave orders placed before the customer joined.
+    """
+    members = members.copy()
+    members[MEMBER_START_COLUMNS[name]] = start.date()
+    return members
+
+
+def favor_new_members(dim: pd.DataFrame, new_count: int, share: float) -> pd.DataFrame:
+    """
+    Dimension as sampled by a window's generators: a copy with a SAMPLE_WEIGHT_COLUMN that gives
+    its last new_count rows (the members the window adds) about `share` of the draws, instead of
+    new_count / len(dim). Rows are not repeated, so keys stay unique for lookups.
+    """
+    existing = len(dim) - new_count
+    if new_count == 0 or existing == 0 or share <= 0:
+        return dim
+    weighted = dim.copy(deep=False)
+    weighted[SAMPLE_WEIGHT_COLUMN] = np.r_[np.ones(existing),
+                                           np.full(new_count, share * existing / ((1 - share) * new_count))]
+    return weighted
+
+
+def sample_weights(dim: pd.DataFrame) -> Optional[pd.Series]:
+    """Draw weights of a dimension's rows set by favor_new_members, or None to sample uniformly."""
+    return dim[SAMPLE_WEIGHT_COLUMN] if SAMPLE_WEIGHT_COLUMN in dim.columns else None
+
+
+def _month_days(start: pd.Timestamp, end: pd.Timestamp) -> int:
+    """Days in the calendar months a window touches."""
+    months = pd.period_range(start, end, freq='M')
+    return int(sum(month.days_in_month for month in months))
+
+
+def _round_volume(expected: float, rng: np.random.Generator) -> int:
+    """Stochastic rounding: small daily volumes stay right on average over many appends."""
+    whole = int(np.floor(expected))
+    return whole + int(rng.random() < expected - whole)
+
+
+def window_config(config: Dict[str, Any], start: pd.Timestamp, end: pd.Timestamp, history_days: int,
+                  rng: np.random.Generator) -> Dict[str, Any]:
+    """
+    Copy of the configuration for generating only the window [start, end]: dates moved to the
+    window and total volumes scaled to the window's share of the history.
+    """
+    window = copy.deepcopy(config)
+    window['start_date'] = start.strftime('%Y-%m-%d')
+    window['end_date'] = end.strftime('%Y-%m-%d')
+    days = (end - start).days + 1
+    for paths, factor in ((HISTORY_VOLUMES, days / history_days), (MONTHLY_VOLUMES, days / _month_days(start, end))):
+        for path in paths:
+            *parents, key = path.split('.')
+            section = window
+            for parent in parents:
+                section = section.get(parent, {})
+            if key in section:
+                # Generators need at least one row to sample from
+                section[key] = max(1, _round_volume(section[key] * factor, rng))
+    return window
+
+
+def new_manifest(config: Dict[str, Any], key_state: Dict[str, int], row_counts: Dict[str, int]) -> Dict[str, Any]:
+    """Manifest of a full run, with the RNG stream later appends draw their seeds from."""
+    rng = np.random.default_rng(np.random.SeedSequence([config['seed'], 1]))
+    history_days = (pd.Timestamp(config['end_date']) - pd.Timestamp(config['start_date'])).days + 1
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'seed': config['seed'],
+        'start_date': config['start_date'],
+        'end_date': config['end_date'],
+        'history_days': history_days,
+        'format': config['output']['format'],
+        'row_counts': row_counts,
+        'key_spaces': key_state,
+        'surrogate_keys': config.get('surrogate_keys', {}).get('enabled', False),
+        'rng_state': rng.bit_generator.state,
+        'batches': []
+    }
+
+
+def read_manifest(structured_path: Path) -> Optional[Dict[str, Any]]:
+    """Manifest of the dataset at structured_path, or None if it was never generated."""
+    path = Path(structured_path) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(structured_path: Path, manifest: Dict[str, Any]) -> None:
+    """Write the manifest beside the generated domains."""
+    with open(Path(structured_path) / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def restore_rng(manifest: Dict[str, Any]) -> np.random.Generator:
+    """Generator resumed from the manifest's saved state, so appends are reproducible in sequence."""
+    rng = np.random.default_rng()
+    rng.bit_generator.state = manifest['rng_state']
+    return rng
+
+
+def read_table(domain_path: Path, name: str) -> Optional[pd.DataFrame]:
+    """A table saved by save_dataframe (Parquet preferred over CSV), or None if absent."""
+    for file_name, reader in ((f"{name}.parquet", pd.read_parquet), (f"{name}.csv.gz", pd.read_csv),
+                              (f"{name}.csv", pd.read_csv)):
+        if (domain_path / file_name).exists():
+            return reader(domain_path / file_name)
+    return None
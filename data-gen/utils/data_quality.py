@@ -1,13 +1,837 @@
-"""Data Quality Validation Utilities - Placeholder"""
+"""
+Data Quality Validation Utilities
+Foreign-key checks driven by a declared FK map, declarative business rules compiled to
+vectorized evaluators and conformance of output columns to the configured distributions,
+usable on whole tables or per streamed chunk
+"""
+
+import ast
+import json
+import math
+import operator
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# (child table, child column, parent table, parent column)
+FOREIGN_KEYS: List[Tuple[str, str, str, str]] = [
+    # Conformed dimensions
+    ('DimEmployee', 'manager_id', 'DimEmployee', 'employee_id'),
+    ('DimFacility', 'geography_id', 'DimGeography', 'geography_id'),
+    ('DimProject', 'lead_id', 'DimEmployee', 'employee_id'),
+    # CRM
+    ('FactOpportunities', 'customer_id', 'DimCustomer', 'customer_id'),
+    ('FactOpportunities', 'sales_rep_id', 'DimEmployee', 'employee_id'),
+    ('FactActivities', 'opportunity_id', 'FactOpportunities', 'opportunity_id'),
+    ('FactActivities', 'customer_id', 'DimCustomer', 'customer_id'),
+    ('FactActivities', 'employee_id', 'DimEmployee', 'employee_id'),
+    # Sales
+    ('FactSales', 'customer_id', 'DimCustomer', 'customer_id'),
+    ('FactSales', 'product_id', 'DimProduct', 'product_id'),
+    ('FactSales', 'employee_id', 'DimEmployee', 'employee_id'),
+    ('FactSales', 'order_date_id', 'DimDate', 'date_id'),
+    ('FactSales', 'ship_date_id', 'DimDate', 'date_id'),
+    ('FactSales', 'delivery_date_id', 'DimDate', 'date_id'),
+    ('FactReturns', 'order_id', 'FactSales', 'order_id'),
+    ('FactReturns', 'customer_id', 'DimCustomer', 'customer_id'),
+    ('FactReturns', 'product_id', 'DimProduct', 'product_id'),
+    ('FactReturns', 'return_date_id', 'DimDate', 'date_id'),
+    # Product
+    ('DimProductBOM', 'parent_product_id', 'DimProduct', 'product_id'),
+    ('DimProductBOM', 'component_product_id', 'DimProduct', 'product_id'),
+    ('DimProductBOMExplosion', 'root_product_id', 'DimProduct', 'product_id'),
+    ('DimProductBOMExplosion', 'component_product_id', 'DimProduct', 'product_id'),
+    # HR
+    ('FactHiring', 'employee_id', 'DimEmployee', 'employee_id'),
+    ('FactAttrition', 'employee_id', 'DimEmployee', 'employee_id'),
+    # Supply chain
+    ('FactInventory', 'product_id', 'DimProduct', 'product_id'),
+    ('FactInventory', 'warehouse_id', 'DimFacility', 'facility_id'),
+    ('FactPurchaseOrders', 'product_id', 'DimProduct', 'product_id'),
+    ('FactPurchaseOrders', 'warehouse_id', 'DimFacility', 'facility_id'),
+    # Manufacturing
+    ('DimMachine', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactWorkOrders', 'product_id', 'DimProduct', 'product_id'),
+    ('FactWorkOrders', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactWorkOrders', 'supervisor_id', 'DimEmployee', 'employee_id'),
+    ('FactProduction', 'work_order_id', 'FactWorkOrders', 'work_order_id'),
+    ('FactProduction', 'product_id', 'DimProduct', 'product_id'),
+    ('FactProduction', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactMachineDowntime', 'machine_id', 'DimMachine', 'machine_id'),
+    ('FactMachineDowntime', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactMachineTelemetry', 'machine_id', 'DimMachine', 'machine_id'),
+    ('FactMachineTelemetry', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactMachineTelemetry', 'telemetry_date_id', 'DimDate', 'date_id'),
+    # Finance
+    ('FactGeneralLedger', 'account_id', 'DimAccount', 'account_id'),
+    ('FactGeneralLedger', 'transaction_date_id', 'DimDate', 'date_id'),
+    ('FactBudget', 'account_id', 'DimAccount', 'account_id'),
+    # ESG
+    ('FactEmissions', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactEnergyConsumption', 'facility_id', 'DimFacility', 'facility_id'),
+    ('FactEnergyConsumption', 'reading_date_id', 'DimDate', 'date_id'),
+    ('FactSupplierEmissions', 'supplier_id', 'FactPurchaseOrders', 'supplier_id'),
+    # Call center
+    ('FactSupport', 'customer_id', 'DimCustomer', 'customer_id'),
+    ('FactSupport', 'agent_id', 'DimEmployee', 'employee_id'),
+    # IT Ops
+    ('FactIncidents', 'assignee_id', 'DimEmployee', 'employee_id'),
+    ('FactIncidents', 'root_incident_id', 'FactIncidents', 'incident_id'),
+    ('FactAlerts', 'incident_id', 'FactIncidents', 'incident_id'),
+    # FinOps
+    ('DimCloudResource', 'owner_id', 'DimEmployee', 'employee_id'),
+    ('DimCloudResource', 'project_id', 'DimProject', 'project_id'),
+    ('FactCloudCosts', 'resource_id', 'DimCloudResource', 'resource_id'),
+    ('FactCloudCosts', 'usage_date_id', 'DimDate', 'date_id'),
+    # Risk & compliance
+    ('DimControl', 'owner_id', 'DimEmployee', 'employee_id'),
+    ('FactComplianceChecks', 'control_id', 'DimControl', 'control_id'),
+    ('FactAudits', 'auditor_id', 'DimEmployee', 'employee_id'),
+    ('FactRisks', 'owner_id', 'DimEmployee', 'employee_id'),
+    # R&D
+    ('FactExperiments', 'project_id', 'DimProject', 'project_id'),
+    ('FactExperiments', 'researcher_id', 'DimEmployee', 'employee_id'),
+    # Quality & security
+    ('FactDefects', 'product_id', 'DimProduct', 'product_id')
+]
+
+
+def build_key_index(parent_keys: pd.Series) -> np.ndarray:
+    """Sorted distinct non-null parent keys, the lookup structure for find_orphans."""
+    keys = parent_keys.dropna()
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.astype(keys.cat.categories.dtype)
+    if pd.api.types.is_numeric_dtype(keys.dtype):
+        return np.unique(keys.to_numpy(dtype=np.int64 if pd.api.types.is_integer_dtype(keys.dtype) else float))
+    return np.sort(pd.unique(keys.astype(str).to_numpy(dtype=object)))
+
+
+def find_orphans(values: pd.Series, key_index: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of non-null values that are missing from key_index.
+    
+    Categorical columns are checked on their (few) categories and the result is gathered
+    through the integer codes. Integer keys over a compact range (surrogate ids, yyyymmdd
+    date ids) use a dense membership bitmap indexed by value; other numeric keys use a
+    binary search on the sorted index; string keys use a hashed lookup (pandas
+    Index.get_indexer). All are single vectorized passes, so a 100M-row chunk is checked
+    in seconds.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        category_orphan = find_orphans(pd.Series(values.cat.categories), key_index)
+        return (codes >= 0) & np.append(category_orphan, False)[codes]
+    
+    if len(key_index) == 0:
+        return values.notna().to_numpy()
+    
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iu' and key_index.dtype.kind == 'i':
+        low, high = int(key_index[0]), int(key_index[-1])
+        if high - low <= max(8 * len(key_index), 1 << 20):
+            member = np.zeros(high - low + 1, dtype=bool)
+            member[key_index - low] = True
+            present = values.to_numpy()
+            in_range = (present >= low) & (present <= high)
+            offset = np.where(in_range, present, low) - low
+            return ~(in_range & member[offset])
+    
+    notnull = values.notna().to_numpy()
+    orphan = np.zeros(len(values), dtype=bool)
+    if key_index.dtype != object and pd.api.types.is_numeric_dtype(values.dtype):
+        present = values[notnull].to_numpy(dtype=key_index.dtype)
+        position = np.minimum(np.searchsorted(key_index, present), len(key_index) - 1)
+        orphan[notnull] = key_index[position] != present
+    else:
+        present = values[notnull].astype(str).to_numpy(dtype=object)
+        orphan[notnull] = pd.Index(key_index).get_indexer(present) < 0
+    return orphan
+
+
+def check_referential_integrity(table_name: str, df: pd.DataFrame, tables: Dict[str, pd.DataFrame],
+                                state: Dict[str, Any], foreign_keys: Optional[List[Tuple[str, str, str, str]]] = None,
+                                sample_size: int = 5) -> None:
+    """
+    Check every declared foreign key of one table (or one streamed chunk of it).
+    
+    Results accumulate in state, so calling this once per chunk gives the same counts as
+    one call on the whole table. Parent key indexes are built on first use and cached in
+    state. Relationships whose parent table is not available are recorded as skipped.
+    
+    Args:
+        table_name: Name of the child table
+        df: The table or one chunk of it
+        tables: Tables that may be referenced as parents
+        state: Accumulator created by the first call (pass {} to start)
+        foreign_keys: FK map (defaults to FOREIGN_KEYS)
+        sample_size: Orphan values kept per relationship
+    """
+    key_indexes = state.setdefault('key_indexes', {})
+    relationships = state.setdefault('relationships', {})
+    skipped = state.setdefault('skipped', set())
+    
+    for child, column, parent, parent_column in (foreign_keys or FOREIGN_KEYS):
+        if child != table_name or column not in df.columns:
+            continue
+        label = f"{child}.{column} -> {parent}.{parent_column}"
+        if (parent, parent_column) not in key_indexes:
+            parent_df = df if parent == table_name else tables.get(parent)
+            if parent_df is None or parent_column not in parent_df.columns:
+                skipped.add(label)
+                continue
+            key_indexes[(parent, parent_column)] = build_key_index(parent_df[parent_column])
+        
+        started = time.perf_counter()
+        orphan = find_orphans(df[column], key_indexes[(parent, parent_column)])
+        result = relationships.setdefault(label, {'rows': 0, 'nulls': 0, 'orphans': 0, 'samples': [], 'seconds': 0.0})
+        result['rows'] += len(df)
+        result['nulls'] += int(df[column].isna().sum())
+        orphan_count = int(orphan.sum())
+        result['orphans'] += orphan_count
+        if orphan_count and len(result['samples']) < sample_size:
+            samples = pd.unique(df[column].to_numpy()[orphan])[:sample_size - len(result['samples'])]
+            result['samples'].extend(str(v) for v in samples)
+        result['seconds'] += time.perf_counter() - started
+
+
+def summarize_referential_integrity(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a check_referential_integrity accumulator into a pass/fail report."""
+    relationships = state.get('relationships', {})
+    failures = [
+        f"{label}: {result['orphans']:,} orphans in {result['rows']:,} rows (e.g. {', '.join(result['samples'])})"
+        for label, result in relationships.items() if result['orphans']
+    ]
+    return {
+        'passed': not failures,
+        'failures': failures,
+        'relationships': relationships,
+        'checked': len(relationships),
+        'skipped': sorted(state.get('skipped', set()) - set(relationships)),
+        'seconds': sum(result['seconds'] for result in relationships.values())
+    }
+
+
+def validate_referential_integrity(tables: Dict[str, pd.DataFrame], state: Optional[Dict[str, Any]] = None,
+                                   foreign_keys: Optional[List[Tuple[str, str, str, str]]] = None) -> Dict[str, Any]:
+    """
+    Validate foreign key relationships of all in-memory tables.
+    
+    Args:
+        tables: Tables to check (children) and to look parents up in
+        state: Accumulator already holding results for streamed tables, if any
+        foreign_keys: FK map (defaults to FOREIGN_KEYS)
+    
+    Returns:
+        Report with passed, failures (one line per failing relationship), per-relationship
+        counts and samples, and the relationships skipped for lack of a parent table
+    """
+    state = {} if state is None else state
+    for table_name, df in tables.items():
+        check_referential_integrity(table_name, df, tables, state, foreign_keys)
+    return summarize_referential_integrity(state)
+
+
+# ===== Business rules =====
+# Rules are row-level column expressions in Python syntax, e.g.
+#   abs(total_amount - (net_amount + tax_amount)) <= 0.02
+#   0 <= yield_pct <= 105
+#   notnull(resolved_date) == (status == 'Resolved')
+# Supported: columns, numbers, strings, True/False, + - * / %, comparisons (chained),
+# in / not in (literal list), and / or / not, abs(), isnull(), notnull().
+# Nulls follow SQL semantics: a rule whose outcome depends on a null is not applicable,
+# so only rows where it is known to be false are violations (isnull/notnull test nulls).
+
+_ARITHMETIC = {ast.Add: ('+', operator.add), ast.Sub: ('-', operator.sub), ast.Mult: ('*', operator.mul),
+               ast.Div: ('/', operator.truediv), ast.Mod: ('%', operator.mod)}
+_COMPARISON = {ast.Eq: ('=', operator.eq), ast.NotEq: ('<>', operator.ne), ast.Lt: ('<', operator.lt),
+               ast.LtE: ('<=', operator.le), ast.Gt: ('>', operator.gt), ast.GtE: ('>=', operator.ge)}
+
+
+def _truth(value: Any, length: int) -> np.ndarray:
+    """Boolean numpy view of an evaluated node (nulls read as False; they are tracked separately)."""
+    if isinstance(value, pd.Series):
+        if value.dtype == object or isinstance(value.dtype, pd.BooleanDtype):
+            value = value.fillna(False)
+        return value.to_numpy(dtype=bool)
+    return np.broadcast_to(np.asarray(value, dtype=bool), (length,))
+
+
+def _unknown(*masks: Any) -> Any:
+    """Combine null masks of operands (False when none can be null)."""
+    masks = [m for m in masks if m is not False]
+    if not masks:
+        return False
+    return np.logical_or.reduce(masks) if len(masks) > 1 else masks[0]
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        return -node.operand.value
+    raise ValueError(f"Unsupported literal in rule: {ast.dump(node)}")
+
+
+def _compile_node(node: ast.AST) -> Callable:
+    """Compile an expression node to evaluate(df) -> (value, null mask)."""
+    if isinstance(node, ast.Name):
+        name = node.id
+        
+        def column(df):
+            series = df[name]
+            nulls = series.isna().to_numpy()
+            return series, (nulls if nulls.any() else False)
+        return column
+    
+    if isinstance(node, ast.Constant):
+        value = _literal(node)
+        return lambda df: (value, False)
+    
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.Not):
+            def negate(df):
+                value, nulls = operand(df)
+                return ~_truth(value, len(df)), nulls
+            return negate
+        if isinstance(node.op, ast.USub):
+            return lambda df: (lambda v, n: (-v, n))(*operand(df))
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        left, right, op = _compile_node(node.left), _compile_node(node.right), _ARITHMETIC[type(node.op)][1]
+        
+        def arithmetic(df):
+            (a, a_nulls), (b, b_nulls) = left(df), right(df)
+            return op(a, b), _unknown(a_nulls, b_nulls)
+        return arithmetic
+    
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(v) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+        
+        def boolean(df):
+            values, unknown = [], []
+            for operand in operands:
+                value, nulls = operand(df)
+                values.append(_truth(value, len(df)))
+                unknown.append(np.broadcast_to(np.asarray(nulls), (len(df),)))
+            known = [v & ~u if not is_and else ~v & ~u for v, u in zip(values, unknown)]
+            decided = np.logical_or.reduce(known)  # a known False (and) / known True (or) decides
+            result = ~decided if is_and else decided
+            return result, np.logical_or.reduce(unknown) & ~decided
+        return boolean
+    
+    if isinstance(node, ast.Compare):
+        terms = [_compile_node(node.left)]
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                    raise ValueError("'in' needs a literal list, e.g. status in ('Open', 'Closed')")
+                steps.append((op, [_literal(e) for e in comparator.elts]))
+                terms.append(None)
+            elif type(op) in _COMPARISON:
+                steps.append((op, None))
+                terms.append(_compile_node(comparator))
+            else:
+                raise ValueError(f"Unsupported comparison in rule: {type(op).__name__}")
+        
+        def compare(df):
+            left_value, left_nulls = terms[0](df)
+            result, unknown = np.ones(len(df), dtype=bool), left_nulls
+            for (op, members), term in zip(steps, terms[1:]):
+                if members is not None:
+                    hit = _truth(pd.Series(left_value).isin(members), len(df))
+                    result &= hit if isinstance(op, ast.In) else ~hit
+                    continue
+                right_value, right_nulls = term(df)
+                result &= _truth(_COMPARISON[type(op)][1](left_value, right_value), len(df))
+                unknown = _unknown(unknown, right_nulls)
+                left_value = right_value
+            return result, unknown
+        return compare
+    
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1:
+        argument = _compile_node(node.args[0])
+        if node.func.id == 'abs':
+            return lambda df: (lambda v, n: (abs(v), n))(*argument(df))
+        if node.func.id in ('isnull', 'notnull'):
+            want_null = node.func.id == 'isnull'
+            
+            def null_test(df):
+                _, nulls = argument(df)
+                nulls = np.broadcast_to(np.asarray(nulls), (len(df),))
+                return (nulls if want_null else ~nulls), False
+            return null_test
+    
+    raise ValueError(f"Unsupported expression in rule: {ast.dump(node)}")
+
+
+def _to_spark_sql(node: ast.AST) -> str:
+    """Render a rule expression as a Spark SQL boolean condition."""
+    if isinstance(node, ast.Name):
+        return f"`{node.id}`"
+    if isinstance(node, ast.Constant) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)
+                                         and isinstance(node.operand, ast.Constant)):
+        value = _literal(node)
+        if isinstance(value, bool):
+            return 'TRUE' if value else 'FALSE'
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return repr(value)
+    if isinstance(node, ast.UnaryOp):
+        return f"(NOT {_to_spark_sql(node.operand)})" if isinstance(node.op, ast.Not) else f"(-{_to_spark_sql(node.operand)})"
+    if isinstance(node, ast.BinOp):
+        return f"({_to_spark_sql(node.left)} {_ARITHMETIC[type(node.op)][0]} {_to_spark_sql(node.right)})"
+    if isinstance(node, ast.BoolOp):
+        joiner = ' AND ' if isinstance(node.op, ast.And) else ' OR '
+        return '(' + joiner.join(_to_spark_sql(v) for v in node.values) + ')'
+    if isinstance(node, ast.Compare):
+        parts, left = [], node.left
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                members = ', '.join(_to_spark_sql(e) for e in comparator.elts)
+                parts.append(f"{_to_spark_sql(left)} {'IN' if isinstance(op, ast.In) else 'NOT IN'} ({members})")
+            else:
+                parts.append(f"{_to_spark_sql(left)} {_COMPARISON[type(op)][0]} {_to_spark_sql(comparator)}")
+            left = comparator
+        return '(' + ' AND '.join(parts) + ')'
+    if isinstance(node, ast.Call):
+        argument = _to_spark_sql(node.args[0])
+        if node.func.id == 'abs':
+            return f"abs({argument})"
+        return f"({argument} IS {'' if node.func.id == 'isnull' else 'NOT '}NULL)"
+    raise ValueError(f"Unsupported expression in rule: {ast.dump(node)}")
+
+
+def compile_business_rules(rule_specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Parse and compile rules from config once.
+    
+    Args:
+        rule_specs: quality.business_rules entries with name, table, rule and optional id_column
+    
+    Returns:
+        Rule dicts with an evaluate(df) -> (holds, not_applicable) callable and the
+        equivalent Spark SQL condition
+    """
+    compiled = []
+    for spec in rule_specs:
+        tree = ast.parse(spec['rule'], mode='eval').body
+        compiled.append({
+            'name': spec['name'],
+            'table': spec['table'],
+            'rule': spec['rule'],
+            'id_column': spec.get('id_column'),
+            'evaluate': _compile_node(tree),
+            'spark_sql': _to_spark_sql(tree)
+        })
+    return compiled
+
+
+def export_business_rules(rules: List[Dict[str, Any]], path: Path) -> None:
+    """Write compiled rules as JSON (with Spark SQL conditions) for the quality notebook."""
+    exported = [{key: rule[key] for key in ('name', 'table', 'rule', 'id_column', 'spark_sql')} for rule in rules]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(exported, f, indent=2)
+
+
+def check_business_rules(table_name: str, df: pd.DataFrame, rules: List[Dict[str, Any]], state: Dict[str, Any],
+                         sample_size: int = 5) -> None:
+    """
+    Evaluate the rules of one table (or one streamed chunk of it), accumulating into state.
+    
+    Rules referencing a column the table does not have are recorded as skipped. Sample
+    violations are identified by id_column, or the table's first column.
+    """
+    results = state.setdefault('rules', {})
+    skipped = state.setdefault('skipped', set())
+    for rule in rules:
+        if rule['table'] != table_name:
+            continue
+        started = time.perf_counter()
+        try:
+            holds, not_applicable = rule['evaluate'](df)
+        except KeyError:
+            skipped.add(rule['name'])
+            continue
+        violated = ~_truth(holds, len(df)) & ~np.broadcast_to(np.asarray(not_applicable), (len(df),))
+        result = results.setdefault(rule['name'], {'table': table_name, 'rule': rule['rule'], 'rows': 0,
+                                                   'violations': 0, 'sample_ids': [], 'seconds': 0.0})
+        result['rows'] += len(df)
+        violation_count = int(violated.sum())
+        result['violations'] += violation_count
+        if violation_count and len(result['sample_ids']) < sample_size:
+            id_column = rule['id_column'] or df.columns[0]
+            ids = df[id_column].to_numpy()[violated][:sample_size - len(result['sample_ids'])]
+            result['sample_ids'].extend(str(v) for v in ids)
+        result['seconds'] += time.perf_counter() - started
+
+
+def summarize_business_rules(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a check_business_rules accumulator into a violation report."""
+    results = state.get('rules', {})
+    failures = [
+        f"{name} ({result['table']}: {result['rule']}): {result['violations']:,} of {result['rows']:,} rows "
+        f"(e.g. {', '.join(result['sample_ids'])})"
+        for name, result in results.items() if result['violations']
+    ]
+    return {
+        'passed': not failures,
+        'failures': failures,
+        'rules': results,
+        'checked': len(results),
+        'skipped': sorted(state.get('skipped', set()) - set(results)),
+        'seconds': sum(result['seconds'] for result in results.values())
+    }
+
+
+def validate_business_rules(tables: Dict[str, pd.DataFrame], rules: List[Dict[str, Any]],
+                            state: Optional[Dict[str, Any]] = None, workers: int = 0) -> Dict[str, Any]:
+    """
+    Validate compiled business rules across all in-memory tables, one table per thread.
+    
+    Args:
+        tables: Tables to check
+        rules: Output of compile_business_rules
+        state: Accumulator already holding results for streamed tables, if any
+        workers: Threads (0 = one per CPU)
+    
+    Returns:
+        Report with passed, failures (one line per violated rule), per-rule counts and
+        sample row ids, and the rules skipped for lack of a table or column
+    """
+    state = {} if state is None else state
+    ruled_tables = [name for name in tables if any(rule['table'] == name for rule in rules)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        list(executor.map(lambda name: check_business_rules(name, tables[name], rules, state), ruled_tables))
+    state.setdefault('skipped', set()).update(rule['name'] for rule in rules if rule['table'] not in tables)
+    return summarize_business_rules(state)
+
+
+# ===== Distribution conformance =====
+# Configured distributions and the output column each one drives, as
+# (config path, table, column[, unit column]). A distribution is a {value: share} mapping,
+# a list of {name, percentage} entries, or a single share of True (e.g. active_percentage).
+# Values are matched case- and punctuation-insensitively ('full_time' == 'Full-Time').
+# With a unit column, an attribute of a grain above the table's is counted once per
+# distinct unit (order-level channel and status on FactSales lines, once per order_id).
+DISTRIBUTIONS: List[Tuple[str, ...]] = [
+    # Conformed dimensions
+    ('dim_customer.industry_distribution', 'DimCustomer', 'industry'),
+    ('dim_customer.segment_distribution', 'DimCustomer', 'segment'),
+    ('dim_customer.region_distribution', 'DimCustomer', 'region'),
+    ('dim_customer.active_percentage', 'DimCustomer', 'is_active'),
+    ('dim_product.categories', 'DimProduct', 'category'),
+    ('dim_product.lifecycle_distribution', 'DimProduct', 'lifecycle_stage'),
+    ('dim_product.active_percentage', 'DimProduct', 'is_active'),
+    ('dim_employee.departments', 'DimEmployee', 'department'),
+    ('dim_employee.employment_type_distribution', 'DimEmployee', 'employment_type'),
+    ('dim_employee.performance_distribution', 'DimEmployee', 'performance_rating'),
+    ('dim_employee.active_percentage', 'DimEmployee', 'is_active'),
+    ('dim_facility.types', 'DimFacility', 'facility_type'),
+    ('dim_facility.size_distribution', 'DimFacility', 'size_category'),
+    ('dim_facility.active_percentage', 'DimFacility', 'is_active'),
+    ('dim_project.categories', 'DimProject', 'category'),
+    ('dim_project.status_distribution', 'DimProject', 'status'),
+    # CRM
+    ('crm.opportunities.stage_distribution', 'FactOpportunities', 'stage'),
+    ('crm.activities.type_distribution', 'FactActivities', 'activity_type'),
+    # Sales
+    ('sales.orders.channel_distribution', 'FactSales', 'channel', 'order_id'),
+    ('sales.orders.status_distribution', 'FactSales', 'status', 'order_id'),
+    ('sales.returns.reason_distribution', 'FactReturns', 'return_reason'),
+    # Marketing
+    ('marketing.campaigns.channel_distribution', 'FactCampaigns', 'channel'),
+    # HR
+    ('hr.attrition.termination_type_distribution', 'FactAttrition', 'termination_type'),
+    ('hr.hiring.source_distribution', 'FactHiring', 'source'),
+    # Call center
+    ('call_center.support_tickets.channel_distribution', 'FactSupport', 'channel'),
+    ('call_center.support_tickets.category_distribution', 'FactSupport', 'category'),
+    ('call_center.support_tickets.priority_distribution', 'FactSupport', 'priority'),
+    # IT Ops
+    ('it_ops.incidents.severity_distribution', 'FactIncidents', 'severity'),
+    ('it_ops.incidents.category_distribution', 'FactIncidents', 'category'),
+    # FinOps
+    ('finops.cloud_costs.providers', 'DimCloudResource', 'provider'),
+    ('finops.cloud_costs.environment_distribution', 'DimCloudResource', 'environment'),
+    # Risk & compliance
+    ('risk_compliance.controls.framework_distribution', 'DimControl', 'framework'),
+    ('risk_compliance.controls.frequency_distribution', 'DimControl', 'frequency'),
+    ('risk_compliance.incidents.severity_distribution', 'FactRisks', 'impact'),
+    # R&D
+    ('rd.experiments.type_distribution', 'FactExperiments', 'experiment_type'),
+    # Quality & security
+    ('quality_security.defects.severity_distribution', 'FactDefects', 'severity'),
+    ('quality_security.defects.type_distribution', 'FactDefects', 'defect_type')
+]
+
+# Configured averages as (config path, table, column, column units per config unit)
+TARGET_MEANS: List[Tuple[str, str, str, float]] = [
+    ('crm.opportunities.average_deal_size', 'FactOpportunities', 'amount', 1.0),
+    ('marketing.campaigns.average_ctr', 'FactCampaigns', 'ctr', 100.0),  # ctr is a percentage
+    ('call_center.support_tickets.average_csat', 'FactSupport', 'csat_score', 1.0),
+    ('rd.experiments.average_cost', 'FactExperiments', 'cost_usd', 1.0)
+]
+
+
+# Config keys named differently from the labels their generator writes, by config path
+# (normalized config key -> normalized label)
+LABEL_ALIASES: Dict[str, Dict[str, str]] = {
+    'crm.opportunities.stage_distribution': {'lead': 'prospecting', 'qualified': 'qualification'}
+}
+
+
+def _normalize_label(value: Any) -> str:
+    """Lower-case alphanumerics of a value, so config keys match display labels."""
+    return ''.join(ch for ch in str(value).lower() if ch.isalnum())
+
+
+def _config_value(config: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted config path, or None when any part is missing."""
+    value = config
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def resolve_distributions(config: Dict[str, Any], distributions: Optional[List[Tuple[str, ...]]] = None,
+                          target_means: Optional[List[Tuple[str, str, str, float]]] = None) -> List[Dict[str, Any]]:
+    """
+    Read the expected distributions and averages out of the generation config.
+    
+    Args:
+        config: Full generation config
+        distributions: Distribution map (defaults to DISTRIBUTIONS)
+        target_means: Average map (defaults to TARGET_MEANS)
+    
+    Returns:
+        Specs with name, table, column and either labels (aliased per LABEL_ALIASES) +
+        expected shares + unit column (kind 'frequencies') or a target average (kind 'mean');
+        paths missing from config are left out
+    """
+    specs = []
+    for path, table, column, *unit in (distributions or DISTRIBUTIONS):
+        declared = _config_value(config, path)
+        if isinstance(declared, list):
+            declared = {entry['name']: entry['percentage'] for entry in declared}
+        elif isinstance(declared, (int, float)) and not isinstance(declared, bool):
+            declared = {True: declared, False: 1 - declared}
+        if not isinstance(declared, dict) or not declared:
+            continue
+        expected = np.array([float(share) for share in declared.values()])
+        aliases = LABEL_ALIASES.get(path, {})
+        labels = [_normalize_label(value) for value in declared]
+        specs.append({
+            'name': path, 'kind': 'frequencies', 'table': table, 'column': column,
+            'unit_column': unit[0] if unit else None,
+            'labels': [aliases.get(label, label) for label in labels],
+            'values': [str(value) for value in declared],
+            'expected': expected / expected.sum()
+        })
+    for path, table, column, scale in (target_means or TARGET_MEANS):
+        target = _config_value(config, path)
+        if isinstance(target, (int, float)) and not isinstance(target, bool):
+            specs.append({'name': path, 'kind': 'mean', 'table': table, 'column': column, 'target': target * scale})
+    return specs
+
+
+def observed_frequencies(values: pd.Series, labels: List[str]) -> np.ndarray:
+    """
+    Count values per expected label, with one extra trailing bucket for any other value.
+    
+    Counting runs on integer codes (the codes of a categorical, the 0/1 of a boolean, or
+    pd.factorize of anything else) with a single np.bincount, so the work per row is one
+    pass; labels are matched on the few distinct values only. Nulls are not counted.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    elif values.dtype == bool:
+        codes, uniques = values.to_numpy().view(np.int8), [False, True]
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0] if (codes < 0).any() else codes, minlength=len(uniques))
+    slots = pd.Index(labels).get_indexer([_normalize_label(value) for value in uniques])
+    slots[slots < 0] = len(labels)
+    return np.bincount(slots, weights=counts, minlength=len(labels) + 1).astype(np.int64)
+
+
+def _chi_square_sf(statistic: float, dof: int) -> float:
+    """
+    Upper-tail probability of the chi-square distribution, the regularized upper incomplete
+    gamma Q(dof/2, statistic/2): series expansion below a + 1, Lentz continued fraction above.
+    """
+    if statistic <= 0:
+        return 1.0
+    if not np.isfinite(statistic):
+        return 0.0
+    a, x = dof / 2.0, statistic / 2.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if term < total * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def check_distributions(table_name: str, df: pd.DataFrame, specs: List[Dict[str, Any]], state: Dict[str, Any]) -> None:
+    """
+    Accumulate observed frequencies and moments of one table (or one streamed chunk of it).
+    
+    Counts and sums add up across chunks, so calling this once per chunk gives the same
+    report as one call on the whole table. Specs with a unit column count the first row of
+    each unit, per call, so a unit's rows must not span chunks. Specs whose column is missing
+    are recorded as skipped.
+    """
+    results = state.setdefault('distributions', {})
+    skipped = state.setdefault('skipped', set())
+    timings = state.setdefault('tables', {})
+    for spec in specs:
+        if spec['table'] != table_name:
+            continue
+        unit = spec.get('unit_column')
+        if spec['column'] not in df.columns or (unit and unit not in df.columns):
+            skipped.add(spec['name'])
+            continue
+        started = time.perf_counter()
+        values = df[spec['column']]
+        if unit:
+            values = values[~df[unit].duplicated().to_numpy()]
+        if spec['kind'] == 'frequencies':
+            result = results.setdefault(spec['name'], {'counts': np.zeros(len(spec['labels']) + 1, dtype=np.int64)})
+            result['counts'] += observed_frequencies(values, spec['labels'])
+        else:
+            present = values.to_numpy(dtype=float, na_value=np.nan)
+            present = present[~np.isnan(present)]
+            result = results.setdefault(spec['name'], {'n': 0, 'sum': 0.0, 'sum_squares': 0.0})
+            result['n'] += len(present)
+            result['sum'] += float(present.sum())
+            result['sum_squares'] += float(np.dot(present, present))
+        elapsed = time.perf_counter() - started
+        result['seconds'] = result.get('seconds', 0.0) + elapsed
+        timings[table_name] = timings.get(table_name, 0.0) + elapsed
+
+
+def summarize_distributions(state: Dict[str, Any], specs: List[Dict[str, Any]], tolerance: float = 0.02,
+                            alpha: float = 0.001) -> Dict[str, Any]:
+    """
+    Test accumulated frequencies and averages against their configured values.
+    
+    A distribution deviates when some value's observed share is more than tolerance away
+    from its configured share (values not in the config count as configured at 0) and a
+    chi-square goodness-of-fit test rejects it at alpha. An average deviates when it is
+    more than tolerance away from its target in relative terms and a z-test rejects it.
+    Requiring both keeps small tables (15 facilities) from failing on sampling noise and
+    large ones (millions of rows) from failing on negligible but significant differences.
+    """
+    results = state.get('distributions', {})
+    report, failures = {}, []
+    for spec in specs:
+        if spec['name'] not in results:
+            continue
+        result = results[spec['name']]
+        entry = {'table': spec['table'], 'column': spec['column'], 'seconds': result['seconds']}
+        if spec.get('unit_column'):
+            entry['unit_column'] = spec['unit_column']
+        if spec['kind'] == 'frequencies':
+            counts = result['counts']
+            rows = int(counts.sum())
+            observed = counts / max(rows, 1)
+            expected = np.append(spec['expected'], 0.0)
+            deviation = np.abs(observed - expected)
+            expected_counts = expected * rows
+            positive = expected_counts > 0
+            if counts[~positive].any():
+                statistic = float('inf')
+            else:
+                statistic = float((((counts - expected_counts)[positive]) ** 2 / expected_counts[positive]).sum())
+            p_value = _chi_square_sf(statistic, max(int(positive.sum()) - 1, 1)) if rows else 1.0
+            worst = int(deviation.argmax())
+            entry.update({
+                'rows': rows,
+                'observed': dict(zip(spec['values'] + ['(other)'], np.round(observed, 4).tolist())),
+                'expected': dict(zip(spec['values'], np.round(spec['expected'], 4).tolist())),
+                'max_deviation': float(deviation[worst]),
+                'chi_square': statistic,
+                'p_value': p_value
+            })
+            if deviation[worst] > tolerance and p_value < alpha:
+                value = (spec['values'] + ['(other)'])[worst]
+                units = f"distinct {spec['unit_column']}" if spec.get('unit_column') else 'rows'
+                failures.append(f"{spec['name']} -> {spec['table']}.{spec['column']}: '{value}' is "
+                                f"{observed[worst]:.1%} vs {expected[worst]:.1%} configured "
+                                f"(chi-square {statistic:.1f}, p={p_value:.2g}, {rows:,} {units})")
+        else:
+            n = result['n']
+            mean = result['sum'] / n if n else float('nan')
+            variance = max(result['sum_squares'] / n - mean ** 2, 0.0) if n else 0.0
+            relative = abs(mean / spec['target'] - 1) if n and spec['target'] else 0.0
+            z = abs(mean - spec['target']) / math.sqrt(variance / n) if n and variance else (float('inf') if relative else 0.0)
+            p_value = math.erfc(z / math.sqrt(2))
+            entry.update({'rows': n, 'mean': mean, 'target': spec['target'], 'relative_deviation': relative,
+                          'z': z, 'p_value': p_value})
+            if relative > tolerance and p_value < alpha:
+                failures.append(f"{spec['name']} -> {spec['table']}.{spec['column']}: average {mean:,.4g} vs "
+                                f"{spec['target']:,.4g} configured ({relative:.1%} off, p={p_value:.2g}, {n:,} rows)")
+        report[spec['name']] = entry
+    return {
+        'passed': not failures,
+        'failures': failures,
+        'distributions': report,
+        'checked': len(report),
+        'skipped': sorted(state.get('skipped', set()) - set(report)),
+        'tables': dict(state.get('tables', {})),
+        'seconds': sum(entry['seconds'] for entry in report.values())
+    }
 
-def validate_referential_integrity(tables: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
-    """Validate foreign key relationships."""
-    # TODO: Implement FK validation
-    return {'passed': True, 'failures': []}
 
-def validate_business_rules(tables: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
-    """Validate business rules (dates, amounts, etc.)."""
-    # TODO: Implement business rule validation
-    return {'passed': True, 'failures': []}
+def validate_distributions(tables: Dict[str, pd.DataFrame], specs: List[Dict[str, Any]],
+                           state: Optional[Dict[str, Any]] = None, tolerance: float = 0.02,
+                           alpha: float = 0.001) -> Dict[str, Any]:
+    """
+    Check configured distributions and averages across all in-memory tables.
+    
+    Args:
+        tables: Tables to check
+        specs: Output of resolve_distributions
+        state: Accumulator already holding counts for streamed tables, if any
+        tolerance: Max absolute share deviation (relative deviation for averages)
+        alpha: Significance level of the chi-square and z tests
+    
+    Returns:
+        Report with passed, failures (one line per deviating distribution), observed and
+        expected shares with test statistics per distribution, seconds per table, and the
+        distributions skipped because their column is not generated
+    """
+    state = {} if state is None else state
+    for table_name, df in tables.items():
+        check_distributions(table_name, df, specs, state)
+    return summarize_distributions(state, specs, tolerance, alpha)
@@ -0,0 +1,96 @@
+"""
+Identifier Formatting Utilities
+Vectorized construction, parsing and shifting of zero-padded business keys (e.g. ORD_00000042)
+"""
+
+import numpy as np
+
+
+def _digits(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    """
+    ASCII digits of zero-padded numbers as a (rows, width) uint8 matrix.
+    
+    Raises:
+        ValueError: If a number is negative or needs more than `width` digits, which
+            would otherwise wrap around into another key
+    """
+    if len(numbers) and (numbers.min() < 0 or numbers.max() >= 10 ** width):
+        bad = numbers.min() if numbers.min() < 0 else numbers.max()
+        raise ValueError(f"{prefix} key number {bad:,} does not fit in {width} digits; widen the key")
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return ((numbers[:, np.newaxis] // powers) % 10 + ord('0')).astype(np.uint8)
+
+
+def format_ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    """
+    Format integers as '<prefix><zero-padded number>' without a per-row Python loop.
+    
+    Digits are computed arithmetically into a fixed-width byte buffer, which is far
+    faster than f-strings or np.char for millions of keys.
+    
+    Args:
+        prefix: Key prefix, e.g. 'ORD_'
+        numbers: Non-negative integers, each with at most `width` digits
+        width: Zero-padded digit count
+    
+    Returns:
+        Unicode string array of keys
+    
+    Raises:
+        ValueError: If a number does not fit in `width` digits
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    prefix_bytes = np.frombuffer(prefix.encode('ascii'), dtype=np.uint8)
+    buffer = np.empty((len(numbers), len(prefix_bytes) + width), dtype=np.uint8)
+    buffer[:, :len(prefix_bytes)] = prefix_bytes
+    buffer[:, len(prefix_bytes):] = _digits(prefix, numbers, width)
+    return buffer.view(f'S{buffer.shape[1]}').ravel().astype(f'U{buffer.shape[1]}')
+
+
+def _key_bytes(values: np.ndarray) -> np.ndarray:
+    """Fixed-width keys as a (rows, characters) uint8 matrix."""
+    keys = np.asarray(values).astype('S')
+    return keys.view(np.uint8).reshape(len(keys), keys.dtype.itemsize)
+
+
+def parse_ids(prefix: str, values: np.ndarray, width: int) -> np.ndarray:
+    """
+    Numbers of keys built by format_ids, also when a suffix follows the digits (ORD_00000042_L01).
+    
+    Args:
+        prefix: Key prefix, e.g. 'ORD_'
+        values: Keys of equal length, without nulls
+        width: Zero-padded digit count
+    
+    Returns:
+        int64 array of the numbers
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    digits = _key_bytes(values)[:, len(prefix):len(prefix) + width].astype(np.int64) - ord('0')
+    return digits @ (10 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+
+
+def shift_ids(prefix: str, values: np.ndarray, width: int, offset: int) -> np.ndarray:
+    """
+    Add an offset to the numbers of format_ids keys in place of a per-row Python loop, keeping
+    prefix and any suffix (ORD_00000042_L01 + 100 = ORD_00000142_L01).
+    
+    Args:
+        prefix: Key prefix, e.g. 'ORD_'
+        values: Keys of equal length, without nulls
+        width: Zero-padded digit count
+        offset: Amount added to every number
+    
+    Returns:
+        Unicode string array of keys
+    
+    Raises:
+        ValueError: If a shifted number does not fit in `width` digits
+    """
+    if len(values) == 0:
+        return np.asarray(values)
+    buffer = _key_bytes(values).copy()
+    numbers = parse_ids(prefix, values, width) + offset
+    buffer[:, len(prefix):len(prefix) + width] = _digits(prefix, numbers, width)
+    return buffer.view(f'S{buffer.shape[1]}').ravel().astype(f'U{buffer.shape[1]}')
@@ -0,0 +1,116 @@
+"""
+Machine Telemetry Engine
+Vectorized machine state timelines (run, stop, breakdown, changeover) sampled at sensor frequency
+"""
+
+import numpy as np
+from typing import Dict, Sequence
+
+# State codes shared by the simulation, OEE accounting and downtime extraction
+STATE_RUNNING, STATE_MINOR_STOP, STATE_CHANGEOVER, STATE_BREAKDOWN, STATE_OFF = range(5)
+MACHINE_STATES = ['Running', 'Minor Stop', 'Changeover', 'Breakdown', 'Off']
+DOWNTIME_STATES = [STATE_MINOR_STOP, STATE_CHANGEOVER, STATE_BREAKDOWN]
+
+
+def sample_machine_states(sample_times: np.ndarray, shift_starts: Sequence[float], shift_end: float,
+                          mtbf_seconds: np.ndarray, mttr_seconds: np.ndarray, minor_stop_gap_seconds: float,
+                          minor_stop_seconds: float, changeover_seconds: np.ndarray,
+                          rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    Sample the state of every machine at every sensor timestamp of one scheduled day.
+    
+    Each machine alternates run periods and stops (an alternating renewal process). Run
+    periods end at the combined rate of breakdowns (1 / MTBF) and minor stops, so each stop
+    is a breakdown with probability rate_b / (rate_b + rate_m) and lasts Exp(MTTR) or
+    Exp(minor_stop_seconds). Cycles are drawn for all machines at once in blocks until every
+    timeline covers the schedule, and samples are located on the cycle boundaries with a
+    single searchsorted over row-offset timelines. Changeovers occupy the start of each
+    shift, and samples outside the schedule are Off.
+    
+    Args:
+        sample_times: Seconds since midnight of each sample
+        shift_starts: Start of each shift (seconds since midnight); the first opens the schedule
+        shift_end: End of the last shift
+        mtbf_seconds: Mean run time between breakdowns per machine
+        mttr_seconds: Mean time to repair per machine
+        minor_stop_gap_seconds: Mean run time between minor stops
+        minor_stop_seconds: Mean minor stop duration
+        changeover_seconds: Changeover duration per machine and shift (machines x shifts)
+        rng: Random generator
+    
+    Returns:
+        Dictionary of machines x samples arrays: state (int8 codes) and seconds_to_breakdown
+        (time until the next breakdown starts, inf if none today)
+    """
+    num_machines, num_samples = len(mtbf_seconds), len(sample_times)
+    schedule_start = float(shift_starts[0])
+    
+    breakdown_rate = 1 / np.asarray(mtbf_seconds, dtype=float)
+    stop_rate = breakdown_rate + 1 / minor_stop_gap_seconds
+    breakdown_share = breakdown_rate / stop_rate
+    
+    # Draw run/stop cycles in blocks until every machine's timeline passes the end of the schedule
+    block = max(4, int(np.ceil((shift_end - schedule_start) * stop_rate.max() * 1.5)))
+    run_ends, stop_ends, is_breakdown = [], [], []
+    clock = np.full(num_machines, schedule_start)
+    while (clock < shift_end).any():
+        run = rng.exponential(1, (num_machines, block)) / stop_rate[:, np.newaxis]
+        breakdown = rng.random((num_machines, block)) < breakdown_share[:, np.newaxis]
+        stop = np.where(breakdown, rng.exponential(1, (num_machines, block)) * np.asarray(mttr_seconds)[:, np.newaxis],
+                        rng.exponential(minor_stop_seconds, (num_machines, block)))
+        cycle_end = clock[:, np.newaxis] + np.cumsum(run + stop, axis=1)
+        run_ends.append(cycle_end - stop)
+        stop_ends.append(cycle_end)
+        is_breakdown.append(breakdown)
+        clock = cycle_end[:, -1]
+    run_end = np.hstack(run_ends)
+    stop_end = np.hstack(stop_ends)
+    is_breakdown = np.hstack(is_breakdown)
+    
+    # Row offsets turn per-machine searches into one search over a flattened timeline
+    span = shift_end + 2 * 86400.0
+    offset = np.arange(num_machines)[:, np.newaxis] * span
+    capped_end = np.minimum(stop_end, span / 2)
+    query = sample_times[np.newaxis, :] + offset
+    cycle = np.searchsorted((capped_end + offset).ravel(), query.ravel(), side='right').reshape(num_machines, num_samples)
+    cycle -= np.arange(num_machines)[:, np.newaxis] * run_end.shape[1]
+    cycle = np.minimum(cycle, run_end.shape[1] - 1)
+    
+    rows = np.arange(num_machines)[:, np.newaxis]
+    in_run = sample_times[np.newaxis, :] < run_end[rows, cycle]
+    state = np.where(in_run, STATE_RUNNING,
+                     np.where(is_breakdown[rows, cycle], STATE_BREAKDOWN, STATE_MINOR_STOP)).astype(np.int8)
+    
+    for shift, start in enumerate(shift_starts):
+        in_changeover = (sample_times >= start)[np.newaxis, :] & \
+                        (sample_times[np.newaxis, :] < start + changeover_seconds[:, shift:shift + 1])
+        state[in_changeover] = STATE_CHANGEOVER
+    state[:, (sample_times < schedule_start) | (sample_times >= shift_end)] = STATE_OFF
+    
+    # Next breakdown start at or after each sample
+    breakdown_start = np.where(is_breakdown, np.minimum(run_end, span / 2), span / 2)
+    breakdown_start = np.sort(breakdown_start, axis=1) + offset
+    next_idx = np.searchsorted(breakdown_start.ravel(), query.ravel()).reshape(num_machines, num_samples)
+    next_start = breakdown_start.ravel()[np.minimum(next_idx, breakdown_start.size - 1)] - offset
+    seconds_to_breakdown = np.where(next_start < span / 2, next_start - sample_times[np.newaxis, :], np.inf)
+    
+    return {'state': state, 'seconds_to_breakdown': seconds_to_breakdown}
+
+
+def state_runs(state: np.ndarray, codes: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Run-length encode a machines x samples state matrix, keeping runs of the given codes.
+    
+    Returns:
+        Dictionary of aligned arrays: machine (row), start (sample index), length (samples)
+        and state (code)
+    """
+    num_machines, num_samples = state.shape
+    changes = np.ones(state.shape, dtype=bool)
+    changes[:, 1:] = state[:, 1:] != state[:, :-1]
+    starts = np.flatnonzero(changes)
+    lengths = np.diff(np.r_[starts, state.size])
+    codes_at_start = state.ravel()[starts]
+    keep = np.isin(codes_at_start, codes)
+    machine, start = np.divmod(starts[keep], num_samples)
+    return {'machine': machine, 'start': start, 'length': lengths[keep], 'state': codes_at_start[keep]}
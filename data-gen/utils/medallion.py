@@ -0,0 +1,465 @@
+"""
+Medallion Transformations
+Bronze -> Silver -> Gold table definitions shared by the Fabric notebooks (Spark SQL) and a
+local DuckDB engine that runs them over the generated files in seconds, plus the
+watermark-based incremental MERGE of Bronze deltas into Silver (Delta only)
+
+The definitions only use SQL that Spark and DuckDB both accept, so the notebooks execute
+exactly what is iterated on locally. This module has no dependency on the rest of
+data-gen and is copied to the lakehouse (Files/code/medallion.py) by upload_to_fabric.py.
+"""
+
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Lineage columns added by Bronze ingestion and dropped in Gold
+METADATA_COLUMNS = ['_ingestion_timestamp', '_source_file']
+
+# Natural key of each table; Silver keeps the latest Bronze row (by _ingestion_timestamp) per key.
+# Tables without an entry are passed through without deduplication. Facts generated with
+# surrogate keys (surrogate_keys.enabled) carry <name>_key in place of an <name>_id listed here.
+TABLE_KEYS: Dict[str, List[str]] = {
+    # Conformed dimensions
+    'DimDate': ['date_id'],
+    'DimCustomer': ['customer_id'],
+    'DimProduct': ['product_id'],
+    'DimEmployee': ['employee_id'],
+    'DimGeography': ['geography_id'],
+    'DimFacility': ['facility_id'],
+    'DimProject': ['project_id'],
+    'DimAccount': ['account_id'],
+    # SCD2 histories (scd2.enabled), one row per member version
+    'DimCustomerHistory': ['customer_version_key'],
+    'DimProductHistory': ['product_version_key'],
+    'DimEmployeeHistory': ['employee_version_key'],
+    # CRM
+    'FactOpportunities': ['opportunity_id'],
+    'FactActivities': ['activity_id'],
+    # Sales
+    'FactSales': ['order_id', 'order_line_id'],
+    'FactReturns': ['return_id'],
+    # Product
+    'DimProductBOM': ['parent_product_id', 'component_product_id'],
+    'DimProductBOMExplosion': ['root_product_id', 'component_product_id', 'bom_level'],
+    # Marketing
+    'FactCampaigns': ['campaign_id'],
+    # HR
+    'FactAttrition': ['employee_id'],
+    'FactHiring': ['req_id'],
+    'FactHeadcountDaily': ['snapshot_date', 'department', 'location', 'employment_type'],
+    # Supply chain
+    'FactInventory': ['snapshot_date', 'warehouse_id', 'product_id'],
+    'FactPurchaseOrders': ['po_id', 'po_line_id'],
+    # Manufacturing
+    'DimMachine': ['machine_id'],
+    'FactWorkOrders': ['work_order_id'],
+    'FactProduction': ['production_id'],
+    'FactMachineDowntime': ['downtime_id'],
+    'FactMachineTelemetry': ['machine_id', 'telemetry_timestamp'],
+    # Finance
+    'FactGeneralLedger': ['journal_entry_id', 'line_number'],
+    'FactBudget': ['budget_id'],
+    # ESG
+    'FactEmissions': ['facility_id', 'measurement_date'],
+    'FactEnergyConsumption': ['meter_id', 'reading_timestamp'],
+    'FactSupplierEmissions': ['supplier_id', 'measurement_date'],
+    # Call center
+    'FactSupport': ['ticket_id'],
+    'FactAgentIntervals': ['queue', 'interval_start'],
+    # IT Ops
+    'FactIncidents': ['incident_id'],
+    'FactAlerts': ['alert_id'],
+    # FinOps
+    'DimCloudResource': ['resource_id'],
+    'FactCloudCosts': ['resource_id', 'usage_date_id', 'usage_hour'],
+    # Risk & compliance
+    'DimControl': ['control_id'],
+    'FactRisks': ['risk_id'],
+    'FactAudits': ['audit_id'],
+    'FactComplianceChecks': ['check_id'],
+    # R&D
+    'FactExperiments': ['experiment_id'],
+    # Quality & security
+    'FactDefects': ['defect_id'],
+    'FactSecurityEvents': ['event_id']
+}
+
+# Table-specific Silver rules on top of deduplication: expressions replacing a column,
+# derived columns appended at the end, and row filters (applied to the Bronze values)
+SILVER_RULES: Dict[str, Dict[str, Any]] = {
+    'DimCustomer': {
+        'replace': {'customer_name': 'trim(customer_name)', 'country': 'upper(country)', 'region': 'upper(region)'},
+        'derive': {'customer_age_days': 'days_since(customer_since)'}
+    },
+    'FactSales': {
+        'replace': {'status': 'upper(substr(status, 1, 1)) || lower(substr(status, 2))'},
+        'derive': {
+            'margin_percent': 'CASE WHEN net_amount > 0 THEN gross_margin / net_amount * 100 ELSE 0 END',
+            'is_same_day_delivery': 'order_date_id = delivery_date_id'
+        },
+        'filter': ['net_amount >= 0', 'quantity > 0']
+    }
+}
+
+# CDC feed columns (generators/cdc_generator.py): rows carrying the delete operation remove their
+# key from Silver, and the sequence orders changes to one key ingested in the same batch
+OPERATION_COLUMN = '_op'
+DELETE_OPERATION = 'D'
+SEQUENCE_COLUMN = '_sequence'
+CDC_COLUMNS = [OPERATION_COLUMN, SEQUENCE_COLUMN]
+
+# Control table holding, per Silver table, the last Bronze _ingestion_timestamp merged into it
+WATERMARK_TABLE = 'silver_watermarks'
+
+# Column of a change set marking the keys to delete rather than upsert
+DELETE_FLAG = '_silver_delete'
+
+# Gold facts get a year_month partition column from the first of these date keys they have
+GOLD_PARTITION_COLUMN = 'year_month'
+PARTITION_SOURCES = ['order_date_id', 'create_date_id']
+
+# The few functions whose spelling differs between engines, written as macro(column)
+DIALECT_MACROS = {
+    'spark': {'days_since': 'datediff(current_date(), {0})'},
+    'duckdb': {'days_since': "date_diff('day', CAST({0} AS DATE), current_date)"}
+}
+
+
+def silver_table_name(table: str) -> str:
+    """Silver table name of a Bronze table (silver_dimcustomer)."""
+    return f"silver_{table.lower()}"
+
+
+def gold_table_name(table: str) -> str:
+    """Gold table name of a Bronze table (gold_dimcustomer, gold_factsales)."""
+    return f"gold_{table.lower()}"
+
+
+def _table_entry(mapping: Dict[str, Any], table: str, default: Any) -> Any:
+    """Entry of a table in a definition map; Spark catalogs may report names in lower case."""
+    return next((value for name, value in mapping.items() if name.lower() == table.lower()), default)
+
+
+def _render(expression: str, dialect: str) -> str:
+    """Expand dialect macros such as days_since(col) in an expression."""
+    for macro, template in DIALECT_MACROS[dialect].items():
+        expression = re.sub(rf"\b{macro}\((\w+)\)", lambda m: template.format(m.group(1)), expression)
+    return expression
+
+
+def _silver_select(table: str, columns: List[str], dialect: str) -> Tuple[List[str], List[str]]:
+    """Select list and row filters of the Silver version of a Bronze table."""
+    rules = _table_entry(SILVER_RULES, table, {})
+    replace = rules.get('replace', {})
+    select = [f"{_render(replace[c], dialect)} AS {c}" if c in replace else c
+              for c in columns if c not in CDC_COLUMNS]
+    select += [f"{_render(expr, dialect)} AS {name}" for name, expr in rules.get('derive', {}).items()]
+    return select, list(rules.get('filter', []))
+
+
+def _latest_rows(keys: List[str], columns: List[str], source: str) -> str:
+    """Relation numbering the rows of each key, latest ingestion (then latest CDC sequence) first."""
+    order = '_ingestion_timestamp DESC' + (f", {SEQUENCE_COLUMN} DESC" if SEQUENCE_COLUMN in columns else '')
+    return (f"(SELECT *, row_number() OVER (PARTITION BY {', '.join(keys)} "
+            f"ORDER BY {order}) AS _row_number FROM {source}) AS bronze")
+
+
+def _key_in(column: str, columns: List[str]) -> Optional[str]:
+    """A TABLE_KEYS column as present in a table: itself, or its integer surrogate (warehouse_id -> warehouse_key)."""
+    if column in columns:
+        return column
+    surrogate = f"{column[:-len('_id')]}_key" if column.endswith('_id') else None
+    return surrogate if surrogate in columns else None
+
+
+def incremental_keys(table: str, columns: List[str]) -> List[str]:
+    """Natural key of a table if it can be merged incrementally (key and watermark columns present), else []."""
+    keys = [_key_in(k, columns) for k in _table_entry(TABLE_KEYS, table, [])]
+    if keys and all(keys) and '_ingestion_timestamp' in columns:
+        return keys
+    return []
+
+
+def silver_columns(table: str, columns: List[str]) -> List[str]:
+    """Column names of the Silver table built from Bronze columns."""
+    rules = _table_entry(SILVER_RULES, table, {})
+    return [c for c in columns if c not in CDC_COLUMNS] + list(rules.get('derive', {}))
+
+
+def silver_sql(table: str, columns: List[str], source: Optional[str] = None, dialect: str = 'spark') -> str:
+    """
+    SELECT statement building the Silver version of a Bronze table (full refresh).
+    
+    Args:
+        table: Bronze table name (e.g. DimCustomer, any case)
+        columns: Columns of the Bronze table, in order
+        source: Relation to read (defaults to the table name)
+        dialect: 'spark' or 'duckdb'
+    
+    Returns:
+        SQL keeping the latest row per TABLE_KEYS key and applying SILVER_RULES
+    """
+    select, conditions = _silver_select(table, columns, dialect)
+    keys = incremental_keys(table, columns)
+    source = source or table
+    if keys:
+        source = _latest_rows(keys, columns, source)
+        conditions.insert(0, '_row_number = 1')
+    if OPERATION_COLUMN in columns:
+        conditions.append(f"coalesce({OPERATION_COLUMN}, '') <> '{DELETE_OPERATION}'")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    return f"SELECT {', '.join(select)} FROM {source}{where}"
+
+
+def _timestamp(value: Any) -> str:
+    """Timestamp literal both engines parse."""
+    text = value.isoformat(sep=' ') if hasattr(value, 'isoformat') else str(value)
+    return f"TIMESTAMP '{text}'"
+
+
+def silver_changes_sql(table: str, columns: List[str], low: Any, high: Any, source: Optional[str] = None,
+                       dialect: str = 'spark') -> str:
+    """
+    SELECT statement building the change set of a Silver table from the Bronze rows ingested
+    after the previous watermark: the latest row per key in (low, high], with Silver rules
+    applied and a DELETE_FLAG column set for CDC deletes and rows that fail the Silver filters.
+    
+    Args:
+        table: Bronze table name
+        columns: Columns of the Bronze table, in order
+        low: Previous watermark (exclusive; None reads from the beginning)
+        high: New watermark (inclusive), captured before reading so late commits wait for the next run
+        source: Relation to read (defaults to the table name)
+        dialect: 'spark' or 'duckdb'
+    
+    Returns:
+        SQL of silver_columns() plus DELETE_FLAG, one row per changed key
+    """
+    keys = incremental_keys(table, columns)
+    if not keys:
+        raise ValueError(f"{table} has no natural key or _ingestion_timestamp; use a full refresh")
+    select, conditions = _silver_select(table, columns, dialect)
+    delete = [f"NOT coalesce({' AND '.join(conditions)}, false)"] if conditions else []
+    if OPERATION_COLUMN in columns:
+        delete.insert(0, f"coalesce({OPERATION_COLUMN} = '{DELETE_OPERATION}', false)")
+    select.append(f"{' OR '.join(delete) if delete else 'false'} AS {DELETE_FLAG}")
+    
+    window = [f"_ingestion_timestamp <= {_timestamp(high)}"]
+    if low is not None:
+        window.insert(0, f"_ingestion_timestamp > {_timestamp(low)}")
+    delta = f"(SELECT * FROM {source or table} WHERE {' AND '.join(window)}) AS delta"
+    return f"SELECT {', '.join(select)} FROM {_latest_rows(keys, columns, delta)} WHERE _row_number = 1"
+
+
+def silver_merge_sql(table: str, columns: List[str], changes: str, target: Optional[str] = None) -> str:
+    """
+    Delta MERGE applying a silver_changes_sql() change set (registered as `changes`) to the
+    Silver table: deletes flagged keys, updates existing keys and inserts new ones.
+    
+    Args:
+        table: Bronze table name
+        columns: Columns of the Bronze table, in order
+        changes: Relation holding the change set
+        target: Silver table (defaults to silver_table_name(table))
+    """
+    keys = incremental_keys(table, columns)
+    if not keys:
+        raise ValueError(f"{table} has no natural key or _ingestion_timestamp; use a full refresh")
+    names = silver_columns(table, columns)
+    match = ' AND '.join(f"target.{k} = changes.{k}" for k in keys)
+    updates = ', '.join(f"{c} = changes.{c}" for c in names)
+    return (f"MERGE INTO {target or silver_table_name(table)} AS target USING {changes} AS changes ON {match} "
+            f"WHEN MATCHED AND changes.{DELETE_FLAG} THEN DELETE "
+            f"WHEN MATCHED THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED AND NOT changes.{DELETE_FLAG} THEN INSERT ({', '.join(names)}) "
+            f"VALUES ({', '.join(f'changes.{c}' for c in names)})")
+
+
+def watermark_table_sql() -> str:
+    """CREATE statement of the watermark control table (Delta)."""
+    return (f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (table_name STRING, watermark TIMESTAMP, "
+            f"refresh_mode STRING, rows_merged BIGINT, updated_at TIMESTAMP) USING DELTA")
+
+
+def watermark_update_sql(table: str, watermark: Any, refresh_mode: str, rows_merged: int) -> str:
+    """MERGE recording the watermark a Silver table has been refreshed up to."""
+    return (f"MERGE INTO {WATERMARK_TABLE} AS target USING (SELECT '{silver_table_name(table)}' AS table_name, "
+            f"{_timestamp(watermark)} AS watermark, '{refresh_mode}' AS refresh_mode, "
+            f"CAST({int(rows_merged)} AS BIGINT) AS rows_merged, current_timestamp() AS updated_at) AS source "
+            f"ON target.table_name = source.table_name "
+            f"WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *")
+
+
+def gold_partition_column(table: str, columns: List[str]) -> Optional[str]:
+    """year_month for fact tables that have one of PARTITION_SOURCES, else None."""
+    if table.lower().startswith('fact') and any(c in columns for c in PARTITION_SOURCES):
+        return GOLD_PARTITION_COLUMN
+    return None
+
+
+def gold_sql(table: str, columns: List[str], source: Optional[str] = None) -> str:
+    """
+    SELECT statement building the Gold version of a table from its Silver columns: business
+    columns only, plus the year_month partition column for partitioned facts.
+    """
+    select = [c for c in columns if c not in METADATA_COLUMNS]
+    if gold_partition_column(table, columns):
+        date_key = next(c for c in PARTITION_SOURCES if c in columns)
+        select.append(f"substr(CAST({date_key} AS STRING), 1, 6) AS {GOLD_PARTITION_COLUMN}")
+    return f"SELECT {', '.join(select)} FROM {source or silver_table_name(table)}"
+
+
+# ===== Local engine =====
+
+def discover_bronze_tables(structured_path: Path) -> Dict[str, Tuple[str, Path]]:
+    """
+    Find the generated Bronze files: <domain>/<Table>.parquet|.csv|.csv.gz, or a Hive-style
+    <domain>/<Table>/ folder for partitioned tables. Parquet wins when both formats exist.
+    
+    Returns:
+        {table: (format, path)} with format 'parquet' or 'csv'
+    """
+    found = {}
+    # increments/ and cdc/ hold --append-days and --cdc-batches batches, ingested by the Fabric
+    # pipeline in append mode; keymaps/ holds the generator's surrogate key maps, not tables
+    for domain_path in sorted(p for p in Path(structured_path).iterdir()
+                              if p.is_dir() and p.name not in ('increments', 'cdc', 'keymaps')):
+        for path in sorted(domain_path.iterdir()):
+            if path.is_dir():
+                fmt = 'parquet' if any(path.rglob('*.parquet')) else 'csv'
+                found.setdefault(path.name, (fmt, path))
+            elif path.name.endswith('.parquet'):
+                found[path.name[:-len('.parquet')]] = ('parquet', path)
+            elif path.name.endswith(('.csv', '.csv.gz')):
+                found.setdefault(path.name.split('.')[0], ('csv', path))
+    return found
+
+
+def _partition_dirs(path: Path) -> List[Path]:
+    """Leaf <column>=<value> folders of a Hive-style partitioned table, in path order."""
+    return sorted({file.parent for file in path.rglob('part-*')})
+
+
+def _quote(path: Path) -> str:
+    """Path as a SQL string literal."""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _duckdb_reader(fmt: str, path: Path) -> str:
+    """DuckDB table function reading one file or a (partitioned) folder of part files."""
+    if not path.is_dir():
+        if fmt == 'parquet':
+            return f"read_parquet({_quote(path)})"
+        return f"read_csv_auto({_quote(path)}, header = true)"
+    files = _quote(path / '**' / ('*.parquet' if fmt == 'parquet' else 'part-*.csv*'))
+    if fmt == 'parquet':
+        return f"read_parquet({files}, hive_partitioning = true)"
+    return f"read_csv_auto({files}, header = true, hive_partitioning = true)"
+
+
+def _bronze_relation(fmt: str, path: Path) -> str:
+    """Bronze rows of a file or folder with the lineage columns the ingestion notebook adds."""
+    return (f"(SELECT *, current_timestamp AS _ingestion_timestamp, {_quote(path)} AS _source_file "
+            f"FROM {_duckdb_reader(fmt, path)}) AS source")
+
+
+def run_medallion(structured_path: Path, lakehouse_path: Path, tables: Optional[List[str]] = None,
+                  threads: int = 0) -> Dict[str, Any]:
+    """
+    Run Bronze -> Silver -> Gold locally with DuckDB over the generated files.
+    
+    Bronze tables are views over the generated files. Silver and Gold tables are written as
+    Parquet under <lakehouse_path>/Tables/<name>.parquet and registered as views, so each
+    stage reads the previous one by name. Hive-partitioned Bronze tables (machine telemetry)
+    keep their partitioning and are transformed one partition at a time, which bounds
+    memory; their natural keys determine the partition, so per-partition deduplication is
+    the same as deduplicating the whole table. Other Gold facts with a year_month column
+    are written partitioned by it, as in the Gold notebook.
+    
+    Args:
+        structured_path: Generated Bronze files (output.structured_path)
+        lakehouse_path: Where the Silver and Gold tables are written
+        tables: Bronze table names to run (default: all found)
+        threads: DuckDB threads (0 = one per CPU)
+    
+    Returns:
+        Seconds per stage, and rows and seconds per table and stage
+    """
+    import duckdb
+    
+    bronze = discover_bronze_tables(structured_path)
+    if tables:
+        bronze = {name: bronze[name] for name in tables if name in bronze}
+    tables_path = Path(lakehouse_path) / 'Tables'
+    tables_path.mkdir(parents=True, exist_ok=True)
+    
+    # Large sorts spill to disk instead of running out of memory; row order is not preserved
+    con = duckdb.connect(config={'temp_directory': str(Path(lakehouse_path) / '.duckdb_tmp'),
+                                 'preserve_insertion_order': False})
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    report = {'stages': {}, 'tables': {}}
+    
+    def _columns(relation: str) -> List[str]:
+        return [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()]
+    
+    def _write(name: str, build_sql, source_fmt: str, source_path: Path, partition_column: Optional[str]) -> int:
+        """Write one Silver/Gold table from a source file or, partition by partition, a source folder."""
+        target = tables_path / (f"{name}.parquet" if not source_path.is_dir() and not partition_column else name)
+        if target.is_dir():
+            shutil.rmtree(target)
+        rows = 0
+        if source_path.is_dir():
+            for leaf in _partition_dirs(source_path):
+                relative = leaf.relative_to(source_path)
+                hive_columns = [part.split('=', 1)[0] for part in relative.parts]
+                sql = build_sql(_bronze_relation(source_fmt, leaf) if source_fmt else
+                                f"{_duckdb_reader('parquet', leaf)} AS source")
+                (target / relative).mkdir(parents=True, exist_ok=True)
+                rows += con.execute(f"COPY (SELECT * EXCLUDE ({', '.join(hive_columns)}) FROM ({sql})) "
+                                    f"TO {_quote(target / relative / 'part-00000.parquet')} (FORMAT PARQUET)").fetchone()[0]
+        else:
+            sql = build_sql(_bronze_relation(source_fmt, source_path) if source_fmt else
+                            f"{_duckdb_reader('parquet', source_path)} AS source")
+            options = f"FORMAT PARQUET, PARTITION_BY ({partition_column})" if partition_column else "FORMAT PARQUET"
+            rows = con.execute(f"COPY ({sql}) TO {_quote(target)} ({options})").fetchone()[0]
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {_duckdb_reader('parquet', target)}")
+        return int(rows)
+    
+    def _run_stage(stage: str, build) -> None:
+        started = time.perf_counter()
+        for table in bronze:
+            table_started = time.perf_counter()
+            name, rows = build(table)
+            report['tables'].setdefault(table, {})[stage] = {
+                'table': name, 'rows': rows, 'seconds': time.perf_counter() - table_started
+            }
+        report['stages'][stage] = time.perf_counter() - started
+    
+    def _bronze(table: str) -> Tuple[str, Optional[int]]:
+        con.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM {_bronze_relation(*bronze[table])}")
+        return table, None
+    
+    def _silver(table: str) -> Tuple[str, int]:
+        fmt, path = bronze[table]
+        columns = _columns(table)
+        name = silver_table_name(table)
+        return name, _write(name, lambda source: silver_sql(table, columns, source, dialect='duckdb'), fmt, path, None)
+    
+    def _gold(table: str) -> Tuple[str, int]:
+        silver_path = tables_path / silver_table_name(table)
+        silver_path = silver_path if silver_path.is_dir() else silver_path.with_suffix('.parquet')
+        columns = _columns(silver_table_name(table))
+        name = gold_table_name(table)
+        partition_column = None if silver_path.is_dir() else gold_partition_column(table, columns)
+        return name, _write(name, lambda source: gold_sql(table, columns, source), None, silver_path, partition_column)
+    
+    _run_stage('bronze', _bronze)
+    _run_stage('silver', _silver)
+    _run_stage('gold', _gold)
+    con.close()
+    report['seconds'] = sum(report['stages'].values())
+    return report
@@ -0,0 +1,114 @@
+"""
+Panel Engine
+Entity x period cross joins and vectorized trend / seasonality / AR(1) series for fact panels
+"""
+
+import numpy as np
+from typing import Optional, Tuple, Union
+
+
+def cross_join(entity_idx: np.ndarray, period_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Entity-major cross join of entity and period positions into preallocated int32 columns.
+    
+    Rows are ordered entity first, then period, so each entity's history is one contiguous
+    block and a (num_entities, num_periods) matrix from panel_series lines up with ravel().
+    
+    Returns:
+        (period_col, entity_col)
+    """
+    num_entities, num_periods = len(entity_idx), len(period_idx)
+    period_col = np.empty(num_entities * num_periods, dtype=np.int32)
+    entity_col = np.empty(num_entities * num_periods, dtype=np.int32)
+    period_col.reshape(num_entities, num_periods)[:] = np.asarray(period_idx)[np.newaxis, :]
+    entity_col.reshape(num_entities, num_periods)[:] = np.asarray(entity_idx)[:, np.newaxis]
+    return period_col, entity_col
+
+
+def ar1_noise(num_entities: int, num_periods: int, autocorrelation: float, volatility: float,
+              rng: np.random.Generator, initial_state: Optional[np.ndarray] = None,
+              block_size: int = 64) -> np.ndarray:
+    """
+    Stationary AR(1) noise x_t = phi x_{t-1} + e_t for every entity at once.
+    
+    The recursion is applied as a linear filter: within a block of periods, x = F e + phi^k x_0,
+    where F is the lower-triangular matrix of phi^(t-s). One matrix product per block replaces
+    a Python loop over periods; blocks keep F small on long panels. Innovations are scaled so
+    the marginal standard deviation is volatility.
+    
+    Args:
+        num_entities: Number of series
+        num_periods: Periods per series
+        autocorrelation: phi in [0, 1)
+        volatility: Marginal standard deviation of x
+        rng: Random generator
+        initial_state: x at the period before the first one (drawn from the stationary
+            distribution when None); pass the last column of a previous call to continue a series
+        block_size: Periods per filter block
+    
+    Returns:
+        (num_entities, num_periods) float array
+    """
+    phi = float(autocorrelation)
+    noise = np.empty((num_entities, num_periods))
+    if initial_state is None:
+        state = rng.normal(0, volatility, num_entities)
+    else:
+        state = np.asarray(initial_state, dtype=float)
+    innovation_sd = volatility * np.sqrt(1 - phi ** 2)
+    
+    block_size = max(1, min(block_size, num_periods))
+    lags = np.arange(block_size)[:, np.newaxis] - np.arange(block_size)[np.newaxis, :]
+    ar_filter = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0)
+    carry = phi ** np.arange(1, block_size + 1)
+    
+    for start in range(0, num_periods, block_size):
+        width = min(block_size, num_periods - start)
+        shocks = rng.normal(0, innovation_sd, (num_entities, width))
+        block = shocks @ ar_filter[:width, :width].T + state[:, np.newaxis] * carry[np.newaxis, :width]
+        noise[:, start:start + width] = block
+        state = block[:, -1]
+    
+    return noise
+
+
+def panel_series(level: Union[float, np.ndarray], num_periods: int, rng: np.random.Generator,
+                 periods_per_year: float = 12, growth_rate: float = 0.0,
+                 seasonal_amplitude: Union[float, np.ndarray] = 0.0,
+                 peak_period: Union[float, np.ndarray] = 0.0, autocorrelation: float = 0.0, volatility: float = 0.0,
+                 start_period: int = 0) -> np.ndarray:
+    """
+    Multiplicative entity x period series: level x trend x seasonality x exp(AR(1) noise).
+    
+    trend = (1 + growth_rate) ^ (t / periods_per_year), seasonality is an annual cosine
+    peaking at peak_period (period of the year), and the lognormal noise is mean-corrected
+    so each entity's expected value stays on its level x trend x seasonality curve.
+    
+    Args:
+        level: Base value per entity (scalar or array of length num_entities)
+        num_periods: Periods per entity
+        rng: Random generator
+        periods_per_year: 12 for monthly, 365.25 for daily panels
+        growth_rate: Compound annual growth (negative for reductions)
+        seasonal_amplitude: Relative swing of the annual cycle (0.1 = +/-10%), scalar or per entity
+        peak_period: Period of the year at which the cycle peaks, scalar or per entity
+        autocorrelation: AR(1) coefficient between consecutive periods
+        volatility: Marginal standard deviation of the log noise
+        start_period: Offset of the first period (for continuing a series)
+    
+    Returns:
+        (num_entities, num_periods) float array
+    """
+    level = np.atleast_1d(np.asarray(level, dtype=float))
+    t = start_period + np.arange(num_periods)
+    trend = (1 + growth_rate) ** (t / periods_per_year)
+    amplitude = np.asarray(seasonal_amplitude, dtype=float)[..., np.newaxis]
+    peak = np.asarray(peak_period, dtype=float)[..., np.newaxis]
+    seasonality = 1 + amplitude * np.cos(2 * np.pi * (t - peak) / periods_per_year)
+    series = level[:, np.newaxis] * trend[np.newaxis, :] * seasonality
+    
+    if volatility > 0:
+        noise = ar1_noise(len(level), num_periods, autocorrelation, volatility, rng)
+        series *= np.exp(noise - volatility ** 2 / 2)
+    
+    return series
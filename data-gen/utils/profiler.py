@@ -0,0 +1,333 @@
+"""
+Column Profiler
+Single-pass mergeable column sketches (moments, HyperLogLog, t-digest, top-k) built while tables are written.
+Counts, moments and HyperLogLog registers merge exactly; t-digest quantiles and top-k counts are
+approximate once a column outgrows its sketch, and then depend on how the rows were chunked.
+"""
+
+import base64
+import datetime
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+QUANTILES = [0.01, 0.05, 0.25, 0.50, 0.75, 0.95, 0.99]
+
+DEFAULT_SETTINGS = {
+    'hll_precision': 12,        # 2^12 registers, ~1.6% distinct-count error
+    'tdigest_compression': 200,  # ~100 centroids per column
+    'top_k': 10,                # Values reported per column
+    'top_capacity': 100         # Counters kept by the Misra-Gries summary
+}
+
+
+def profile_chunk(df: pd.DataFrame, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Sketch every column of one DataFrame (a whole table or one streamed chunk).
+    
+    Per column: row and null counts, min / max, count-mean-M2 moments, HyperLogLog
+    registers, t-digest centroids (numeric columns) and a Misra-Gries top-k summary
+    (string, boolean and integer columns). Sketches of disjoint chunks combine with merge_profiles.
+    
+    Args:
+        df: Data to profile
+        settings: Overrides for DEFAULT_SETTINGS
+    
+    Returns:
+        Profile dictionary: settings, rows and per-column sketches
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    columns = {}
+    for name in df.columns:
+        columns[name] = _sketch_column(df[name], settings)
+    return {'settings': settings, 'rows': len(df), 'columns': columns}
+
+
+def merge_profiles(a: Optional[Dict[str, Any]], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine profiles of disjoint row sets of the same table.
+    
+    Counts, nulls, min / max, moments (Chan et al. pairwise update) and HyperLogLog
+    registers (element-wise max) merge exactly, so those fields do not depend on how rows
+    were chunked. t-digest centroids are recompressed and top-k counters follow the
+    Misra-Gries merge, both within their usual error bounds; the top-k undercount bound
+    is tracked in top_error (0 while the counts are exact).
+    """
+    if a is None:
+        return b
+    columns = dict(a['columns'])
+    for name, sketch in b['columns'].items():
+        columns[name] = _merge_sketches(columns[name], sketch, a['settings']) if name in columns else sketch
+    return {'settings': a['settings'], 'rows': a['rows'] + b['rows'], 'columns': columns}
+
+
+def summarize_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON-ready profile: readable statistics per column plus the serialized sketch state,
+    so profiles read back with read_profile can still be merged.
+    """
+    settings = profile['settings']
+    columns = {}
+    for name, sketch in profile['columns'].items():
+        rows = sketch['count'] + sketch['nulls']
+        summary = {
+            'type': sketch['type'],
+            'dtype': sketch['dtype'],
+            'count': sketch['count'],
+            'null_count': sketch['nulls'],
+            'null_pct': round(100 * sketch['nulls'] / rows, 4) if rows else 0.0,
+            'distinct_estimate': _hll_estimate(sketch['hll']),
+            'min': _json_value(sketch['min']),
+            'max': _json_value(sketch['max'])
+        }
+        if sketch['type'] in ('numeric', 'boolean') and sketch['count']:
+            summary['mean'] = float(sketch['mean'])
+            summary['stddev'] = float(np.sqrt(sketch['m2'] / sketch['count']))
+        if sketch['centroids'] is not None and sketch['count']:
+            values = _tdigest_quantiles(sketch['centroids'], sketch['min'], sketch['max'], QUANTILES)
+            summary['quantiles'] = {f"p{round(q * 100):02d}": float(v) for q, v in zip(QUANTILES, values)}
+        if sketch['top'] is not None:
+            top = sorted(sketch['top'].items(), key=lambda item: -item[1])[:settings['top_k']]
+            summary['top_values'] = [{'value': _json_value(value), 'count': int(count)} for value, count in top]
+            # Misra-Gries counts are exact until a column has more than top_capacity distinct
+            # values; past that each count is a lower bound, at most top_values_max_undercount low
+            summary['top_values_exact'] = sketch['top_error'] == 0
+            if sketch['top_error']:
+                summary['top_values_max_undercount'] = int(sketch['top_error'])
+        summary['sketch'] = {
+            'mean': float(sketch['mean']),
+            'm2': float(sketch['m2']),
+            'hll': base64.b64encode(sketch['hll'].tobytes()).decode('ascii'),
+            'centroids': None if sketch['centroids'] is None else np.column_stack(sketch['centroids']).tolist(),
+            'top': None if sketch['top'] is None else [[_json_value(v), int(c)] for v, c in sketch['top'].items()],
+            'top_error': int(sketch['top_error'])
+        }
+        columns[name] = summary
+    return {'rows': profile['rows'], 'settings': settings, 'columns': columns}
+
+
+def write_profile(profile: Dict[str, Any], path: Path) -> None:
+    """Write summarize_profile output as JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summarize_profile(profile), f, indent=2)
+
+
+def read_profile(path: Path) -> Dict[str, Any]:
+    """Load a profile.json back into mergeable sketches (min / max / top-k values come back as JSON values)."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    columns = {}
+    for name, summary in data['columns'].items():
+        state = summary['sketch']
+        columns[name] = {
+            'type': summary['type'], 'dtype': summary['dtype'], 'count': summary['count'],
+            'nulls': summary['null_count'], 'min': summary['min'], 'max': summary['max'],
+            'mean': state['mean'], 'm2': state['m2'],
+            'hll': np.frombuffer(base64.b64decode(state['hll']), dtype=np.uint8).copy(),
+            'centroids': None if state['centroids'] is None else tuple(np.array(state['centroids']).T),
+            'top': None if state['top'] is None else {value: count for value, count in state['top']},
+            'top_error': state.get('top_error', 0)
+        }
+    return {'settings': data['settings'], 'rows': data['rows'], 'columns': columns}
+
+
+# ===== Column sketches =====
+
+def _column_type(series: pd.Series) -> str:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'boolean'
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return 'string'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    return 'string'
+
+
+def _sketch_column(series: pd.Series, settings: Dict[str, Any]) -> Dict[str, Any]:
+    column_type = _column_type(series)
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iub':
+        present = series  # NumPy integer and bool columns cannot hold nulls
+    else:
+        notnull = series.notna().to_numpy()
+        present = series[notnull] if not notnull.all() else series
+    sketch = {
+        'type': column_type, 'dtype': str(series.dtype), 'count': len(present), 'nulls': int(len(series) - len(present)),
+        'min': None, 'max': None, 'mean': 0.0, 'm2': 0.0,
+        'hll': np.zeros(1 << settings['hll_precision'], dtype=np.uint8), 'centroids': None, 'top': None,
+        'top_error': 0
+    }
+    if len(present) == 0:
+        return sketch
+    
+    if column_type == 'string':
+        # Work on (codes, distinct values): hashing, min / max and counts touch each distinct value once
+        if isinstance(present.dtype, pd.CategoricalDtype):
+            codes, uniques = present.cat.codes.to_numpy(), present.cat.categories.to_numpy()
+        else:
+            codes, uniques = pd.factorize(present.to_numpy())
+        counts = np.bincount(codes, minlength=len(uniques))
+        used = counts > 0
+        uniques, counts = uniques[used], counts[used]
+        text = uniques.astype(str).astype(object)
+        sketch['hll'] = _hll_registers(text, settings['hll_precision'])
+        sketch['min'], sketch['max'] = text.min(), text.max()
+        sketch['top'], sketch['top_error'] = _top_counts(text, counts, settings['top_capacity'])
+        return sketch
+    
+    if column_type == 'datetime':
+        values = present.to_numpy()
+        sketch['min'], sketch['max'] = values.min(), values.max()
+        sketch['hll'] = _hll_registers(values, settings['hll_precision'])
+        return sketch
+    
+    values = present.to_numpy(dtype=float)
+    sketch['min'], sketch['max'] = values.min(), values.max()
+    sketch['mean'] = values.mean()
+    sketch['m2'] = float(((values - sketch['mean']) ** 2).sum())
+    sketch['hll'] = _hll_registers(values, settings['hll_precision'])
+    if column_type == 'numeric':
+        sketch['centroids'] = _tdigest_compress(np.sort(values), np.ones(len(values)), settings['tdigest_compression'])
+    if column_type == 'boolean' or pd.api.types.is_integer_dtype(series.dtype):
+        counts = present.value_counts(sort=False)
+        sketch['top'], sketch['top_error'] = _top_counts(counts.index.to_numpy(), counts.to_numpy(),
+                                                         settings['top_capacity'])
+    return sketch
+
+
+def _merge_sketches(a: Dict[str, Any], b: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(a)
+    merged['count'] = a['count'] + b['count']
+    merged['nulls'] = a['nulls'] + b['nulls']
+    merged['hll'] = np.maximum(a['hll'], b['hll'])
+    if b['count'] == 0:
+        return merged
+    if a['count'] == 0:
+        merged.update({key: b[key] for key in ('min', 'max', 'mean', 'm2', 'centroids', 'top', 'top_error')})
+        return merged
+    
+    merged['min'] = min(a['min'], b['min'])
+    merged['max'] = max(a['max'], b['max'])
+    delta = b['mean'] - a['mean']
+    merged['mean'] = a['mean'] + delta * b['count'] / merged['count']
+    merged['m2'] = a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / merged['count']
+    if a['centroids'] is not None and b['centroids'] is not None:
+        means = np.concatenate([a['centroids'][0], b['centroids'][0]])
+        weights = np.concatenate([a['centroids'][1], b['centroids'][1]])
+        order = np.argsort(means, kind='stable')
+        merged['centroids'] = _tdigest_compress(means[order], weights[order], settings['tdigest_compression'])
+    if a['top'] is not None and b['top'] is not None:
+        top = dict(a['top'])
+        for value, count in b['top'].items():
+            top[value] = top.get(value, 0) + count
+        merged['top'], threshold = _misra_gries_trim(top, settings['top_capacity'])
+        merged['top_error'] = a['top_error'] + b['top_error'] + threshold
+    return merged
+
+
+def _json_value(value: Any) -> Any:
+    """Plain Python / ISO-string form of a numpy, pandas or datetime scalar."""
+    if value is None:
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# ===== HyperLogLog =====
+
+def _hll_registers(values: np.ndarray, precision: int) -> np.ndarray:
+    """
+    HyperLogLog registers of an array: the top `precision` bits of a 64-bit hash pick the
+    register, the rank of the first set bit in the rest is its value, and each register keeps
+    the maximum rank. Numbers are hashed as float64 so integer and float columns agree.
+    Duplicates do not change the registers, so callers may pass distinct values only.
+    """
+    num_registers = 1 << precision
+    if len(values) == 0:
+        return np.zeros(num_registers, dtype=np.uint8)
+    hashes = pd.util.hash_array(values, categorize=False)
+    
+    register = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remainder = hashes << np.uint64(precision)
+    # frexp exponent e puts the remainder in [2^(e-1), 2^e): 64 - e leading zeros
+    _, exponent = np.frexp(remainder.astype(float))
+    rank = np.where(remainder == 0, 64 - precision + 1, np.clip(64 - exponent, 0, 63) + 1)
+    rank = np.minimum(rank, 64 - precision + 1).astype(np.uint8)
+    
+    registers = np.zeros(num_registers, dtype=np.uint8)
+    np.maximum.at(registers, register, rank)
+    return registers
+
+
+def _hll_estimate(registers: np.ndarray) -> int:
+    """Distinct-count estimate with the small-range (linear counting) correction."""
+    num_registers = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / num_registers)
+    estimate = alpha * num_registers ** 2 / np.sum(2.0 ** -registers.astype(float))
+    zeros = int(np.sum(registers == 0))
+    if estimate <= 2.5 * num_registers and zeros:
+        estimate = num_registers * np.log(num_registers / zeros)
+    return int(round(estimate))
+
+
+# ===== t-digest =====
+
+def _tdigest_compress(means: np.ndarray, weights: np.ndarray, compression: float) -> tuple:
+    """
+    Merge sorted (mean, weight) points into t-digest centroids in one vectorized pass.
+    
+    Each point is assigned to the integer bucket of the k1 scale function
+    k(q) = compression / (2 pi) * asin(2q - 1) at its cumulative-weight midpoint, so
+    buckets are narrow in the tails and wide around the median; points sharing a bucket
+    collapse into their weighted mean.
+    """
+    total = weights.sum()
+    cumulative = np.cumsum(weights)
+    midpoint = (cumulative - weights / 2) / total
+    bucket = np.floor(compression / (2 * np.pi) * np.arcsin(2 * midpoint - 1)).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+
+def _tdigest_quantiles(centroids: tuple, minimum: float, maximum: float, quantiles: list) -> np.ndarray:
+    """Quantiles by interpolating between centroid midpoints, anchored at the exact min and max."""
+    means, weights = centroids
+    total = weights.sum()
+    positions = np.r_[0.0, (np.cumsum(weights) - weights / 2) / total, 1.0]
+    values = np.r_[minimum, means, maximum]
+    return np.interp(quantiles, positions, values)
+
+
+# ===== Top-k =====
+
+def _top_counts(values: np.ndarray, counts: np.ndarray, capacity: int) -> Tuple[Dict[Any, int], int]:
+    """Misra-Gries summary of one chunk's value counts and its undercount (the _misra_gries_trim rule, in NumPy)."""
+    threshold = 0
+    if len(counts) > capacity:
+        threshold = int(np.partition(counts, len(counts) - capacity - 1)[len(counts) - capacity - 1])
+        keep = counts > threshold
+        values, counts = values[keep], counts[keep] - threshold
+    return {_json_value(value): int(count) for value, count in zip(values, counts)}, threshold
+
+
+def _misra_gries_trim(counts: Dict[Any, int], capacity: int) -> Tuple[Dict[Any, int], int]:
+    """
+    Keep at most `capacity` counters: subtract the (capacity + 1)-th largest count from all
+    and drop the non-positive ones (mergeable Misra-Gries summary; exact below capacity).
+    
+    Returns:
+        (counters, amount subtracted from each, which adds to the summary's undercount bound)
+    """
+    if len(counts) <= capacity:
+        return counts, 0
+    threshold = sorted(counts.values(), reverse=True)[capacity]
+    return {value: count - threshold for value, count in counts.items() if count > threshold}, threshold
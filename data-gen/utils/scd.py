@@ -0,0 +1,271 @@
+"""
+Slowly Changing Dimensions
+Vectorized SCD Type 2 history for the conformed dimensions and as-of version key lookups for facts
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable
+
+# Tracked dimensions: natural key, surrogate version key, column holding each member's first
+# valid date, and how each tracked attribute changes ('category' = another observed value,
+# 'growth' = multiplied by 1 + U(low, high) at each change, 'ordered' = next value in the order)
+SCD2_DIMENSIONS: Dict[str, Dict[str, Any]] = {
+    'DimCustomer': {
+        'key': 'customer_id',
+        'version_key': 'customer_version_key',
+        'start_column': 'customer_since',
+        'attributes': {'segment': ('category',)}
+    },
+    'DimProduct': {
+        'key': 'product_id',
+        'version_key': 'product_version_key',
+        'start_column': 'launch_date',
+        'attributes': {
+            'list_price': ('growth', 0.02, 0.12),
+            'lifecycle_stage': ('ordered', ['Growth', 'Mature', 'Decline', 'Eol'])
+        }
+    },
+    'DimEmployee': {
+        'key': 'employee_id',
+        'version_key': 'employee_version_key',
+        'start_column': 'hire_date',
+        'attributes': {'department': ('category',)}
+    }
+}
+
+HISTORY_SUFFIX = 'History'
+
+# Facts resolved to the dimension version valid on their event date: (fact, date column, FK column, dimension)
+AS_OF_LOOKUPS = [
+    ('FactSales', 'order_date_id', 'customer_id', 'DimCustomer'),
+    ('FactSales', 'order_date_id', 'product_id', 'DimProduct'),
+    ('FactSales', 'order_date_id', 'employee_id', 'DimEmployee'),
+    ('FactReturns', 'return_date_id', 'customer_id', 'DimCustomer'),
+    ('FactReturns', 'return_date_id', 'product_id', 'DimProduct'),
+    ('FactOpportunities', 'create_date', 'customer_id', 'DimCustomer'),
+    ('FactOpportunities', 'create_date', 'sales_rep_id', 'DimEmployee'),
+    ('FactActivities', 'activity_date', 'customer_id', 'DimCustomer'),
+    ('FactActivities', 'activity_date', 'employee_id', 'DimEmployee'),
+    ('FactSupport', 'create_date', 'customer_id', 'DimCustomer'),
+    ('FactSupport', 'create_date', 'agent_id', 'DimEmployee'),
+    ('FactPurchaseOrders', 'order_date', 'product_id', 'DimProduct'),
+    ('FactWorkOrders', 'start_date', 'product_id', 'DimProduct'),
+    ('FactProduction', 'production_date', 'product_id', 'DimProduct'),
+    ('FactDefects', 'detection_date', 'product_id', 'DimProduct'),
+    ('FactInventory', 'snapshot_date', 'product_id', 'DimProduct')
+]
+
+
+def history_table_name(dimension: str) -> str:
+    """Name of a dimension's SCD2 table (DimCustomerHistory)."""
+    return f"{dimension}{HISTORY_SUFFIX}"
+
+
+def version_key_column(fk_column: str) -> str:
+    """Fact column holding the version key resolved for an FK (sales_rep_id -> sales_rep_version_key)."""
+    return f"{fk_column[:-len('_id')] if fk_column.endswith('_id') else fk_column}_version_key"
+
+
+def _days(values: Any) -> np.ndarray:
+    """Dates (YYYYMMDD integers, datetimes or date strings) as int64 days since 1970-01-01; missing as min int64."""
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        # DimDate keys: calendar arithmetic instead of parsing strings
+        ids = values.to_numpy(dtype='float64', na_value=np.nan)
+        missing = np.isnan(ids)
+        ids = np.where(missing, 19700101, ids).astype(np.int64)
+        months = (ids // 10000 - 1970) * 12 + ids // 100 % 100 - 1
+        days = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + ids % 100 - 1
+    else:
+        dates = pd.to_datetime(values, errors='coerce')
+        missing = dates.isna().values
+        days = dates.values.astype('datetime64[D]').astype(np.int64)
+    return np.where(missing, np.iinfo(np.int64).min, days)
+
+
+def _member_suffix_sum(values: np.ndarray, first_row: np.ndarray) -> np.ndarray:
+    """Sum of values from each row to its member's last row (rows sorted by member, member-major)."""
+    totals = np.cumsum(values)
+    before_member = np.r_[0, totals][first_row]
+    member_totals = np.r_[totals[first_row[1:] - 1], totals[-1:]] - before_member
+    member_of_row = np.repeat(np.arange(len(first_row)), np.diff(np.r_[first_row, len(values)]))
+    return member_totals[member_of_row] - (totals - values - before_member[member_of_row])
+
+
+def generate_scd2_history(dim: pd.DataFrame, dimension: str, start_date: str, end_date: str,
+                          changes_per_year: float, max_versions: int, seed: int) -> pd.DataFrame:
+    """
+    Version history of a dimension whose current snapshot is `dim`.
+    
+    Each member gets Poisson(changes_per_year x years) changes (capped at max_versions - 1) on
+    distinct days between its first valid date (or start_date) and end_date. Every change
+    alters one tracked attribute; earlier versions are derived backwards from the current
+    values, so the last version of each member equals the snapshot row. All steps work on
+    flat arrays sorted by member and date, without per-member loops.
+    
+    Args:
+        dim: Current dimension snapshot
+        dimension: Name in SCD2_DIMENSIONS
+        start_date, end_date: Generated history (YYYY-MM-DD)
+        changes_per_year: Mean attribute changes per member and year
+        max_versions: Maximum versions per member
+        seed: Random seed
+    
+    Returns:
+        One row per member version: <version_key>, the snapshot columns with historical
+        attribute values, valid_from, valid_to (NaT while current) and is_current
+    """
+    spec = SCD2_DIMENSIONS[dimension]
+    rng = np.random.default_rng(seed)
+    n = len(dim)
+    history_start = pd.Timestamp(start_date).to_datetime64().astype('datetime64[D]').astype(np.int64)
+    history_end = pd.Timestamp(end_date).to_datetime64().astype('datetime64[D]').astype(np.int64)
+    
+    member_start = _days(dim[spec['start_column']].values) if spec['start_column'] in dim.columns \
+        else np.full(n, history_start)
+    first_valid = np.where(member_start == np.iinfo(np.int64).min, history_start, member_start)
+    window_start = np.maximum(first_valid, history_start) + 1
+    window_days = np.maximum(history_end - window_start + 1, 0)
+    
+    # Change days: uniform over each member's window, sorted, one change per member and day
+    counts = np.minimum(rng.poisson(changes_per_year * window_days / 365.25), max_versions - 1)
+    counts = np.where(window_days > 0, counts, 0)
+    member_of_change = np.repeat(np.arange(n), counts)
+    change_day = window_start[member_of_change] + (rng.random(len(member_of_change)) *
+                                                   window_days[member_of_change]).astype(np.int64)
+    order = np.lexsort((change_day, member_of_change))
+    member_of_change, change_day = member_of_change[order], change_day[order]
+    distinct = np.r_[True, (member_of_change[1:] != member_of_change[:-1]) | (change_day[1:] != change_day[:-1])]
+    member_of_change, change_day = member_of_change[distinct], change_day[distinct]
+    counts = np.bincount(member_of_change, minlength=n)
+    
+    # Version rows: each member's first version, then one per change (member-major order)
+    versions = counts + 1
+    member_of_row = np.repeat(np.arange(n), versions)
+    first_row = np.cumsum(versions) - versions
+    is_first = np.zeros(len(member_of_row), dtype=bool)
+    is_first[first_row] = True
+    valid_from = np.empty(len(member_of_row), dtype=np.int64)
+    valid_from[is_first] = first_valid
+    valid_from[~is_first] = change_day
+    is_current = np.r_[member_of_row[1:] != member_of_row[:-1], True]
+    valid_to = np.where(is_current, 0, np.r_[valid_from[1:], 0] - 1)
+    
+    history = dim.iloc[member_of_row].reset_index(drop=True)
+    
+    # The change that ends version r (r not current) alters one attribute, so the value of
+    # version r is the current value walked back through every change at rows >= r of the member.
+    # Ordered attributes go first: changes past their first value fall to another attribute.
+    attributes = sorted(spec['attributes'], key=lambda column: spec['attributes'][column][0] != 'ordered')
+    fallback = next((p for p, column in enumerate(attributes) if spec['attributes'][column][0] != 'ordered'), -1)
+    changed = np.where(is_current, -1, rng.integers(0, len(attributes), len(member_of_row)))
+    for position, column in enumerate(attributes):
+        kind = spec['attributes'][column]
+        alters = changed == position
+        if kind[0] == 'growth':
+            # Value before a change = value after / (1 + U(low, high))
+            log_step = np.where(alters, np.log1p(rng.uniform(kind[1], kind[2], len(member_of_row))), 0.0)
+            history[column] = np.round(history[column].values / np.exp(_member_suffix_sum(log_step, first_row)), 2)
+        elif kind[0] == 'ordered':
+            stages = np.asarray(kind[1], dtype=object)
+            current = pd.Index(stages).get_indexer(history[column].values)
+            overflow = alters & (_member_suffix_sum(alters.astype(np.int64), first_row) > current)
+            changed[overflow] = fallback
+            earlier = current - _member_suffix_sum((alters & ~overflow).astype(np.int64), first_row)
+            history[column] = np.where(current >= 0, stages[np.maximum(earlier, 0)], history[column].values)
+        else:
+            # Value before a change: another observed value (code shifted by 1..K-1, modulo K)
+            observed = pd.unique(dim[column].dropna())
+            if len(observed) < 2:
+                continue
+            current = pd.Index(observed).get_indexer(history[column].values)
+            shift = np.where(alters, rng.integers(1, len(observed), len(member_of_row)), 0)
+            earlier = (current + _member_suffix_sum(shift, first_row)) % len(observed)
+            history[column] = np.where(current >= 0, observed[earlier], history[column].values)
+    
+    history.insert(0, spec['version_key'], np.arange(1, len(history) + 1, dtype=np.int64))
+    history['valid_from'] = valid_from.astype('datetime64[D]').astype('datetime64[ns]')
+    history['valid_to'] = pd.Series(valid_to.astype('datetime64[D]').astype('datetime64[ns]')).where(~is_current).values
+    history['is_current'] = is_current
+    return history
+
+
+def version_index(history: pd.DataFrame, dimension: str) -> tuple:
+    """
+    Sorted search structure of a history table for lookup_versions: member index, composite
+    (member code << 32 | days since the earliest valid_from) keys, their version keys and
+    each member's first position. Built once per table and reused for every fact and chunk.
+    """
+    spec = SCD2_DIMENSIONS[dimension]
+    members = pd.Index(pd.unique(history[spec['key']].values))
+    member_code = members.get_indexer(history[spec['key']].values).astype(np.int64)
+    from_day = _days(history['valid_from'].values)
+    order = np.lexsort((from_day, member_code))
+    first_day = from_day.min()
+    composite = (member_code[order] << 32) + (from_day[order] - first_day)
+    member_first = np.searchsorted(composite, np.arange(len(members), dtype=np.int64) << 32, side='left')
+    return members, composite, history[spec['version_key']].values[order], first_day, member_first
+
+
+def lookup_versions(index: tuple, keys: Any, event_dates: Any) -> pd.array:
+    """
+    Version key valid on each event date for each natural key (as-of join).
+    
+    One np.searchsorted over the composite member/day keys resolves all events at once (the
+    events are searched in sorted order, which keeps the binary searches cache-friendly).
+    Events dated before a member's first version get the first version, missing dates the
+    current one, unknown members <NA>.
+    
+    Returns:
+        Int64 array aligned with keys
+    """
+    members, composite, version_keys, first_day, member_first = index
+    event_code = members.get_indexer(np.asarray(keys)).astype(np.int64)
+    known = event_code >= 0
+    event_day = _days(event_dates)
+    offset = np.where(event_day == np.iinfo(np.int64).min, (1 << 32) - 1,
+                      np.clip(event_day - first_day, 0, (1 << 32) - 1))
+    query = (np.where(known, event_code, 0) << 32) + offset
+    order = np.argsort(query, kind='stable')
+    position = np.empty(len(query), dtype=np.int64)
+    position[order] = np.searchsorted(composite, query[order], side='right') - 1
+    # Before the member's first version the search lands in the previous member
+    position = np.maximum(position, member_first[np.where(known, event_code, 0)])
+    result = pd.array(version_keys[position], dtype='Int64')
+    result[~known] = pd.NA
+    return result
+
+
+def version_indexes(tables: Dict[str, pd.DataFrame], facts: Iterable[str]) -> Dict[str, tuple]:
+    """version_index of the history tables present in tables that the given facts look up, by dimension."""
+    facts = set(facts)
+    needed = {dimension for fact, _, _, dimension in AS_OF_LOOKUPS if fact in facts}
+    return {dimension: version_index(tables[history_table_name(dimension)], dimension)
+            for dimension in SCD2_DIMENSIONS if dimension in needed and history_table_name(dimension) in tables}
+
+
+def add_version_keys(table_name: str, df: pd.DataFrame, indexes: Dict[str, tuple]) -> pd.DataFrame:
+    """Add the as-of version key of every AS_OF_LOOKUPS FK of a fact (table or chunk), in place."""
+    for fact, date_column, fk, dimension in AS_OF_LOOKUPS:
+        if fact == table_name and dimension in indexes and date_column in df.columns and fk in df.columns:
+            df[version_key_column(fk)] = lookup_versions(indexes[dimension], df[fk].values, df[date_column].values)
+    return df
+
+
+def add_version_key_chunks(chunks: Iterable[pd.DataFrame], table_name: str,
+                           indexes: Dict[str, tuple]) -> Iterable[pd.DataFrame]:
+    """Add version keys to streamed chunks on their way to disk."""
+    for chunk in chunks:
+        yield add_version_keys(table_name, chunk, indexes)
+
+
+def extend_history(history: pd.DataFrame, members: pd.DataFrame, dimension: str, valid_from: str) -> pd.DataFrame:
+    """Current-only versions for new members (appended batches), numbered after the existing version keys."""
+    spec = SCD2_DIMENSIONS[dimension]
+    rows = members.copy()
+    rows.insert(0, spec['version_key'], history[spec['version_key']].max() + 1 + np.arange(len(rows), dtype=np.int64))
+    rows['valid_from'] = np.full(len(rows), np.datetime64(valid_from, 'ns'))
+    rows['valid_to'] = np.full(len(rows), np.datetime64('NaT', 'ns'))
+    rows['is_current'] = True
+    return rows
@@ -0,0 +1,161 @@
+"""
+Surrogate Keys
+Dense integer keys for the conformed dimensions, persisted key maps and the integer FK
+columns written in place of natural keys (CUST_000123 -> customer_key 124)
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from utils.append import read_table
+from utils.data_quality import FOREIGN_KEYS
+
+# Conformed dimensions keyed by an integer, with their natural key. DimDate is left out:
+# its date_id (YYYYMMDD) is already an integer.
+SURROGATE_DIMENSIONS: Dict[str, str] = {
+    'DimCustomer': 'customer_id',
+    'DimProduct': 'product_id',
+    'DimEmployee': 'employee_id',
+    'DimGeography': 'geography_id',
+    'DimFacility': 'facility_id',
+    'DimProject': 'project_id',
+    'DimAccount': 'account_id'
+}
+
+# Key maps (natural key -> surrogate key, every pair ever assigned) are written beside the
+# domains as <structured_path>/keymaps/<Dimension>.<ext>, and per appended batch under
+# increments/<batch>/keymaps/ for the members it adds
+KEYMAPS_DIR = 'keymaps'
+
+# (table, FK column, dimension) of every declared FK to a conformed dimension's natural key
+SURROGATE_FKS = [(child, column, parent) for child, column, parent, parent_column in FOREIGN_KEYS
+                 if SURROGATE_DIMENSIONS.get(parent) == parent_column]
+
+
+def key_column(natural_column: str) -> str:
+    """Integer column replacing a natural key column (warehouse_id -> warehouse_key)."""
+    return f"{natural_column[:-len('_id')] if natural_column.endswith('_id') else natural_column}_key"
+
+
+def read_key_maps(structured_path: Path, batch_paths: Iterable[str] = ()) -> Dict[str, pd.DataFrame]:
+    """Key maps of a generated dataset (full run plus appended batches), by dimension; {} if none."""
+    key_maps = {}
+    batch_paths = list(batch_paths)
+    for dimension in SURROGATE_DIMENSIONS:
+        parts = [read_table(Path(structured_path) / KEYMAPS_DIR, dimension)]
+        parts += [read_table(Path(structured_path) / path / KEYMAPS_DIR, dimension) for path in batch_paths]
+        parts = [p for p in parts if p is not None]
+        if parts:
+            key_maps[dimension] = pd.concat(parts, ignore_index=True)
+    return key_maps
+
+
+def assign_surrogate_keys(dim: pd.DataFrame, dimension: str, key_maps: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Dimension with its integer key inserted as the first column.
+    
+    Members already in the dimension's key map keep their key, so reruns with the same seed
+    and later appends stay consistent; new members are numbered after the largest key ever
+    assigned, in row order (1..n on a first run). The key map in key_maps is extended with
+    the new pairs, in place.
+    
+    Args:
+        dim: Dimension rows (natural keys unique)
+        dimension: Name in SURROGATE_DIMENSIONS
+        key_maps: Key maps by dimension (see read_key_maps), updated with the new members
+    
+    Returns:
+        Copy of dim with <key_column> (int32) in front
+    """
+    natural = SURROGATE_DIMENSIONS[dimension]
+    key = key_column(natural)
+    known = key_maps.get(dimension)
+    if known is None:
+        known = pd.DataFrame({natural: pd.Series(dtype=object), key: pd.Series(dtype=np.int32)})
+    
+    position = pd.Index(known[natural].values).get_indexer(dim[natural].values)
+    keys = np.empty(len(dim), dtype=np.int32)
+    keys[position >= 0] = known[key].values[position[position >= 0]]
+    new = position < 0
+    first = int(known[key].max()) + 1 if len(known) else 1
+    keys[new] = first + np.arange(int(new.sum()), dtype=np.int32)
+    
+    key_maps[dimension] = pd.concat([known, pd.DataFrame({natural: dim[natural].values[new], key: keys[new]})],
+                                    ignore_index=True)
+    dim = dim.drop(columns=[key], errors='ignore')
+    dim.insert(0, key, keys)
+    return dim
+
+
+def surrogate_key_indexes(tables: Dict[str, pd.DataFrame]) -> Dict[str, tuple]:
+    """(natural key Index, keys) of the keyed dimensions present in tables, built once and reused for every table and chunk."""
+    indexes = {}
+    for dimension, natural in SURROGATE_DIMENSIONS.items():
+        dim = tables.get(dimension)
+        if dim is not None and key_column(natural) in dim.columns:
+            indexes[dimension] = (pd.Index(dim[natural].values), dim[key_column(natural)].to_numpy(dtype=np.int32))
+    return indexes
+
+
+def lookup_surrogate_keys(index: tuple, values: pd.Series) -> pd.array:
+    """
+    Integer keys of natural key values with one hashed lookup (categorical columns are looked
+    up on their categories and gathered through the codes). Missing and unknown values give <NA>.
+    
+    Returns:
+        Int32 array aligned with values
+    """
+    naturals, keys = index
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_position = naturals.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        position = np.where(codes >= 0, np.append(category_position, -1)[codes], -1)
+    else:
+        position = naturals.get_indexer(values.to_numpy())
+    result = pd.array(keys[np.maximum(position, 0)], dtype='Int32')
+    result[position < 0] = pd.NA
+    return result
+
+
+def apply_surrogate_keys(table_name: str, df: pd.DataFrame, indexes: Dict[str, tuple]) -> pd.DataFrame:
+    """
+    Table (or chunk) as written with surrogate keys: in facts, every FK to a keyed dimension is
+    replaced, at its position, by its integer <key_column>, also in the partition tag of
+    Hive-partitioned chunks (facility_id=FAC_0003 -> facility_key=4); dimensions keep their
+    natural FK columns and get the integer one beside them. The input is left unchanged,
+    since later domains and the quality checks read natural keys.
+    """
+    columns = [(column, dimension) for child, column, dimension in SURROGATE_FKS
+               if child == table_name and column in df.columns and dimension in indexes]
+    if not columns:
+        return df
+    keyed = df.copy(deep=False)
+    replace = table_name.startswith('Fact')
+    for column, dimension in columns:
+        keys = lookup_surrogate_keys(indexes[dimension], df[column])
+        keyed = keyed.drop(columns=[key_column(column)], errors='ignore')
+        keyed.insert(keyed.columns.get_loc(column) + (0 if replace else 1), key_column(column), keys)
+        if replace:
+            keyed = keyed.drop(columns=[column])
+    keyed.attrs = dict(df.attrs)
+    if replace and df.attrs.get('partition'):
+        dimensions = dict(columns)
+        partition = {}
+        for column, value in df.attrs['partition'].items():
+            if column in dimensions:
+                partition[key_column(column)] = int(lookup_surrogate_keys(indexes[dimensions[column]],
+                                                                          pd.Series([value]))[0])
+            else:
+                partition[column] = value
+        keyed.attrs['partition'] = partition
+    return keyed
+
+
+def apply_surrogate_key_chunks(chunks: Iterable[pd.DataFrame], table_name: str,
+                               indexes: Dict[str, tuple]) -> Iterable[pd.DataFrame]:
+    """Replace natural FKs by surrogate keys in streamed chunks on their way to disk, partition tags included."""
+    for chunk in chunks:
+        yield apply_surrogate_keys(table_name, chunk, indexes)
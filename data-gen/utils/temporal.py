@@ -0,0 +1,87 @@
+"""
+Temporal Sampling Utilities
+Growth- and seasonality-aware sampling of fact dates over DimDate
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+# Shape used when a domain enables seasonality; override with temporal_profile in config.yml
+DEFAULT_TEMPORAL_PROFILE = {
+    'q4_uplift': 0.30,
+    'weekday_weights': [1.10, 1.10, 1.05, 1.05, 1.00, 0.45, 0.35],  # Monday..Sunday
+    'holiday_factor': 0.25
+}
+
+
+def build_day_weights(dim_date: pd.DataFrame, growth_rate: float = 0.0, seasonality: bool = False,
+                      profile: Optional[dict] = None) -> np.ndarray:
+    """
+    Build a normalized per-day weight vector over DimDate.
+    
+    Args:
+        dim_date: Date dimension
+        growth_rate: Annual volume growth (0.10 = +10% per year), compounded daily
+        seasonality: Apply Q4 uplift, weekday shape and holiday dip
+        profile: Seasonal shape (q4_uplift, weekday_weights, holiday_factor)
+    
+    Returns:
+        float64 array aligned with dim_date rows, summing to 1
+    """
+    profile = {**DEFAULT_TEMPORAL_PROFILE, **(profile or {})}
+    
+    years_elapsed = (dim_date['date'].values - dim_date['date'].values[0]) / np.timedelta64(1, 'D') / 365.25
+    weights = (1 + growth_rate) ** years_elapsed
+    
+    if seasonality:
+        weights = weights * np.where(dim_date['quarter'].values == 4, 1 + profile['q4_uplift'], 1.0)
+        weights = weights * np.asarray(profile['weekday_weights'], dtype=float)[dim_date['day_of_week'].values - 1]
+        weights = weights * np.where(dim_date['is_holiday'].values, profile['holiday_factor'], 1.0)
+    
+    return weights / weights.sum()
+
+
+def sample_date_positions(weights: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw n DimDate positions from a day weight vector by inverse-CDF lookup."""
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return np.minimum(np.searchsorted(cdf, rng.random(n), side='right'), len(cdf) - 1)
+
+
+def sample_dates(dim_date: pd.DataFrame, n: int, seed: int, volume_config: Optional[dict] = None,
+                 profile: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Sample n DimDate rows with replacement, honoring a domain's temporal settings.
+    
+    Domains opt in by setting `seasonality: true` and/or `growth_rate` on their volume
+    section in config.yml (e.g. sales.orders). Without either setting this is exactly
+    dim_date.sample(n=n, replace=True, random_state=seed).
+    
+    Args:
+        dim_date: Date dimension
+        n: Number of dates to draw
+        seed: Random seed
+        volume_config: Domain volume section holding seasonality / growth_rate
+        profile: Shared seasonal shape (config temporal_profile)
+    
+    Returns:
+        DataFrame of sampled DimDate rows
+    """
+    volume_config = volume_config or {}
+    seasonality = volume_config.get('seasonality', False)
+    growth_rate = volume_config.get('growth_rate', 0.0)
+    if not seasonality and not growth_rate:
+        return dim_date.sample(n=n, replace=True, random_state=seed)
+    
+    weights = build_day_weights(dim_date, growth_rate, seasonality, profile)
+    return dim_date.iloc[sample_date_positions(weights, n, np.random.default_rng(seed))]
+
+
+def select_snapshot_positions(dim_date: pd.DataFrame, frequency: str) -> np.ndarray:
+    """Positions in DimDate of a snapshot frequency (daily, weekly on Mondays, monthly on the 1st)."""
+    if frequency == 'weekly':
+        return np.flatnonzero(dim_date['day_of_week'].values == 1)
+    if frequency == 'monthly':
+        return np.flatnonzero(dim_date['day_of_month'].values == 1)
+    return np.arange(len(dim_date))
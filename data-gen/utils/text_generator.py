@@ -1,48 +1,557 @@
-"""Unstructured Text File Generator - Placeholder"""
+"""
+Unstructured Text Generator
+Template-and-vocabulary documents (emails, reviews, risk notes, lab notes) written as sharded JSONL or Parquet
+"""
+
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
-
-def generate_unstructured_files(config: Dict[str, Any], output_path: Path, seed: int, dimensions: Dict) -> None:
-    """Generate unstructured text files (emails, reviews, notes)."""
-    
-    # Call center emails
-    if 'callcenter_emails' in config:
-        email_dir = output_path / 'callcenter_emails'
-        email_dir.mkdir(parents=True, exist_ok=True)
-        count = config['callcenter_emails']['count']
-        
-        for i in range(count):
-            with open(email_dir / f'email_{i:05d}.txt', 'w') as f:
-                f.write(f"Sample email #{i}\n")
-                f.write("This is a placeholder. Implement real email generation.\n")
-    
-    # Product reviews
-    if 'product_reviews' in config:
-        review_dir = output_path / 'product_reviews'
-        review_dir.mkdir(parents=True, exist_ok=True)
-        count = config['product_reviews']['count']
-        
-        for i in range(count):
-            with open(review_dir / f'review_{i:05d}.txt', 'w') as f:
-                f.write(f"Sample review #{i}\n")
-    
-    # Risk notes
-    if 'risk_notes' in config:
-        notes_dir = output_path / 'risk_notes'
-        notes_dir.mkdir(parents=True, exist_ok=True)
-        count = config['risk_notes']['count']
-        
-        for i in range(count):
-            with open(notes_dir / f'note_{i:05d}.txt', 'w') as f:
-                f.write(f"Sample risk note #{i}\n")
-    
-    # R&D lab notes
-    if 'rd_lab_notes' in config:
-        lab_dir = output_path / 'rd_lab_notes'
-        lab_dir.mkdir(parents=True, exist_ok=True)
-        count = config['rd_lab_notes']['count']
-        
-        for i in range(count):
-            with open(lab_dir / f'lab_note_{i:05d}.txt', 'w') as f:
-                f.write(f"Sample lab note #{i}\n")
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Fatima', 'Lukas', 'Sofia', 'Arjun', 'Chloe', 'Mateo', 'Hannah',
+               'Kenji', 'Amara', 'Oliver', 'Elena', 'Noah', 'Ines', 'Samuel', 'Yuki', 'Daniel', 'Priya']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Khan', 'Müller', 'Rossi', 'Patel', 'Martin', 'Lopez', 'Schmidt',
+              'Tanaka', 'Okafor', 'Brown', 'Dubois', 'Wilson', 'Silva', 'Novak', 'Kim', 'Evans', 'Fischer']
+
+# Email phrase banks per language; {slots} are filled from the ticket, customer and product keys
+EMAIL_PHRASES = {
+    'en': {
+        'subject': {
+            'Technical': ['Issue with {product}', 'Error {error} when using {product}', 'Ticket {ticket}: system not responding'],
+            'Billing': ['Question about invoice {invoice}', 'Incorrect charge on our account', 'Ticket {ticket}: billing discrepancy'],
+            'General Inquiry': ['Question about {product}', 'Information request', 'Ticket {ticket}: follow-up']
+        },
+        'greeting': ['Hello,', 'Hi support team,', 'Dear {agent},', 'Good morning,'],
+        'opening': {
+            'Technical': ['Since yesterday {product} keeps failing with error {error}.',
+                          'We are unable to complete orders because {product} stops responding.',
+                          'After the latest update {product} crashes every time we export a report.'],
+            'Billing': ['Our latest invoice {invoice} shows a charge of ${amount} that we do not recognize.',
+                        'We were billed twice for the same order {order}.',
+                        'The discount agreed in our contract was not applied to invoice {invoice}.'],
+            'General Inquiry': ['We are evaluating {product} for another team and have a few questions.',
+                                'Could you tell us whether {product} supports single sign-on?',
+                                'We would like to know the delivery time for order {order}.']
+        },
+        'detail': ['This affects about {users} users at {company}.', 'We already restarted the application twice.',
+                   'The problem started {days} days ago.', 'I attached screenshots of the error message.',
+                   'Our team needs this resolved before the end of the week.', 'This is the second time we contact you about it.',
+                   'Please let me know if you need any log files.', 'Our account manager suggested we open a ticket.',
+                   'We tested on two different machines with the same result.', 'The issue does not occur in our test environment.'],
+        'closing': ['Thanks in advance for your help.', 'Looking forward to your reply.', 'Please advise on next steps.',
+                    'Kind regards,', 'Best,'],
+        'pii': ['You can reach me at {phone} or {email}.', 'My direct line is {phone}.', 'Please reply to {email}.'],
+        'clause': {
+            'pattern': '{time} {actor} {action} {object}.',
+            'time': ['This morning', 'Yesterday', 'Last week', 'Earlier today', 'After the update', 'On Monday'],
+            'actor': ['our team', 'two of our users', 'the finance department', 'my colleague', 'the warehouse staff', 'our administrator'],
+            'action': ['tried to', 'could not', 'was unable to', 'needed to', 'attempted to'],
+            'object': ['export the monthly report', 'log in to the portal', 'sync the inventory', 'print the shipping labels',
+                       'approve pending orders', 'update customer records', 'download the invoice', 'reset a password']
+        }
+    },
+    'es': {
+        'subject': {
+            'Technical': ['Problema con {product}', 'Error {error} en {product}', 'Ticket {ticket}: el sistema no responde'],
+            'Billing': ['Consulta sobre la factura {invoice}', 'Cargo incorrecto en nuestra cuenta', 'Ticket {ticket}: discrepancia de facturación'],
+            'General Inquiry': ['Pregunta sobre {product}', 'Solicitud de información', 'Ticket {ticket}: seguimiento']
+        },
+        'greeting': ['Hola,', 'Estimado equipo de soporte,', 'Estimado/a {agent},', 'Buenos días,'],
+        'opening': {
+            'Technical': ['Desde ayer {product} falla con el error {error}.',
+                          'No podemos completar pedidos porque {product} deja de responder.'],
+            'Billing': ['La factura {invoice} incluye un cargo de ${amount} que no reconocemos.',
+                        'Nos cobraron dos veces el pedido {order}.'],
+            'General Inquiry': ['Estamos evaluando {product} para otro equipo.',
+                                '¿Podrían indicarnos el plazo de entrega del pedido {order}?']
+        },
+        'detail': ['Esto afecta a unos {users} usuarios en {company}.', 'Ya reiniciamos la aplicación dos veces.',
+                   'El problema empezó hace {days} días.', 'Adjunto capturas de pantalla del error.',
+                   'Necesitamos una solución antes del fin de semana.', 'Es la segunda vez que les escribimos por esto.'],
+        'closing': ['Gracias de antemano.', 'Quedo a la espera de su respuesta.', 'Saludos cordiales,'],
+        'pii': ['Pueden llamarme al {phone} o escribir a {email}.', 'Mi teléfono directo es {phone}.'],
+        'clause': {
+            'pattern': '{time} {actor} {action} {object}.',
+            'time': ['Esta mañana', 'Ayer', 'La semana pasada', 'Hoy temprano', 'Después de la actualización'],
+            'actor': ['nuestro equipo', 'dos usuarios', 'el departamento de finanzas', 'mi compañero', 'el personal del almacén'],
+            'action': ['intentó', 'no pudo', 'necesitaba'],
+            'object': ['exportar el informe mensual', 'iniciar sesión en el portal', 'sincronizar el inventario',
+                       'imprimir las etiquetas de envío', 'aprobar pedidos pendientes', 'descargar la factura']
+        }
+    },
+    'fr': {
+        'subject': {
+            'Technical': ['Problème avec {product}', 'Erreur {error} sur {product}', 'Ticket {ticket} : le système ne répond pas'],
+            'Billing': ['Question sur la facture {invoice}', 'Montant incorrect sur notre compte', 'Ticket {ticket} : écart de facturation'],
+            'General Inquiry': ['Question sur {product}', "Demande d'information", 'Ticket {ticket} : suivi']
+        },
+        'greeting': ['Bonjour,', "Bonjour l'équipe support,", 'Cher/Chère {agent},'],
+        'opening': {
+            'Technical': ["Depuis hier, {product} échoue avec l'erreur {error}.",
+                          'Nous ne pouvons plus valider les commandes car {product} ne répond plus.'],
+            'Billing': ['La facture {invoice} comporte un montant de ${amount} que nous ne reconnaissons pas.',
+                        'La commande {order} a été facturée deux fois.'],
+            'General Inquiry': ['Nous évaluons {product} pour une autre équipe.',
+                                'Pouvez-vous nous indiquer le délai de livraison de la commande {order} ?']
+        },
+        'detail': ['Environ {users} utilisateurs sont concernés chez {company}.', "Nous avons déjà redémarré l'application.",
+                   'Le problème a commencé il y a {days} jours.', "Vous trouverez les captures d'écran en pièce jointe.",
+                   'Nous avons besoin d\'une solution avant la fin de la semaine.'],
+        'closing': ["Merci d'avance pour votre aide.", 'Dans l\'attente de votre retour.', 'Cordialement,'],
+        'pii': ['Vous pouvez me joindre au {phone} ou à {email}.', 'Ma ligne directe : {phone}.'],
+        'clause': {
+            'pattern': '{time}, {actor} {action} {object}.',
+            'time': ['Ce matin', 'Hier', 'La semaine dernière', 'Après la mise à jour', 'Lundi'],
+            'actor': ['notre équipe', 'deux utilisateurs', 'le service financier', 'mon collègue', "l'équipe de l'entrepôt"],
+            'action': ['a voulu', "n'a pas pu", 'devait'],
+            'object': ['exporter le rapport mensuel', 'se connecter au portail', "synchroniser l'inventaire",
+                       "imprimer les étiquettes d'expédition", 'télécharger la facture']
+        }
+    },
+    'de': {
+        'subject': {
+            'Technical': ['Problem mit {product}', 'Fehler {error} in {product}', 'Ticket {ticket}: System reagiert nicht'],
+            'Billing': ['Frage zur Rechnung {invoice}', 'Falsche Belastung auf unserem Konto', 'Ticket {ticket}: Abrechnungsdifferenz'],
+            'General Inquiry': ['Frage zu {product}', 'Informationsanfrage', 'Ticket {ticket}: Nachfrage']
+        },
+        'greeting': ['Hallo,', 'Sehr geehrtes Support-Team,', 'Guten Tag {agent},'],
+        'opening': {
+            'Technical': ['Seit gestern bricht {product} mit Fehler {error} ab.',
+                          'Wir können keine Bestellungen abschließen, weil {product} nicht mehr reagiert.'],
+            'Billing': ['Die Rechnung {invoice} enthält eine Belastung von ${amount}, die wir nicht zuordnen können.',
+                        'Die Bestellung {order} wurde doppelt berechnet.'],
+            'General Inquiry': ['Wir prüfen {product} für ein weiteres Team.',
+                                'Können Sie uns die Lieferzeit für Bestellung {order} nennen?']
+        },
+        'detail': ['Betroffen sind etwa {users} Benutzer bei {company}.', 'Wir haben die Anwendung bereits neu gestartet.',
+                   'Das Problem besteht seit {days} Tagen.', 'Screenshots der Fehlermeldung sind angehängt.',
+                   'Wir benötigen bis Ende der Woche eine Lösung.'],
+        'closing': ['Vielen Dank im Voraus.', 'Wir freuen uns auf Ihre Antwort.', 'Mit freundlichen Grüßen,'],
+        'pii': ['Sie erreichen mich unter {phone} oder {email}.', 'Meine Durchwahl: {phone}.'],
+        'clause': {
+            'pattern': '{actor} {action} {time} {object}.',
+            'time': ['heute Morgen', 'gestern', 'letzte Woche', 'nach dem Update', 'am Montag'],
+            'actor': ['Unser Team', 'Ein Kollege', 'Die Buchhaltung', 'Das Lagerpersonal', 'Unser Administrator'],
+            'action': ['hat', 'hat erneut'],
+            'object': ['versucht, den Monatsbericht zu exportieren', 'vergeblich versucht, sich im Portal anzumelden',
+                       'den Bestand nicht synchronisieren können', 'die Versandetiketten nicht drucken können',
+                       'die Rechnung nicht herunterladen können']
+        }
+    }
+}
+
+REVIEW_PHRASES = {
+    'positive': {
+        'title': ['Excellent product', 'Exceeded expectations', 'Great value', 'Highly recommended'],
+        'sentence': ['The {product} works exactly as described.', 'Setup took less than {minutes} minutes.',
+                     'Build quality is outstanding for the price.', 'Battery life is much better than my previous one.',
+                     'Customer service answered my question the same day.', 'I have used it daily for {weeks} weeks without a problem.',
+                     'Shipping was fast and the packaging was solid.', 'Would definitely buy the {product} again.']
+    },
+    'neutral': {
+        'title': ['Does the job', 'Okay for the price', 'Mixed feelings', 'Average'],
+        'sentence': ['The {product} does what it should, nothing more.', 'Setup took about {minutes} minutes.',
+                     'Some features are useful, others feel unfinished.', 'The manual could be clearer.',
+                     'It is fine for occasional use.', 'Delivery took a bit longer than expected.',
+                     'Not sure it is worth the full price.']
+    },
+    'negative': {
+        'title': ['Disappointed', 'Stopped working', 'Not as advertised', 'Would not recommend'],
+        'sentence': ['The {product} stopped working after {weeks} weeks.', 'It took {minutes} minutes just to get it started.',
+                     'The build quality feels cheap.', 'Support never answered my emails.',
+                     'The item arrived damaged.', 'Several features described online are missing.',
+                     'I am returning the {product} for a refund.']
+    }
+}
+REVIEW_CLAUSE = {
+    'pattern': '{time} I {action} {object}.',
+    'time': ['After a month,', 'On the first day', 'So far', 'During a trip', 'At home', 'At work'],
+    'action': ['used it to', 'tried to', 'mostly use it to', 'needed it to'],
+    'object': ['replace an older model', 'set up a small office', 'share files with my family', 'run a few daily tasks',
+               'connect it to my laptop', 'test it against a friend\'s unit', 'carry it around all day']
+}
+REVIEW_RATINGS = {'positive': [4, 5], 'neutral': [3, 3, 4], 'negative': [1, 2]}
+
+RISK_NOTE_PHRASES = {
+    'context': {
+        'Operational': ['A single supplier now provides {share}% of critical components for {project}.',
+                        'Unplanned downtime on the main production line increased over the last {weeks} weeks.'],
+        'Financial': ['Currency exposure on open purchase orders reached ${amount}K.',
+                      'Budget overrun on {project} is tracking at {share}% above plan.'],
+        'Strategic': ['A competitor announced a product overlapping with {project}.',
+                      'Customer concentration increased: the top accounts represent {share}% of revenue.'],
+        'Compliance': ['Upcoming regulatory changes affect data retention for {project}.',
+                       'The latest internal audit raised {count} findings on access reviews.'],
+        'Cybersecurity': ['Phishing attempts targeting finance staff rose sharply this quarter.',
+                          '{count} critical vulnerabilities remain unpatched on customer-facing systems.']
+    },
+    'assessment': ['Impact is assessed as {impact} with a likelihood of {likelihood}.',
+                   'The residual risk remains above appetite until mitigations are in place.',
+                   'Existing controls only partially address the exposure.',
+                   'Trend versus last review: {trend}.'],
+    'mitigation': ['Qualify a second source within {weeks} weeks.', 'Introduce monthly monitoring by the risk owner.',
+                   'Escalate to the steering committee for budget approval.', 'Run a tabletop exercise with the response team.',
+                   'Add a compensating control until the permanent fix is deployed.', 'Review insurance coverage for this scenario.'],
+    'next_steps': ['Next review scheduled in {weeks} weeks.', 'Owner to report progress at the next risk committee.',
+                   'Status to be updated in the risk register by month end.']
+}
+
+RISK_NOTE_CLAUSE = {
+    'pattern': '{actor} {action} {object} {time}.',
+    'actor': ['The risk owner', 'Procurement', 'The project team', 'Internal audit', 'Finance', 'The security team'],
+    'action': ['will review', 'has escalated', 'is tracking', 'flagged', 'will reassess'],
+    'object': ['the supplier exposure', 'the open control gaps', 'the budget variance', 'the incident backlog',
+               'the remediation plan', 'the key risk indicators'],
+    'time': ['this quarter', 'before the next committee', 'every month', 'by year end', 'after the audit']
+}
+
+LAB_NOTE_CLAUSE = {
+    'pattern': '{actor} {action} {object} {time}.',
+    'actor': ['Sample A', 'Sample B', 'The control group', 'The reference unit', 'The modified fixture'],
+    'action': ['showed', 'recorded', 'reached', 'maintained'],
+    'object': ['stable readings', 'a slight temperature rise', 'higher vibration amplitude', 'nominal current draw',
+               'consistent cycle times', 'minor surface wear'],
+    'time': ['throughout the run', 'after warm-up', 'in the second hour', 'near the end of the test', 'at peak load']
+}
+
+LAB_NOTE_PHRASES = {
+    'objective': {
+        'Prototype': ['Objective: validate the revised prototype design for {project}.'],
+        'Performance': ['Objective: measure throughput of the new configuration under sustained load.'],
+        'Durability': ['Objective: assess wear after {cycles} cycles in the accelerated aging rig.'],
+        'Safety': ['Objective: verify thermal cut-off behavior against the safety specification.']
+    },
+    'method': ['Samples were conditioned at {temp}°C for {hours} hours before testing.',
+               'We ran {runs} repetitions per configuration and recorded the median.',
+               'Measurements were taken with the calibrated rig (calibration due in {weeks} weeks).',
+               'Test fixtures were reset between runs to avoid carry-over effects.'],
+    'observation': ['Variance between runs stayed below {share}%.', 'One sample showed early discoloration near the joint.',
+                    'Readings drifted slightly after {hours} hours, likely due to ambient temperature.',
+                    'Noise levels were within the expected band.', 'Power draw peaked at {watts} W during start-up.'],
+    'result': {
+        True: ['Result: the design meets the acceptance criteria.', 'Result: target exceeded by {share}%.'],
+        False: ['Result: the design did not meet the acceptance criteria.', 'Result: failure observed after {cycles} cycles.']
+    },
+    'next_steps': ['Next: repeat with the updated material batch.', 'Next: share results with the design review board.',
+                   'Next: extend the test to {runs} additional samples.', 'Next: document findings in the project wiki.']
+}
+
+
+def generate_unstructured_files(config: Dict[str, Any], output_path: Path, seed: int, tables: Dict) -> None:
+    """
+    Generate unstructured documents tied to the structured keys and write them in shards.
+    
+    The parent process assigns every document its keys (ticket, customer, product, risk,
+    project, experiment) and date; shards of shard_size documents are then composed and
+    written by a process pool, each from its own seed. output_format selects JSONL or
+    Parquet shards (part-00000.jsonl ...) or one .txt file per document.
+    
+    Args:
+        config: The unstructured section of config.yml
+        output_path: Unstructured output root
+        seed: Base random seed
+        tables: Dimensions and in-memory domain tables generated so far
+    """
+    output_format = config.get('output_format', 'jsonl')
+    shard_size = config.get('shard_size', 10000)
+    workers = config.get('workers', 0) or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    
+    jobs = []
+    for doc_index, (doc_type, assign) in enumerate(DOCUMENT_KEYS.items()):
+        if doc_type not in config:
+            continue
+        spec = config[doc_type]
+        keys = assign(spec, tables, rng)
+        count = len(next(iter(keys.values())))
+        doc_dir = output_path / doc_type
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        num_shards = max(1, -(-count // shard_size))
+        print(f"  Generating {count:,} {doc_type.replace('_', ' ')} in {num_shards} shard(s) ({output_format})...")
+        for shard in range(num_shards):
+            start, end = shard * shard_size, min((shard + 1) * shard_size, count)
+            shard_keys = {column: values[start:end] for column, values in keys.items()}
+            jobs.append((doc_type, doc_index, shard, start, shard_keys, spec, seed, output_format, str(doc_dir)))
+    
+    if len(jobs) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            list(executor.map(_write_shard, jobs))
+    else:
+        for job in jobs:
+            _write_shard(job)
+
+
+def _write_shard(job: tuple) -> int:
+    """Compose one shard of documents and write it (worker entry point)."""
+    doc_type, doc_index, shard, start, keys, spec, seed, output_format, doc_dir = job
+    rng = np.random.default_rng(np.random.SeedSequence([seed, doc_index, shard]))
+    compose = DOCUMENT_COMPOSERS[doc_type]
+    count = len(next(iter(keys.values())))
+    records = [compose({column: values[i] for column, values in keys.items()}, spec, rng) for i in range(count)]
+    
+    doc_dir = Path(doc_dir)
+    if output_format == 'parquet':
+        pd.DataFrame(records).to_parquet(doc_dir / f"part-{shard:05d}.parquet", index=False)
+    elif output_format == 'files':
+        text_field = DOCUMENT_TEXT_FIELD[doc_type]
+        for offset, record in enumerate(records):
+            with open(doc_dir / f"{doc_type}_{start + offset:07d}.txt", 'w', encoding='utf-8') as f:
+                f.write(record[text_field])
+    else:
+        with open(doc_dir / f"part-{shard:05d}.jsonl", 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+    return count
+
+
+def _target_words(spec: dict, default: int, rng: np.random.Generator) -> int:
+    """Document length drawn around avg_length_words (lognormal, mean-preserving)."""
+    return max(15, int(rng.lognormal(np.log(spec.get('avg_length_words', default)) - 0.06, 0.35)))
+
+
+def _fill_to_length(sentences: List[str], pool: List[str], clause: dict, target: int, slots: dict,
+                    rng: np.random.Generator) -> List[str]:
+    """
+    Append sentences until the running word count reaches target.
+    
+    Each pool sentence is used at most once (in random order); longer documents continue
+    with sentences composed from the clause vocabulary, so text does not repeat verbatim.
+    """
+    words = sum(len(s.split()) for s in sentences)
+    order = rng.permutation(len(pool))
+    k = 0
+    while words < target:
+        if k < len(pool):
+            sentence = pool[order[k]].format(**slots)
+        else:
+            parts = {part: _pick(options, rng) for part, options in clause.items() if part != 'pattern'}
+            sentence = clause['pattern'].format(**parts)
+            sentence = sentence[0].upper() + sentence[1:]
+        sentences.append(sentence)
+        words += len(sentence.split())
+        k += 1
+    return sentences
+
+
+def _pick(options: List[str], rng: np.random.Generator) -> str:
+    return options[rng.integers(0, len(options))]
+
+
+def _dates_in_calendar(tables: Dict, count: int, rng: np.random.Generator) -> np.ndarray:
+    dates = tables['DimDate']['date'].values
+    return dates[rng.integers(0, len(dates), count)]
+
+
+# ===== Key assignment (parent process) =====
+
+def _assign_emails(spec: dict, tables: Dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Emails belong to email-channel support tickets when FactSupport was generated."""
+    count = spec.get('count', 2500)
+    languages = spec.get('languages', ['en'])
+    # Primary language dominates; the rest share 30%
+    weights = np.array([0.70] + [0.30 / max(len(languages) - 1, 1)] * (len(languages) - 1)) if len(languages) > 1 else np.ones(1)
+    keys = {
+        'email_id': np.array([f"EML-{i + 1:08d}" for i in range(count)]),
+        'language': np.array(languages)[rng.choice(len(languages), count, p=weights / weights.sum())],
+        'contains_pii': rng.random(count) < spec.get('pii_percentage', 0.80)
+    }
+    
+    fact_support = tables.get('FactSupport')
+    dim_customer = tables['DimCustomer']
+    if fact_support is not None and len(fact_support):
+        candidates = fact_support[fact_support['channel'] == 'Email']
+        if len(candidates) == 0:
+            candidates = fact_support
+        picked = candidates.iloc[rng.choice(len(candidates), count, replace=count > len(candidates))]
+        keys['ticket_id'] = picked['ticket_id'].values
+        keys['customer_id'] = picked['customer_id'].values
+        keys['category'] = picked['category'].values
+        keys['sent_at'] = picked['create_date'].values
+    else:
+        keys['ticket_id'] = np.full(count, None, dtype=object)
+        keys['customer_id'] = dim_customer['customer_id'].values[rng.integers(0, len(dim_customer), count)]
+        keys['category'] = np.array(['Technical', 'Billing', 'General Inquiry'])[rng.choice(3, count, p=[0.5, 0.25, 0.25])]
+        keys['sent_at'] = _dates_in_calendar(tables, count, rng)
+    
+    customer_names = dim_customer.set_index('customer_id')['customer_name']
+    keys['customer_name'] = customer_names.reindex(keys['customer_id']).values
+    dim_product = tables['DimProduct']
+    keys['product_name'] = dim_product['product_name'].values[rng.integers(0, len(dim_product), count)]
+    return keys
+
+
+def _assign_reviews(spec: dict, tables: Dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Reviews are written by customers about products, with sentiment from sentiment_distribution."""
+    count = spec.get('count', 1500)
+    sentiment_dist = spec.get('sentiment_distribution', {'positive': 0.60, 'neutral': 0.25, 'negative': 0.15})
+    dim_product = tables['DimProduct']
+    dim_customer = tables['DimCustomer']
+    product_idx = rng.integers(0, len(dim_product), count)
+    return {
+        'review_id': np.array([f"REV-{i + 1:08d}" for i in range(count)]),
+        'product_id': dim_product['product_id'].values[product_idx],
+        'product_name': dim_product['product_name'].values[product_idx],
+        'customer_id': dim_customer['customer_id'].values[rng.integers(0, len(dim_customer), count)],
+        'sentiment': np.array(list(sentiment_dist))[
+            rng.choice(len(sentiment_dist), count, p=np.array(list(sentiment_dist.values())) / sum(sentiment_dist.values()))],
+        'review_date': _dates_in_calendar(tables, count, rng)
+    }
+
+
+def _assign_risk_notes(spec: dict, tables: Dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Risk notes comment on FactRisks entries when available, each against a project."""
+    count = spec.get('count', 500)
+    dim_project = tables['DimProject']
+    project_idx = rng.integers(0, len(dim_project), count)
+    keys = {
+        'note_id': np.array([f"RSK-NOTE-{i + 1:06d}" for i in range(count)]),
+        'project_id': dim_project['project_id'].values[project_idx],
+        'project_name': dim_project['project_name'].values[project_idx]
+    }
+    fact_risks = tables.get('FactRisks')
+    if fact_risks is not None and len(fact_risks):
+        picked = fact_risks.iloc[rng.integers(0, len(fact_risks), count)]
+        keys.update({'risk_id': picked['risk_id'].values, 'risk_category': picked['risk_category'].values,
+                     'impact': picked['impact'].values, 'likelihood': picked['likelihood'].values,
+                     'author_id': picked['owner_id'].values, 'note_date': picked['risk_date'].values})
+    else:
+        dim_employee = tables['DimEmployee']
+        keys.update({
+            'risk_id': np.full(count, None, dtype=object),
+            'risk_category': np.array(list(RISK_NOTE_PHRASES['context']))[rng.integers(0, 5, count)],
+            'impact': np.array(['Low', 'Medium', 'High', 'Critical'])[rng.integers(0, 4, count)],
+            'likelihood': np.array(['Unlikely', 'Possible', 'Likely'])[rng.integers(0, 3, count)],
+            'author_id': dim_employee['employee_id'].values[rng.integers(0, len(dim_employee), count)],
+            'note_date': _dates_in_calendar(tables, count, rng)
+        })
+    return keys
+
+
+def _assign_lab_notes(spec: dict, tables: Dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Lab notes document FactExperiments runs when available, otherwise project work."""
+    count = spec.get('count', 500)
+    dim_project = tables['DimProject']
+    project_names = dim_project.set_index('project_id')['project_name']
+    fact_experiments = tables.get('FactExperiments')
+    if fact_experiments is not None and len(fact_experiments):
+        picked = fact_experiments.iloc[rng.integers(0, len(fact_experiments), count)]
+        keys = {'experiment_id': picked['experiment_id'].values, 'project_id': picked['project_id'].values,
+                'researcher_id': picked['researcher_id'].values, 'experiment_type': picked['experiment_type'].values,
+                'is_successful': picked['is_successful'].values, 'note_date': picked['experiment_date'].values}
+    else:
+        dim_employee = tables['DimEmployee']
+        keys = {
+            'experiment_id': np.full(count, None, dtype=object),
+            'project_id': dim_project['project_id'].values[rng.integers(0, len(dim_project), count)],
+            'researcher_id': dim_employee['employee_id'].values[rng.integers(0, len(dim_employee), count)],
+            'experiment_type': np.array(list(LAB_NOTE_PHRASES['objective']))[rng.integers(0, 4, count)],
+            'is_successful': rng.random(count) < 0.35,
+            'note_date': _dates_in_calendar(tables, count, rng)
+        }
+    keys['note_id'] = np.array([f"LAB-NOTE-{i + 1:06d}" for i in range(count)])
+    keys['project_name'] = project_names.reindex(keys['project_id']).values
+    return keys
+
+
+# ===== Document composition (worker processes) =====
+
+def _compose_email(keys: dict, spec: dict, rng: np.random.Generator) -> dict:
+    phrases = EMAIL_PHRASES.get(keys['language'], EMAIL_PHRASES['en'])
+    category = keys['category'] if keys['category'] in phrases['subject'] else 'General Inquiry'
+    sender = f"{_pick(FIRST_NAMES, rng)} {_pick(LAST_NAMES, rng)}"
+    slots = {
+        'product': keys['product_name'], 'ticket': keys['ticket_id'] or 'n/a', 'company': keys['customer_name'],
+        'agent': _pick(FIRST_NAMES, rng), 'error': f"E{rng.integers(100, 999)}", 'invoice': f"INV-{rng.integers(100000, 999999)}",
+        'order': f"SO-{rng.integers(1000000, 9999999)}", 'amount': f"{rng.uniform(50, 25000):,.2f}",
+        'users': int(rng.integers(2, 500)), 'days': int(rng.integers(1, 14)),
+        'phone': f"+1-{rng.integers(200, 999)}-{rng.integers(200, 999)}-{rng.integers(1000, 9999)}",
+        'email': f"{sender.split()[0].lower()}.{sender.split()[1].lower()}@example.com"
+    }
+    sentences = [_pick(phrases['opening'][category], rng).format(**slots)]
+    target = _target_words(spec, 150, rng) - 12
+    body = _fill_to_length(sentences, phrases['detail'], phrases['clause'], target, slots, rng)
+    if keys['contains_pii']:
+        body.append(_pick(phrases['pii'], rng).format(**slots))
+    text = '\n\n'.join([_pick(phrases['greeting'], rng).format(**slots), ' '.join(body),
+                        _pick(phrases['closing'], rng), f"{sender}\n{keys['customer_name']}"])
+    return {
+        'email_id': keys['email_id'], 'ticket_id': keys['ticket_id'], 'customer_id': keys['customer_id'],
+        'language': keys['language'], 'sent_at': pd.Timestamp(keys['sent_at']).strftime('%Y-%m-%d %H:%M:%S'),
+        'subject': _pick(phrases['subject'][category], rng).format(**slots),
+        'email_body': text, 'contains_pii': bool(keys['contains_pii'])
+    }
+
+
+def _compose_review(keys: dict, spec: dict, rng: np.random.Generator) -> dict:
+    phrases = REVIEW_PHRASES[keys['sentiment']]
+    slots = {'product': keys['product_name'], 'minutes': int(rng.integers(5, 90)), 'weeks': int(rng.integers(1, 30))}
+    sentences = _fill_to_length([], phrases['sentence'], REVIEW_CLAUSE, _target_words(spec, 80, rng), slots, rng)
+    return {
+        'review_id': keys['review_id'], 'product_id': keys['product_id'], 'customer_id': keys['customer_id'],
+        'review_date': str(pd.Timestamp(keys['review_date']).date()),
+        'rating': int(_pick(REVIEW_RATINGS[keys['sentiment']], rng)), 'sentiment': keys['sentiment'],
+        'review_title': _pick(phrases['title'], rng), 'review_text': ' '.join(sentences)
+    }
+
+
+def _compose_risk_note(keys: dict, spec: dict, rng: np.random.Generator) -> dict:
+    slots = {'project': keys['project_name'], 'share': int(rng.integers(5, 60)), 'weeks': int(rng.integers(2, 12)),
+             'amount': int(rng.integers(50, 5000)), 'count': int(rng.integers(1, 12)), 'impact': keys['impact'].lower(),
+             'likelihood': keys['likelihood'].lower(), 'trend': _pick(['increasing', 'stable', 'decreasing'], rng)}
+    category = keys['risk_category'] if keys['risk_category'] in RISK_NOTE_PHRASES['context'] else 'Operational'
+    sentences = [_pick(RISK_NOTE_PHRASES['context'][category], rng).format(**slots),
+                 _pick(RISK_NOTE_PHRASES['assessment'], rng).format(**slots)]
+    target = _target_words(spec, 200, rng) - 10
+    sentences = _fill_to_length(sentences, RISK_NOTE_PHRASES['mitigation'],
+                                RISK_NOTE_CLAUSE, target, slots, rng)
+    sentences.append(_pick(RISK_NOTE_PHRASES['next_steps'], rng).format(**slots))
+    return {
+        'note_id': keys['note_id'], 'risk_id': keys['risk_id'], 'project_id': keys['project_id'],
+        'author_id': keys['author_id'], 'note_date': str(pd.Timestamp(keys['note_date']).date()),
+        'risk_category': category, 'note_text': ' '.join(sentences)
+    }
+
+
+def _compose_lab_note(keys: dict, spec: dict, rng: np.random.Generator) -> dict:
+    slots = {'project': keys['project_name'], 'cycles': int(rng.integers(500, 50000)), 'temp': int(rng.integers(15, 85)),
+             'hours': int(rng.integers(2, 72)), 'runs': int(rng.integers(3, 20)), 'weeks': int(rng.integers(1, 12)),
+             'share': round(float(rng.uniform(0.5, 12)), 1), 'watts': int(rng.integers(20, 2000))}
+    experiment_type = keys['experiment_type'] if keys['experiment_type'] in LAB_NOTE_PHRASES['objective'] else 'Prototype'
+    successful = bool(keys['is_successful'])
+    sentences = [_pick(LAB_NOTE_PHRASES['objective'][experiment_type], rng).format(**slots)]
+    target = _target_words(spec, 250, rng) - 20
+    sentences = _fill_to_length(sentences, LAB_NOTE_PHRASES['method'] + LAB_NOTE_PHRASES['observation'],
+                                LAB_NOTE_CLAUSE, target, slots, rng)
+    sentences += [_pick(LAB_NOTE_PHRASES['result'][successful], rng).format(**slots),
+                  _pick(LAB_NOTE_PHRASES['next_steps'], rng).format(**slots)]
+    return {
+        'note_id': keys['note_id'], 'experiment_id': keys['experiment_id'], 'project_id': keys['project_id'],
+        'researcher_id': keys['researcher_id'], 'note_date': str(pd.Timestamp(keys['note_date']).date()),
+        'experiment_type': experiment_type, 'is_successful': successful, 'note_text': ' '.join(sentences)
+    }
+
+
+DOCUMENT_KEYS: Dict[str, Callable] = {
+    'callcenter_emails': _assign_emails,
+    'product_reviews': _assign_reviews,
+    'risk_notes': _assign_risk_notes,
+    'rd_lab_notes': _assign_lab_notes
+}
+
+DOCUMENT_COMPOSERS: Dict[str, Callable] = {
+    'callcenter_emails': _compose_email,
+    'product_reviews': _compose_review,
+    'risk_notes': _compose_risk_note,
+    'rd_lab_notes': _compose_lab_note
+}
+
+# Field written to the .txt file in per-file mode
+DOCUMENT_TEXT_FIELD = {
+    'callcenter_emails': 'email_body',
+    'product_reviews': 'review_text',
+    'risk_notes': 'note_text',
+    'rd_lab_notes': 'note_text'
+}